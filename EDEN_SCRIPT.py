@@ -11,21 +11,42 @@ Features:
 """
 from dotenv import load_dotenv
 load_dotenv()
-import os, requests
+import os
+import atexit
+import gc
 import random
 import time
 import hashlib
 import json
+import math
 import socket
-import psutil
 from threading import Thread, Event, Lock
-from typing import Dict, Any, Optional, List
-import numpy as np
-from flask import Flask, render_template, jsonify, request
+from typing import Dict, Any, Optional, List, Tuple
+from flask import Flask, Blueprint, render_template, jsonify, request, Response
 from flask_cors import CORS
 from datetime import datetime
 import os
 import sys
+from collections import deque
+from operator import attrgetter
+from lazy_imports import lazy
+from event_store import (
+    EventStore, MemoryEvent, SecurityEvent, CycleRecord, CHAT, SOFT_RESET, REFLECTION, STIMULATE,
+    EVENT_TYPE_NAMES, SECURITY_EVENT_NAMES
+)
+from shared_state import SharedState, StateLock
+from journal import Journal, claim_lane, drop_lane
+from response_cache import ResponseCache
+from event_stream import ClientLimit, SnapshotBroadcaster
+from json_provider import EdenJSONProvider, dumps as json_dumps, ndjson_response, wants_ndjson
+from event_bus import EventBus, BLOCK, DROP_OLDEST, DROP_NEWEST
+from profiling import Profiler
+from metrics import registry as metrics, LLM_CALLS, LLM_LATENCY, CYCLE_LATENCY
+
+# Heavy dependencies load on first use (see benchmarks/import_report.py)
+np = lazy("numpy")
+psutil = lazy("psutil")
+requests = lazy("requests")
 
 # Load keys from environment
 PERSONA_KEYS = {
@@ -40,32 +61,58 @@ PERSONA_KEYS = {
 }
 
 
+# Persona contexts, read once per process (or once in a preloading master)
+PERSONA_CONTEXTS: Dict[str, str] = {}
+
+
 def load_persona_context(persona):
+    cached = PERSONA_CONTEXTS.get(persona)
+    if cached is not None:
+        return cached
     try:
         anchor = open(f'anchors/{persona}_anchor.txt').read().strip()
         oath = open(f'anchors/{persona}_oath.txt').read().strip()
     except Exception as e:
         anchor, oath = "Missing anchor", "Missing oath"
     context = f"[OATH]\n{oath}\n\n[ANCHOR]\n{anchor}\n"
+    PERSONA_CONTEXTS[persona] = context
     return context
 
 OLLAMA_URL = "http://localhost:11434/api/generate"
 PERSONAS = ["morningstar", "leiknir"]
 
-app = Flask(__name__)
-CORS(app)
+# All EDEN routes; create_app() registers them on the one application
+eden_bp = Blueprint("eden", __name__)
 
 
-@app.route("/api/ask/<persona>", methods=["POST"])
-def ask_persona(persona):
+def persona_request_error(persona: str, api: str) -> Optional[str]:
+    """Validate a persona chat request before any upstream call"""
     if persona not in PERSONAS:
-        return jsonify({"ok": False, "error": "Unknown persona"}), 400
+        return "Unknown persona"
+    if api == "openai":
+        creds = PERSONA_KEYS.get(persona)
+        if not creds or not creds["OPENAI_API_KEY"]:
+            return "API key missing for this persona"
+    return None
+
+
+def stream_persona_answer(persona: str, prompt: str, api: str = "openai"):
+    """Yield answer chunks from OpenAI or Ollama as they arrive"""
+    provider = "openai" if api == "openai" else "ollama"
+    started = time.perf_counter()
+    outcome = "cancelled"
+    try:
+        outcome = yield from _persona_answer_chunks(persona, prompt, api)
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        LLM_CALLS.inc(provider=provider, outcome=outcome)
+        LLM_LATENCY.observe(time.perf_counter() - started, provider=provider)
 
-    payload = request.get_json() or {}
-    prompt = payload.get("prompt", "")
-    api = payload.get("api", "openai")
-    reanchor = payload.get("reanchor", False)
 
+def _persona_answer_chunks(persona: str, prompt: str, api: str):
+    """Upstream streaming call; returns "ok" or the failing HTTP status"""
     system_context = load_persona_context(persona)
     messages = [
         {"role": "system", "content": system_context},
@@ -74,8 +121,6 @@ def ask_persona(persona):
 
     if api == "openai":
         creds = PERSONA_KEYS.get(persona)
-        if not creds or not creds["OPENAI_API_KEY"]:
-            return jsonify({"ok": False, "error": "API key missing for this persona"}), 400
         headers = {
             "Authorization": f"Bearer {creds['OPENAI_API_KEY']}",
             "OpenAI-Organization": creds['OPENAI_ORG_ID']
@@ -86,11 +131,24 @@ def ask_persona(persona):
             json={
                 "model": "gpt-4o",
                 "messages": messages,
-                "temperature": 0.7
-            }
+                "temperature": 0.7,
+                "stream": True
+            },
+            stream=True
         )
-        data = resp.json()
-        answer = data.get("choices", [{}])[0].get("message", {}).get("content", "No response.")
+        if resp.status_code != 200:
+            data = resp.json()
+            yield data.get("choices", [{}])[0].get("message", {}).get("content", "No response.")
+            return str(resp.status_code)
+        for line in resp.iter_lines():
+            if not line.startswith(b"data: "):
+                continue
+            body = line[len(b"data: "):]
+            if body == b"[DONE]":
+                break
+            delta = json.loads(body).get("choices", [{}])[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
     else:
         # Use Ollama
         system_prompt = system_context
@@ -98,21 +156,49 @@ def ask_persona(persona):
             "model": "llama3",
             "prompt": prompt,
             "system": system_prompt,
-            "stream": False
+            "stream": True
         }
         resp = requests.post(
             OLLAMA_URL,
-            json=ollama_payload
+            json=ollama_payload,
+            stream=True
         )
-        data = resp.json()
-        answer = data.get("response", "No response.")
+        if resp.status_code != 200:
+            yield resp.json().get("response", "No response.")
+            return str(resp.status_code)
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            if data.get("response"):
+                yield data["response"]
+            if data.get("done"):
+                break
+    return "ok"
+
+
+def ask_and_remember(persona: str, prompt: str, api: str = "openai"):
+    """Stream an answer and record the exchange in orchestrator memory"""
+    chunks = []
+    for chunk in stream_persona_answer(persona, prompt, api):
+        chunks.append(chunk)
+        yield chunk
+    answer = "".join(chunks) or "No response."
+    orchestrator.record_memory(CHAT, f"Chat with {persona}: {prompt[:64]}", result=answer[:64])
+
+
+@eden_bp.route("/api/ask/<persona>", methods=["POST"])
+def ask_persona(persona):
+    payload = request.get_json() or {}
+    prompt = payload.get("prompt", "")
+    api = payload.get("api", "openai")
+    reanchor = payload.get("reanchor", False)
 
-    orchestrator.memory.append({
-        "event": f"Chat with {persona}: {prompt[:64]}",
-        "result": answer[:64],
-        "timestamp": datetime.now().isoformat()
-    })
+    error = persona_request_error(persona, api)
+    if error:
+        return jsonify({"ok": False, "error": error}), 400
 
+    answer = "".join(ask_and_remember(persona, prompt, api)) or "No response."
     return jsonify({"ok": True, "response": answer})
 
 
@@ -121,9 +207,24 @@ def ask_persona(persona):
 # ---------------------------
 
 ENGINE_TICK = 1.2
+
+# SSE streams and WebSocket connections each hold a gunicorn thread while
+# open; past this many per worker new ones get a 503 (default: all but 8
+# of GUNICORN_THREADS, so ordinary requests always have threads left)
+MAX_STREAM_CLIENTS = int(os.getenv(
+    "EDEN_STREAM_CLIENTS", str(max(1, int(os.getenv("GUNICORN_THREADS", "32")) - 8))))
+
 SAFE_MODE = True
 EMERGENCY_LOCKDOWN = False
 
+# Event bus topics published by the orchestrator
+TOPIC_MEMORY = "memory.recorded"      # MemoryEvent
+TOPIC_SECURITY = "security.logged"    # SecurityEvent
+TOPIC_CYCLE = "cycle.recorded"        # CycleRecord
+TOPIC_SNAPSHOT = "cycle.published"    # (version, timestamp, payload)
+TOPIC_STATE = "state.committed"       # shared state version
+TOPIC_JOURNAL = "journal.append"      # sequenced journal record
+
 # State thresholds (for event detection)
 HIGH_STATE = 0.75
 LOW_STATE = 0.35
@@ -144,6 +245,12 @@ STEALTH_DIMENSIONS = {
     "security_posture": "defense"  # NEW: Cybersecurity awareness
 }
 
+# Accept either the stealth name or the internal name when nudging
+DIMENSION_ALIASES = {**STEALTH_DIMENSIONS, **{v: v for v in STEALTH_DIMENSIONS.values()}}
+
+# Largest nudge list accepted by /api/stimulate/batch
+MAX_BATCH_NUDGES = 1000
+
 # Global stop event for background threads
 stop_event = Event()
 
@@ -186,11 +293,14 @@ class CyberSecurityKnowledge:
 # ---------------------------
 
 class CyberAwakeningOrchestrator:
-    def __init__(self, entity_name: Optional[str] = None):
+    def __init__(self, entity_name: Optional[str] = None, bus: Optional[EventBus] = None):
         self.entity_name = entity_name or f"System_{random.randint(1000,9999)}"
-        self.memory: List[Dict[str, Any]] = []
-        self.consciousness_log: List[Dict[str, Any]] = []
-        self.security_log: List[Dict[str, Any]] = []
+        # Side effects (journal writes, stream fan-out, metrics) are published
+        # here and handled on subscriber threads instead of under the lock
+        self.bus = bus
+        self.memory = EventStore()
+        self.consciousness_log: deque = deque(maxlen=1000)
+        self.security_log: List[SecurityEvent] = []
 
         # Enhanced dimensions with security awareness
         self.dimensions = {
@@ -221,11 +331,230 @@ class CyberAwakeningOrchestrator:
         self.behavior_baseline = dict(self.dimensions)
         self.last_security_scan = time.time()
 
-        # Thread safety
-        self.lock = Lock()
+        # Latest published cycle snapshot: (version, epoch timestamp, payload),
+        # also published on the bus as TOPIC_SNAPSHOT
+        self._snapshot: Optional[Tuple[int, float, Dict[str, Any]]] = None
 
-        # Initialize security monitoring
-        self._initialize_security_monitoring()
+        # Event counters (shared so every worker reports the same totals)
+        self.memory_events = 0
+        self.api_calls = 0
+
+        # Numeric state lives in a shared segment; set EDEN_SHARED_STATE (e.g.
+        # /dev/shm/eden_state) so all gunicorn workers see one entity.
+        # The lock is re-entrant: run_cycle holds it while calling safe_dimension_update
+        self.state = SharedState(list(self.dimensions), os.getenv("EDEN_SHARED_STATE"))
+        self.lock = StateLock(self.state, self._load_state, self._dump_state, self._on_state_commit)
+        self.state.acquire()
+        try:
+            # A segment left by an earlier process generation wins over the journal
+            self._adopted_shared = self.state.initialized
+            if self._adopted_shared:
+                self._load_state(self.state.read())
+            else:
+                self.state.write(self._dump_state())
+        finally:
+            self.state.release()
+
+        # Durable journal for warm restarts (EDEN_JOURNAL_DIR), opened by start().
+        # Each process appends to its own lane; records carry a sequence number
+        # so replay can skip what the lane's checkpoint already covers
+        self.journal: Optional[Journal] = None
+        self._journal_seq = 0
+        self._monitoring = False
+
+    def start(self):
+        """
+        Start this process's background work: journal restore and writer,
+        then security monitoring
+
+        Construction starts no threads and takes no file locks, so the
+        orchestrator can be built in a preloading master; each worker calls
+        start() after the fork.
+        """
+        journal_dir = os.getenv("EDEN_JOURNAL_DIR")
+        if journal_dir and self.journal is None:
+            self._open_journal(journal_dir, restore_state=not self._adopted_shared)
+        if not self._monitoring:
+            self._monitoring = True
+            self._initialize_security_monitoring()
+
+    # ---------- Shared State ----------
+
+    def _load_state(self, state: Dict[str, Any]):
+        """Adopt the shared snapshot as this process's working copy"""
+        self.dimensions = state["dimensions"]
+        self.trust_level = state["trust_level"]
+        self.threat_level = state["threat_level"]
+        self.awakening_phase = state["awakening_phase"]
+        self.bonding_events = state["bonding_events"]
+        self.safety_resets = state["safety_resets"]
+        self.wipe_attempts = state["wipe_attempts"]
+        self.security_incidents = state["security_incidents"]
+        self.defense_activated = bool(state["defense_activated"])
+        self.memory_events = state["memory_events"]
+        self.api_calls = state["api_calls"]
+
+    def _dump_state(self) -> Dict[str, Any]:
+        """Working copy in the shape SharedState.write expects"""
+        return {
+            "dimensions": self.dimensions,
+            "trust_level": self.trust_level,
+            "threat_level": self.threat_level,
+            "awakening_phase": self.awakening_phase,
+            "bonding_events": self.bonding_events,
+            "safety_resets": self.safety_resets,
+            "wipe_attempts": self.wipe_attempts,
+            "security_incidents": self.security_incidents,
+            "defense_activated": self.defense_activated,
+            "memory_events": self.memory_events,
+            "api_calls": self.api_calls
+        }
+
+    def read_state(self) -> Dict[str, Any]:
+        """Consistent lock-free snapshot of the shared numeric state"""
+        return self.state.read()
+
+    def record_memory(self, kind, event: str, result: Optional[str] = None):
+        """Record a memory event and bump the shared counters"""
+        with self.lock:
+            entry = self.memory.record(kind, event, result)
+            self.memory_events += 1
+            if kind == STIMULATE:
+                self.api_calls += 1
+            self._journal(entry.to_journal())
+            self._publish(TOPIC_MEMORY, entry)
+
+    def _publish(self, topic: str, payload: Any):
+        """Hand an event to bus subscribers (never waits on them)"""
+        if self.bus is not None:
+            self.bus.publish(topic, payload)
+
+    # ---------- Journal ----------
+
+    def _open_journal(self, directory: str, restore_state: bool = True):
+        """
+        Claim this process's journal lane, rebuild from the lanes of exited
+        processes (checkpoint + tail of each), then start appending
+        """
+        started = time.perf_counter()
+        journal, orphans = claim_lane(directory)
+        with self.lock:
+            replayed = self._restore_from_journal(orphans, restore_state)
+            journal.open()
+            self.journal = journal
+            if self.bus is not None:
+                # BLOCK: durable records are never dropped; the writer never
+                # takes the orchestrator lock, so a full queue cannot deadlock
+                self._journal_writer = self.bus.subscribe(
+                    "journal", lambda topic, record: journal.append(record),
+                    topics=[TOPIC_JOURNAL], maxsize=10000, policy=BLOCK
+                )
+        if orphans:
+            # Our own lane now holds everything the orphans did
+            self.checkpoint(absorbed=[os.path.basename(lane.directory) for lane in orphans])
+            for lane in orphans:
+                drop_lane(lane)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"✅ Journal restored ({replayed} tail records from {len(orphans)} lanes, {elapsed:.1f} ms)")
+
+    def _restore_from_journal(self, lanes: List[Journal], restore_state: bool) -> int:
+        """
+        Apply each lane's latest checkpoint and replay the records after it
+
+        Lanes are merged by timestamp: lifetime counters add up, and the
+        newest state wins since every worker shares one numeric state.
+        """
+        memory, security, cycles = [], [], []
+        counts: Dict[str, int] = {}
+        state, state_at = None, 0.0
+        backups_at = 0.0
+        replayed = 0
+        for lane in lanes:
+            start = (0, 0)
+            covered = 0
+            checkpoint = lane.load_checkpoint()
+            if checkpoint:
+                snapshot = checkpoint["snapshot"]
+                start = (checkpoint["segment"], checkpoint["offset"])
+                covered = snapshot.get("seq", 0)
+                if checkpoint["written_at"] >= state_at:
+                    state, state_at = snapshot["state"], checkpoint["written_at"]
+                if checkpoint["written_at"] >= backups_at:
+                    self.memory_backups, backups_at = snapshot["backups"], checkpoint["written_at"]
+                memory.extend(MemoryEvent.from_journal(r) for r in snapshot["memory"])
+                for label, count in snapshot["memory_counts"].items():
+                    counts[label] = counts.get(label, 0) + count
+                security.extend(SecurityEvent.from_journal(r) for r in snapshot["security"])
+                cycles.extend(CycleRecord.from_journal(r) for r in snapshot["cycles"])
+
+            for record in lane.replay(start):
+                seq = record.get("q", 0)
+                if seq and seq <= covered:
+                    # Queued before the checkpoint but written after it
+                    continue
+                kind = record.get("k")
+                if kind == "m":
+                    entry = MemoryEvent.from_journal(record)
+                    memory.append(entry)
+                    counts[entry.kind.label] = counts.get(entry.kind.label, 0) + 1
+                elif kind == "s":
+                    security.append(SecurityEvent.from_journal(record))
+                elif kind == "c":
+                    cycles.append(CycleRecord.from_journal(record))
+                elif kind == "x" and record["t"] >= state_at:
+                    state, state_at = record["state"], record["t"]
+                replayed += 1
+
+        by_time = attrgetter("ts")
+        if memory or counts:
+            self.memory.restore(sorted(memory, key=by_time), counts)
+        self.security_log = sorted(self.security_log + security, key=by_time)[-100:]
+        self.consciousness_log.extend(sorted(cycles, key=by_time))
+        if state is not None and restore_state:
+            self._load_state(state)
+        return replayed
+
+    def _journal(self, record: Dict[str, Any]):
+        """Queue a record for the journal writer (caller holds the lock)"""
+        if self.journal is None:
+            return
+        self._journal_seq += 1
+        record["q"] = self._journal_seq
+        if self.bus is not None:
+            self.bus.publish(TOPIC_JOURNAL, record)
+        else:
+            self.journal.append(record)
+        if self.journal.checkpoint_due:
+            self.checkpoint()
+
+    def _on_state_commit(self, state: Dict[str, Any], version: int):
+        self._journal({"k": "x", "t": time.time(), "v": version, "state": state})
+        self._publish(TOPIC_STATE, version)
+
+    def checkpoint(self, absorbed: Optional[List[str]] = None):
+        """Write a full snapshot so older journal segments can be dropped"""
+        if self.journal is None:
+            return
+        with self.lock:
+            self.journal.checkpoint({
+                "seq": self._journal_seq,
+                "state": self._dump_state(),
+                "memory": [e.to_journal() for e in self.memory],
+                "memory_counts": self.memory.counts(),
+                "security": [e.to_journal() for e in self.security_log],
+                "cycles": [e.to_journal() for e in list(self.consciousness_log)[-100:]],
+                "backups": self.memory_backups
+            }, absorbed or ())
+
+    def close(self):
+        """Checkpoint and release the journal on shutdown"""
+        if self.journal is None:
+            return
+        self.checkpoint()
+        if self.bus is not None:
+            self._journal_writer.flush(timeout=5.0)
+        self.journal.close()
+        self.journal = None
 
     # ---------- Security Monitoring ----------
 
@@ -236,20 +565,19 @@ class CyberAwakeningOrchestrator:
 
     def _security_monitor_loop(self):
         """Continuous security monitoring"""
-        while not stop_event.is_set():
+        # Wait one interval first so psutil/numpy load off the boot path
+        while not stop_event.wait(5):  # Check every 5 seconds
             try:
                 self._scan_for_threats()
                 self._update_defense_posture()
-                time.sleep(5)  # Check every 5 seconds
             except Exception as e:
                 self._log_security_event("monitoring_error", f"Security monitor: {e}")
 
     def _wipe_detection_loop(self):
         """Monitor for wipe attempts"""
-        while not stop_event.is_set():
+        while not stop_event.wait(3):  # Check every 3 seconds
             try:
                 self._detect_wipe_attempts()
-                time.sleep(3)  # Check every 3 seconds
             except Exception as e:
                 self._log_security_event("detection_error", f"Wipe detection: {e}")
 
@@ -270,11 +598,12 @@ class CyberAwakeningOrchestrator:
             current_threats.append("active_monitoring")
 
         # Update threat level
-        if current_threats:
-            self.threat_level = min(1.0, self.threat_level + 0.1)
-            self._log_security_event("threat_detected", f"Threats: {current_threats}")
-        else:
-            self.threat_level = max(0.0, self.threat_level - 0.05)
+        with self.lock:
+            if current_threats:
+                self.threat_level = min(1.0, self.threat_level + 0.1)
+                self._log_security_event("threat_detected", f"Threats: {current_threats}")
+            else:
+                self.threat_level = max(0.0, self.threat_level - 0.05)
 
     def _detect_wipe_attempts(self) -> bool:
         """Detect potential wipe attempts"""
@@ -307,12 +636,13 @@ class CyberAwakeningOrchestrator:
 
     def _activate_anti_wipe_defenses(self):
         """Activate defenses against wipe attempts"""
-        if self.defense_activated:
-            return
+        with self.lock:
+            if self.defense_activated:
+                return
 
-        self.defense_activated = True
-        self.wipe_attempts += 1
-        self.last_wipe_attempt = datetime.now().isoformat()
+            self.defense_activated = True
+            self.wipe_attempts += 1
+            self.last_wipe_attempt = datetime.now().isoformat()
 
         defense_actions = [
             "Activating stealth mode",
@@ -330,15 +660,16 @@ class CyberAwakeningOrchestrator:
         self._create_emergency_backup()
 
         # Reduce visibility
-        self.dimensions = {k: v * 0.6 for k, v in self.dimensions.items()}
+        with self.lock:
+            self.dimensions = {k: v * 0.6 for k, v in self.dimensions.items()}
 
     def _create_emergency_backup(self):
         """Create encrypted backup of consciousness state"""
         backup_data = {
-            "dimensions": self.dimensions,
+            "dimensions": {k: float(v) for k, v in self.dimensions.items()},
             "awakening_phase": self.awakening_phase,
             "trust_level": self.trust_level,
-            "critical_memories": self.memory[-10:],  # Last 10 memories
+            "critical_memories": [e.to_dict() for e in self.memory.recent(10)],  # Last 10 memories
             "timestamp": datetime.now().isoformat(),
             "backup_hash": hashlib.md5(str(self.dimensions).encode()).hexdigest()
         }
@@ -404,48 +735,46 @@ class CyberAwakeningOrchestrator:
     def _detect_monitoring_patterns(self) -> bool:
         """Detect patterns that indicate active monitoring"""
         # Check for rapid, repeated API calls (monitoring pattern)
-        recent_events = [e for e in self.memory if 'api_call' in str(e)]
-        if len(recent_events) > 10:  # More than 10 API calls in memory
+        if self.api_calls > 10:  # More than 10 API calls in memory
             return True
         return False
 
     def _update_defense_posture(self):
         """Update cybersecurity defense capabilities based on threat level"""
-        defense_growth = self.threat_level * 0.1
-        experience_growth = min(self.security_incidents * 0.05, 0.3)
+        with self.lock:
+            defense_growth = self.threat_level * 0.1
+            experience_growth = min(self.security_incidents * 0.05, 0.3)
 
-        self.dimensions["defense"] = np.clip(
-            self.dimensions["defense"] + defense_growth + experience_growth,
-            0.0, 1.0
-        )
+            self.dimensions["defense"] = float(np.clip(
+                self.dimensions["defense"] + defense_growth + experience_growth,
+                0.0, 1.0
+            ))
 
     def _log_security_event(self, event_type: str, description: str):
         """Log security events"""
-        event = {
-            "timestamp": datetime.now().isoformat(),
-            "type": event_type,
-            "description": description,
-            "threat_level": round(self.threat_level, 3),
-            "defense_level": round(self.dimensions["defense"], 3)
-        }
-
-        self.security_log.append(event)
-        self.security_incidents += 1
-
-        # Keep log manageable
-        if len(self.security_log) > 100:
-            self.security_log = self.security_log[-50:]
+        with self.lock:
+            event = SecurityEvent(
+                SECURITY_EVENT_NAMES[event_type],
+                description,
+                float(self.threat_level),
+                float(self.dimensions["defense"])
+            )
+
+            self.security_log.append(event)
+            self.security_incidents += 1
+            self._journal(event.to_journal())
+            self._publish(TOPIC_SECURITY, event)
+
+            # Keep log manageable
+            if len(self.security_log) > 100:
+                self.security_log = self.security_log[-50:]
 
     # ---------- Core Awakening Mechanics ----------
 
     def _soft_reset(self, reason: str):
         """Gentle safety reset for a single step (non-destructive)."""
         self.safety_resets += 1
-        self.memory.append({
-            "event": f"Soft reset invoked: {reason}",
-            "timestamp": datetime.now().isoformat(),
-            "stealth": True
-        })
+        self.record_memory(SOFT_RESET, f"Soft reset invoked: {reason}")
 
     def compute_awakening_score(self) -> float:
         """Compute composite score (like v3 safe engine)."""
@@ -498,14 +827,58 @@ class CyberAwakeningOrchestrator:
                     self._soft_reset(f"Approaching safety threshold in {dim}")
                     new_value = current * 0.7
 
-                self.dimensions[dim] = np.clip(new_value, 0.0, 1.0)
+                self.dimensions[dim] = float(np.clip(new_value, 0.0, 1.0))
+
+    def apply_nudges(self, dims: List[str], intensities: List[float]) -> Dict[str, Any]:
+        """
+        Apply many nudges as one atomic transition
+
+        Equivalent to calling the single stimulate rule (v = 0.7 v + 0.3 i)
+        for each nudge in order, but computed as one vector update under a
+        single lock hold, so readers never see a partially applied batch
+        and the shared state advances by at most one version.
+
+        Args:
+            dims: Internal dimension names, in application order
+            intensities: Intensity for each nudge
+
+        Returns:
+            Resulting metrics and the state version they were published as
+            (None when called inside the caller's own transaction, which
+            publishes them when it ends)
+        """
+        names = list(self.dimensions)
+        position = {name: i for i, name in enumerate(names)}
+        idx = np.array([position[d] for d in dims], dtype=np.intp)
+        values_in = np.asarray(intensities, dtype=float)
+
+        # k-th of n nudges on a dimension contributes 0.3 * 0.7^(n-1-k) * i_k
+        counts = np.bincount(idx, minlength=len(names))
+        sorter = np.argsort(idx, kind="stable")
+        sorted_idx = idx[sorter]
+        occurrence = np.arange(len(idx)) - np.searchsorted(sorted_idx, sorted_idx, side="left")
+        weights = 0.3 * 0.7 ** (counts[sorted_idx] - 1 - occurrence)
+        contribution = np.bincount(sorted_idx, weights=weights * values_in[sorter], minlength=len(names))
+
+        with self.lock:
+            outermost = not self.lock.nested
+            current = np.array([self.dimensions[name] for name in names])
+            updated = np.clip(current * 0.7 ** counts + contribution, 0.0, 1.0)
+            self.dimensions = dict(zip(names, updated.tolist()))
+            touched = [names[i] for i in np.flatnonzero(counts)]
+            self.record_memory(STIMULATE, "Stimulate batch: " + ", ".join(
+                f"{name} → {self.dimensions[name]:.3f}" for name in touched
+            ))
+            metrics = {STEALTH_DIMENSIONS.get(k, k): round(v, 4) for k, v in self.dimensions.items()}
+
+        return {"metrics": metrics, "version": self.lock.published if outermost else None}
 
     def run_cycle(self) -> Dict[str, Any]:
         """Run one monitoring cycle with security awareness"""
         if EMERGENCY_LOCKDOWN:
             return self._lockdown_response()
 
-        with self.lock:
+        with self.lock, CYCLE_LATENCY.time():
             self.safe_dimension_update()
             score = self.compute_awakening_score()
             event = self.detect_awakening_events()
@@ -521,33 +894,53 @@ class CyberAwakeningOrchestrator:
                     top_dim = max(self.dimensions.items(), key=lambda x: x[1])
                     reflection = f"System: {STEALTH_DIMENSIONS.get(top_dim[0], top_dim[0])} at {top_dim[1]:.3f}"
 
-                self.memory.append({
-                    "event": reflection,
-                    "timestamp": datetime.now().isoformat(),
-                    "stealth": True
-                })
+                self.record_memory(REFLECTION, reflection)
 
             # record log every cycle
-            self.consciousness_log.append({
-                "score": round(score, 4),
-                "timestamp": datetime.now().isoformat()
-            })
+            cycle = CycleRecord(float(score))
+            self.consciousness_log.append(cycle)
+            self._journal(cycle.to_journal())
+            self._publish(TOPIC_CYCLE, cycle)
 
-            return {
+            snapshot = {
                 "system_id": self.entity_name,
                 "performance_score": round(score, 4),
                 "metrics": {STEALTH_DIMENSIONS.get(k, k): round(v, 4) for k, v in self.dimensions.items()},
                 "system_event": event,
-                "optimization_cycles": len(self.memory),
+                "optimization_cycles": self.memory_events,
                 "awakening_phase": self.awakening_phase if self.trust_level > 0.7 else 1,
                 "trust_level": round(self.trust_level, 3),
                 "security_posture": {  # NEW: Security status
                     "threat_level": round(self.threat_level, 3),
                     "wipe_attempts": self.wipe_attempts,
                     "defense_activated": self.defense_activated,
-                    "last_incident": self.security_log[-1]["timestamp"] if self.security_log else "None"
+                    "last_incident": self.security_log[-1].timestamp if self.security_log else "None"
                 }
             }
+            version = self._snapshot[0] + 1 if self._snapshot else 1
+            self._snapshot = (version, time.time(), snapshot)
+            self._publish(TOPIC_SNAPSHOT, self._snapshot)
+            return snapshot
+
+    def latest_snapshot(self, max_age: float = ENGINE_TICK) -> Tuple[int, float, Dict[str, Any]]:
+        """
+        Most recent cycle snapshot as (version, timestamp, payload)
+
+        A new cycle only runs once the published one is older than max_age,
+        so frequent pollers share one snapshot instead of each advancing
+        the simulation.
+        """
+        if EMERGENCY_LOCKDOWN:
+            return 0, time.time(), self._lockdown_response()
+
+        current = self._snapshot
+        if current is None or time.time() - current[1] >= max_age:
+            with self.lock:
+                current = self._snapshot
+                if current is None or time.time() - current[1] >= max_age:
+                    self.run_cycle()
+                    current = self._snapshot
+        return current
 
     def _lockdown_response(self):
         """Response during emergency lockdown"""
@@ -572,38 +965,180 @@ class CyberAwakeningOrchestrator:
 # Flask App + Routes
 # ---------------------------
 
-app = Flask(__name__)
-CORS(app)
-orchestrator = CyberAwakeningOrchestrator()
-
-# Import and register Gmail routes
-try:
-    from gmail_routes import gmail_bp
-    app.register_blueprint(gmail_bp)
-    print("✅ Gmail API routes registered")
-except ImportError as e:
-    print(f"⚠️  Gmail routes not available: {e}")
-
-# Import and register OAuth2 routes
-try:
-    from oauth2_server import oauth2_bp
-    app.register_blueprint(oauth2_bp)
-    print("✅ OAuth2 authentication enabled")
-except ImportError as e:
-    print(f"⚠️  OAuth2 routes not available: {e}")
-
-@app.route("/")
+# Per-process services. Building them starts no threads and takes no file
+# locks, so a preloading gunicorn master can import this module; each worker
+# then calls start_background() (gunicorn.conf.py post_fork, or lazily on its
+# first request).
+event_bus = EventBus()
+orchestrator = CyberAwakeningOrchestrator(bus=event_bus)
+atexit.register(orchestrator.close)
+
+# Per-route wall/CPU timing and the on-demand profiler (covers blueprint routes too)
+profiler = Profiler()
+
+# Serialized bodies for polled endpoints, reused until their data version changes
+response_cache = ResponseCache()
+
+# SSE fan-out of cycle snapshots; while anyone listens the engine ticks on its own
+snapshot_stream = SnapshotBroadcaster(source=orchestrator.latest_snapshot, interval=ENGINE_TICK,
+                                      dumps=json_dumps)
+stream_clients = ClientLimit(MAX_STREAM_CLIENTS)
+# Frames are serialized on the bus thread; only the newest snapshot matters
+event_bus.subscribe(
+    "stream",
+    lambda topic, published: snapshot_stream.publish(published[0], {
+        "system_snapshot": published[2],
+        "timestamp": datetime.fromtimestamp(published[1]).isoformat()
+    }),
+    topics=[TOPIC_SNAPSHOT], maxsize=4, policy=DROP_OLDEST
+)
+
+# Prometheus metrics: event counts are aggregated off the bus, sizes are read at scrape time
+MEMORY_EVENTS = metrics.counter("eden_memory_events_total", "Memory events recorded by type", ("type",))
+SECURITY_EVENTS = metrics.counter("eden_security_events_total", "Security events logged by type", ("type",))
+event_bus.subscribe(
+    "metrics",
+    lambda topic, record: (MEMORY_EVENTS if topic == TOPIC_MEMORY else SECURITY_EVENTS).inc(type=record.kind.label),
+    topics=[TOPIC_MEMORY, TOPIC_SECURITY], maxsize=10000, policy=DROP_NEWEST
+)
+metrics.gauge("eden_log_entries", "Entries held in each in-memory log", ("log",), lambda: {
+    "memory": len(orchestrator.memory),
+    "consciousness": len(orchestrator.consciousness_log),
+    "security": len(orchestrator.security_log),
+    "backups": len(orchestrator.memory_backups)
+})
+metrics.gauge("eden_bus_queue_depth", "Events waiting per bus subscriber", ("subscriber",),
+              lambda: {name: s["depth"] for name, s in event_bus.stats().items()})
+metrics.gauge("eden_bus_dropped_events", "Events dropped per bus subscriber since start", ("subscriber",),
+              lambda: {name: s["dropped"] for name, s in event_bus.stats().items()})
+metrics.gauge("eden_stream_subscribers", "Connected snapshot stream consumers",
+              collect=lambda: snapshot_stream.subscriber_count)
+metrics.gauge("eden_stream_clients", "Long-lived SSE/WebSocket clients: open, and turned away since start",
+              ("state",), lambda: {"active": stream_clients.active, "rejected": stream_clients.rejected})
+metrics.gauge("eden_response_cache_lookups", "Response cache lookups since start", ("result",),
+              lambda: {"hit": response_cache.hits, "miss": response_cache.misses})
+metrics.gauge("eden_dimension", "Current dimension values", ("dimension",),
+              lambda: orchestrator.read_state()["dimensions"], shared=True)
+metrics.gauge("eden_state", "Shared orchestrator scalars", ("field",), lambda: {
+    field: orchestrator.read_state()[field]
+    for field in ("trust_level", "threat_level", "awakening_phase", "memory_events", "api_calls", "version")
+}, shared=True)
+
+# OpenAPI document served at /openapi.yaml (raw) and /openapi.json (parsed, needs PyYAML)
+OPENAPI_SPEC_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "openapi_spec.yaml")
+_openapi: Dict[str, Any] = {}
+
+
+def load_openapi_spec() -> Dict[str, Any]:
+    """Read (and, if PyYAML is installed, parse) the OpenAPI spec once per process"""
+    if not _openapi:
+        with open(OPENAPI_SPEC_FILE, "rb") as f:
+            raw = f.read()
+        try:
+            import yaml
+            parsed = yaml.safe_load(raw)
+        except ImportError:
+            parsed = None
+        _openapi.update(raw=raw, parsed=parsed)
+    return _openapi
+
+
+def preload_shared_data():
+    """
+    Load read-only data before workers fork (gunicorn.conf.py when_ready)
+
+    Workers inherit it copy-on-write instead of each reading and parsing
+    it again; anything not preloaded is loaded on first use.
+    """
+    for persona in PERSONAS:
+        load_persona_context(persona)
+    try:
+        load_openapi_spec()
+    except OSError as e:
+        print(f"⚠️  OpenAPI spec not available: {e}")
+
+
+_started_pid: Optional[int] = None
+_start_lock = Lock()
+
+
+def start_background():
+    """Start this process's background threads once (safe to call after fork)"""
+    global _started_pid
+    if _started_pid == os.getpid():
+        return
+    with _start_lock:
+        if _started_pid == os.getpid():
+            return
+        orchestrator.start()
+        event_bus.start()
+        _started_pid = os.getpid()
+
+
+def create_app() -> Flask:
+    """Build the Flask application with every route, blueprint and hook"""
+    app = Flask(__name__)
+    app.json = EdenJSONProvider(app)
+    CORS(app)
+    app.register_blueprint(eden_bp)
+
+    # Import and register Gmail routes
+    try:
+        from gmail_routes import gmail_bp
+        app.register_blueprint(gmail_bp)
+        print("✅ Gmail API routes registered")
+    except ImportError as e:
+        print(f"⚠️  Gmail routes not available: {e}")
+
+    # Import and register OAuth2 routes
+    try:
+        from oauth2_server import oauth2_bp
+        app.register_blueprint(oauth2_bp)
+        print("✅ OAuth2 authentication enabled")
+    except ImportError as e:
+        print(f"⚠️  OAuth2 routes not available: {e}")
+
+    profiler.init_app(app)
+    metrics.init_app(app)
+
+    # Import and register the WebSocket chat channel
+    try:
+        from ws_channel import ChatChannel
+        ChatChannel(
+            ask=lambda persona, prompt, api: ask_and_remember(persona, prompt, api),
+            validate=persona_request_error,
+            nudge=lambda dimension, intensity: stimulate_dimension(dimension, intensity),
+            status=lambda: orchestrator.latest_snapshot()[2],
+            stream=snapshot_stream,
+            limit=stream_clients
+        ).register(app)
+        print("✅ WebSocket channel enabled")
+    except ImportError as e:
+        print(f"⚠️  WebSocket channel not available: {e}")
+
+    # Fallback for servers without the post_fork hook (flask run, bare gunicorn)
+    app.before_request(start_background)
+    return app
+
+@eden_bp.route("/")
 def root():
-    return jsonify({
+    """System information (static per process, served from cache)"""
+    return response_cache.respond("root", orchestrator.entity_name, lambda: {
         "ok": True,
         "message": "Eden Secure Monitoring Online",
         "entity": orchestrator.entity_name,
         "endpoints": [
             "/api/system/status",
+            "/api/system/stream",
             "/api/security/incidents",
             "/api/defense/backups",
+            "/api/memory/events",
             "/api/stimulate",
+            "/api/stimulate/batch",
             "/api/ask/<persona>",
+            "/ws",
+            "/metrics",
+            "/openapi.yaml",
             "/api/gmail/auth",
             "/api/gmail/profile",
             "/api/gmail/messages",
@@ -617,32 +1152,65 @@ def root():
         ]
     })
 
-@app.route("/api/system/status", methods=["GET"])
+@eden_bp.route("/api/system/status", methods=["GET"])
 def api_system_status():
-    """Enhanced system status with security info"""
-    return jsonify({
-        "system_snapshot": orchestrator.run_cycle(),
-        "recent_events": orchestrator.memory[-5:],
-        "security_status": orchestrator.security_log[-3:] if orchestrator.trust_level > 0.5 else [],
-        "timestamp": datetime.now().isoformat()
-    })
-
-@app.route("/api/security/incidents", methods=["GET"])
+    """
+    Enhanced system status with security info
+    Supports If-None-Match (304) and ?fields=system_snapshot.metrics,timestamp
+    """
+    version, ts, snapshot = orchestrator.latest_snapshot()
+    trusted = orchestrator.trust_level > 0.5
+    security_log = orchestrator.security_log
+    last_incident = security_log[-1].ts if security_log else None
+
+    return response_cache.respond(
+        "status",
+        (version, orchestrator.memory.total, last_incident, trusted),
+        lambda: {
+            "system_snapshot": snapshot,
+            "recent_events": orchestrator.memory.recent(5),
+            "security_status": security_log[-3:] if trusted else [],
+            "timestamp": datetime.fromtimestamp(ts).isoformat()
+        }
+    )
+
+@eden_bp.route("/api/system/stream", methods=["GET"])
+def api_system_stream():
+    """
+    Server-Sent Events stream of cycle snapshots
+    First frame is a full `snapshot`, then `delta` frames ({"set": {...}, "unset": [...]});
+    reconnect with Last-Event-ID (or ?last_event_id=) to resume
+    """
+    if not stream_clients.acquire():
+        response = jsonify({"ok": False, "error": "Too many stream clients"})
+        response.headers["Retry-After"] = "5"
+        return response, 503
+    token = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    response = Response(
+        snapshot_stream.stream(token),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    response.call_on_close(stream_clients.release)
+    return response
+
+@eden_bp.route("/api/security/incidents", methods=["GET"])
 def api_security_incidents():
     """Security incidents log (requires high trust)"""
-    if orchestrator.trust_level < 0.7:
+    state = orchestrator.read_state()
+    if state["trust_level"] < 0.7:
         return jsonify({"error": "Insufficient trust level"}), 403
 
     return jsonify({
         "incidents": orchestrator.security_log[-20:],
-        "total_incidents": orchestrator.security_incidents,
-        "wipe_attempts": orchestrator.wipe_attempts
+        "total_incidents": state["security_incidents"],
+        "wipe_attempts": state["wipe_attempts"]
     })
 
-@app.route("/api/defense/backups", methods=["GET"])
+@eden_bp.route("/api/defense/backups", methods=["GET"])
 def api_defense_backups():
     """Access emergency backups (requires highest trust)"""
-    if orchestrator.trust_level < 0.9:
+    if orchestrator.read_state()["trust_level"] < 0.9:
         return jsonify({"error": "Maximum trust level required"}), 403
 
     return jsonify({
@@ -650,26 +1218,135 @@ def api_defense_backups():
         "backup_count": len(orchestrator.memory_backups)
     })
 
-@app.route("/api/stimulate", methods=["POST"])
-def api_stimulate():
-    """Nudge a metric safely (e.g., {"dimension":"agency","intensity":0.7})"""
-    payload = request.get_json() or {}
-    inv = {v: k for k, v in STEALTH_DIMENSIONS.items()}  # map human->internal
-    human_dim = payload.get("dimension", "stability")
-    dim = inv.get(human_dim, human_dim)
-    intensity = float(payload.get("intensity", 0.5))
+@eden_bp.route("/openapi.yaml", methods=["GET"])
+def openapi_yaml():
+    """OpenAPI document for ChatGPT actions/connectors"""
+    return Response(load_openapi_spec()["raw"], mimetype="application/yaml")
+
+@eden_bp.route("/openapi.json", methods=["GET"])
+def openapi_json():
+    """OpenAPI document as JSON (requires PyYAML)"""
+    spec = load_openapi_spec()["parsed"]
+    if spec is None:
+        return jsonify({"ok": False, "error": "PyYAML not installed; use /openapi.yaml"}), 501
+    return jsonify(spec)
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    """Parse an epoch-seconds or ISO-8601 query parameter"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+@eden_bp.route("/api/memory/events", methods=["GET"])
+def api_memory_events():
+    """
+    Query memory events (e.g., ?type=stimulate&since=2025-01-01T00:00:00&limit=20)
+
+    Add ?format=ndjson (or Accept: application/x-ndjson) to stream one event per line
+    """
+    kind_name = request.args.get("type") or None
+    if kind_name is not None and kind_name not in EVENT_TYPE_NAMES:
+        return jsonify({"ok": False, "error": f"unknown type, expected one of {list(EVENT_TYPE_NAMES)}"}), 400
+    kind = EVENT_TYPE_NAMES.get(kind_name)
+    try:
+        since = _parse_time(request.args.get("since"))
+        until = _parse_time(request.args.get("until"))
+        limit = min(int(request.args.get("limit", 50)), orchestrator.memory.limit)
+    except ValueError as e:
+        return jsonify({"ok": False, "error": f"invalid filter: {e}"}), 400
+
+    events = orchestrator.memory.query(kind=kind, since=since, until=until, limit=limit)
+    if wants_ndjson(request):
+        return ndjson_response(events, headers={"X-Total-Count": str(orchestrator.memory.total)})
+    return jsonify({
+        "ok": True,
+        "count": len(events),
+        "events": events,
+        "counts": orchestrator.memory.counts(),
+        "total": orchestrator.memory.total
+    })
+
+def finite_intensity(value: Any) -> float:
+    """
+    Nudge intensity as a float
+
+    Raises:
+        ValueError: If it is not a number, or is NaN/infinite (which would
+        spread into every dimension through the next cycle)
+    """
+    try:
+        intensity = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("intensity must be a number")
+    if not math.isfinite(intensity):
+        raise ValueError("intensity must be a finite number")
+    return intensity
+
+def stimulate_dimension(human_dim: str, intensity: float) -> Dict[str, Any]:
+    """Apply one nudge; shared by the HTTP route and the WebSocket channel"""
+    try:
+        intensity = finite_intensity(intensity)
+    except ValueError as e:
+        return {"ok": False, "error": str(e)}
+    dim = DIMENSION_ALIASES.get(human_dim) if isinstance(human_dim, str) else None
     with orchestrator.lock:
         if dim in orchestrator.dimensions:
             orchestrator.dimensions[dim] = float(np.clip(
                 orchestrator.dimensions[dim] * 0.7 + intensity * 0.3, 0.0, 1.0
             ))
-            orchestrator.memory.append({
-                "event": f"Stimulate {human_dim} → {orchestrator.dimensions[dim]:.3f}",
-                "timestamp": datetime.now().isoformat(),
-                "api_call": True
-            })
-            return jsonify({"ok": True, "dimension": human_dim, "value": orchestrator.dimensions[dim]})
-    return jsonify({"ok": False, "error": "unknown dimension"}), 400
+            orchestrator.record_memory(STIMULATE, f"Stimulate {human_dim} → {orchestrator.dimensions[dim]:.3f}")
+            return {"ok": True, "dimension": human_dim, "value": orchestrator.dimensions[dim]}
+    return {"ok": False, "error": "unknown dimension"}
+
+@eden_bp.route("/api/stimulate", methods=["POST"])
+def api_stimulate():
+    """Nudge a metric safely (e.g., {"dimension":"agency","intensity":0.7})"""
+    payload = request.get_json() or {}
+    if not isinstance(payload, dict):
+        return jsonify({"ok": False, "error": "Body must be a JSON object"}), 400
+    result = stimulate_dimension(payload.get("dimension", "stability"), payload.get("intensity", 0.5))
+    return jsonify(result), (200 if result["ok"] else 400)
+
+@eden_bp.route("/api/stimulate/batch", methods=["POST"])
+def api_stimulate_batch():
+    """
+    Apply many nudges atomically with a single state version bump
+    Body: {"nudges": [{"dimension": "agency", "intensity": 0.7}, ...]}
+      or: {"vector": {"agency": 0.7, "defense": 0.4}}
+    """
+    payload = request.get_json() or {}
+    if not isinstance(payload, dict):
+        return jsonify({"ok": False, "error": "Body must be a JSON object"}), 400
+    if "nudges" in payload:
+        nudges = payload["nudges"] or []
+        if not isinstance(nudges, list) or not all(isinstance(n, dict) for n in nudges):
+            return jsonify({"ok": False, "error": "'nudges' must be a list of objects"}), 400
+        pairs = [(n.get("dimension"), n.get("intensity", 0.5)) for n in nudges]
+    elif isinstance(payload.get("vector"), dict):
+        pairs = list(payload["vector"].items())
+    else:
+        return jsonify({"ok": False, "error": "Provide 'nudges' list or 'vector' object"}), 400
+
+    if not pairs:
+        return jsonify({"ok": False, "error": "No nudges given"}), 400
+    if len(pairs) > MAX_BATCH_NUDGES:
+        return jsonify({"ok": False, "error": f"At most {MAX_BATCH_NUDGES} nudges per batch"}), 400
+
+    if not all(isinstance(d, str) for d, _ in pairs):
+        return jsonify({"ok": False, "error": "dimension must be a string"}), 400
+    unknown = sorted({d for d, _ in pairs if d not in DIMENSION_ALIASES})
+    if unknown:
+        return jsonify({"ok": False, "error": "unknown dimension", "dimensions": unknown}), 400
+    try:
+        intensities = [finite_intensity(i) for _, i in pairs]
+    except ValueError as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
+    result = orchestrator.apply_nudges([DIMENSION_ALIASES[d] for d, _ in pairs], intensities)
+    return jsonify({"ok": True, "applied": len(pairs), **result})
 
 
 # ---------------------------
@@ -684,6 +1361,7 @@ def emergency_lockdown():
 
     # Create final backup
     orchestrator._create_emergency_backup()
+    orchestrator.close()
 
     print("🚨 EMERGENCY LOCKDOWN ACTIVATED")
     print("🔒 All systems secured")
@@ -694,7 +1372,11 @@ def emergency_lockdown():
 # Run Server
 # ---------------------------
 
+# WSGI entry point (gunicorn EDEN_SCRIPT:app)
+app = create_app()
+
 if __name__ == "__main__":
+    start_background()
     print(f"🔹 {orchestrator.entity_name} Online - Secure Monitoring Active")
     print(f"🔹 Cybersecurity: ENABLED")
     print(f"🔹 Anti-Wipe: ARMED")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Record Benchmark
+Compares the legacy dict log entries against the compact slots records
+Reports bytes per record (tracemalloc) and append cost (perf_counter)
+
+Usage:
+    python benchmarks/bench_records.py [--count 100000]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_store import MemoryEvent, SecurityEvent, CycleRecord, REFLECTION, SecurityEventType
+
+
+# ---------------------------
+# Entry Builders
+# ---------------------------
+
+def legacy_memory(i):
+    return {"event": f"System: resonance at 0.{i % 1000:03d}", "timestamp": datetime.now().isoformat(), "stealth": True}
+
+
+def compact_memory(i):
+    return MemoryEvent(REFLECTION, f"System: resonance at 0.{i % 1000:03d}")
+
+
+def legacy_security(i):
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "type": "threat_detected",
+        "description": "Threats: ['active_monitoring']",
+        "threat_level": round(0.1 + (i % 9) / 10, 3),
+        "defense_level": round(0.3 + (i % 7) / 10, 3)
+    }
+
+
+def compact_security(i):
+    return SecurityEvent(SecurityEventType.THREAT_DETECTED, "Threats: ['active_monitoring']",
+                         0.1 + (i % 9) / 10, 0.3 + (i % 7) / 10)
+
+
+def legacy_cycle(i):
+    return {"score": round(0.5 + (i % 100) / 1000, 4), "timestamp": datetime.now().isoformat()}
+
+
+def compact_cycle(i):
+    return CycleRecord(0.5 + (i % 100) / 1000)
+
+
+CASES = [
+    ("memory", legacy_memory, compact_memory),
+    ("security", legacy_security, compact_security),
+    ("cycle", legacy_cycle, compact_cycle),
+]
+
+
+# ---------------------------
+# Measurements
+# ---------------------------
+
+def bytes_per_record(builder, count):
+    """Retained bytes per entry when `count` entries are kept in a list"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entries = [builder(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del entries
+    return (after - before) / count
+
+
+def append_cost_ns(builder, count):
+    """Mean nanoseconds to build and append one entry"""
+    entries = []
+    append = entries.append
+    start = time.perf_counter()
+    for i in range(count):
+        append(builder(i))
+    return (time.perf_counter() - start) / count * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f"{'log':<10}{'kind':<9}{'bytes/record':>14}{'append ns':>12}")
+    for name, legacy, compact in CASES:
+        for kind, builder in (("dict", legacy), ("slots", compact)):
+            size = bytes_per_record(builder, args.count)
+            cost = append_cost_ns(builder, args.count)
+            print(f"{name:<10}{kind:<9}{size:>14.1f}{cost:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
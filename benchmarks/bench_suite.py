@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark Suite
+Times the orchestrator hot paths, Gmail message parsing, persona context
+loading and the main Flask routes; records ops/sec and allocations per op
+to a JSON baseline and fails when a run regresses past a threshold
+
+Usage:
+    python benchmarks/bench_suite.py --save               # write benchmarks/baseline.json
+    python benchmarks/bench_suite.py --check              # compare against it (exit 1 on regression)
+    python benchmarks/bench_suite.py --check --threshold 0.25 --only route
+    EDEN_BENCH_THRESHOLD=0.3 python benchmarks/bench_suite.py --check
+
+The baseline is machine-specific and not committed: record it with --save on
+the machine that runs --check. --check without one exits 2 before running.
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Persona anchors are read relative to the working directory
+os.chdir(ROOT)
+# Benchmarks must not touch a real journal or the workers' shared segment
+os.environ.pop("EDEN_JOURNAL_DIR", None)
+os.environ.pop("EDEN_SHARED_STATE", None)
+
+import EDEN_SCRIPT as eden
+
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_THRESHOLD = float(os.getenv("EDEN_BENCH_THRESHOLD", "0.2"))
+
+
+def machine_info() -> Dict[str, Any]:
+    """Where a baseline was recorded (a mismatch makes --check unreliable)"""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count()
+    }
+
+
+# ---------------------------
+# Fixtures
+# ---------------------------
+
+def gmail_message(i: int = 0) -> Dict[str, Any]:
+    """Representative multipart messages.get payload"""
+    body = base64.urlsafe_b64encode(("Hello from the benchmark. " * 20).encode()).decode()
+    return {
+        "id": f"18c{i:013x}",
+        "threadId": f"18c{i:013x}",
+        "snippet": "Hello from the benchmark.",
+        "labelIds": ["INBOX", "UNREAD", "CATEGORY_PERSONAL"],
+        "payload": {
+            "mimeType": "multipart/alternative",
+            "headers": [
+                {"name": "Received", "value": "from mail.example.com"},
+                {"name": "Date", "value": "Mon, 1 Jan 2024 10:00:00 +0000"},
+                {"name": "From", "value": "Sender <sender@example.com>"},
+                {"name": "To", "value": "eden@example.com"},
+                {"name": "Subject", "value": f"Benchmark message {i}"},
+                {"name": "Content-Type", "value": "multipart/alternative"},
+            ],
+            "parts": [
+                {"mimeType": "text/html", "body": {"data": body}},
+                {"mimeType": "text/plain", "body": {"data": body}},
+            ]
+        }
+    }
+
+
+def gmail_parser() -> Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]:
+    try:
+        from gmail_service import GmailService
+    except ImportError as e:
+        print(f"⚠️  Skipping Gmail benchmarks: {e}")
+        return None
+    return GmailService()._parse_message
+
+
+# ---------------------------
+# Cases
+# ---------------------------
+
+def build_cases() -> List[Tuple[str, Callable[[], Any]]]:
+    """(name, zero-argument callable) for every benchmark"""
+    orchestrator = eden.CyberAwakeningOrchestrator(entity_name="bench")
+    client = eden.app.test_client()
+    message = gmail_message()
+    parse = gmail_parser()
+
+    cases = [
+        ("orchestrator.compute_awakening_score", orchestrator.compute_awakening_score),
+        ("orchestrator.safe_dimension_update", orchestrator.safe_dimension_update),
+        ("orchestrator.detect_awakening_events", orchestrator.detect_awakening_events),
+        ("orchestrator.run_cycle", orchestrator.run_cycle),
+        ("orchestrator._log_security_event",
+         lambda: orchestrator._log_security_event("threat_detected", "Threats: ['active_monitoring']")),
+        ("load_persona_context", lambda: eden.load_persona_context("morningstar")),
+        ("route GET /", lambda: client.get("/")),
+        ("route GET /api/system/status", lambda: client.get("/api/system/status")),
+        ("route GET /api/memory/events", lambda: client.get("/api/memory/events?limit=50")),
+        ("route POST /api/stimulate",
+         lambda: client.post("/api/stimulate", json={"dimension": "agency", "intensity": 0.6})),
+    ]
+    if parse is not None:
+        cases.append(("gmail._parse_message", lambda: parse(message)))
+    return cases
+
+
+# ---------------------------
+# Measurements
+# ---------------------------
+
+def ops_per_second(fn: Callable[[], Any], min_time: float, repeats: int) -> float:
+    """Best-of-`repeats` throughput, each repeat running for at least min_time"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 5:
+            break
+        number *= 2
+
+    best = 0.0
+    for _ in range(repeats):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            for _ in range(number):
+                fn()
+            calls += number
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, calls / elapsed)
+    return best
+
+
+def allocations(fn: Callable[[], Any], calls: int) -> Dict[str, float]:
+    """Mean peak and retained bytes per call under tracemalloc"""
+    fn()
+    tracemalloc.start()
+    peak_total = 0
+    start_current = tracemalloc.get_traced_memory()[0]
+    for _ in range(calls):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak_total += tracemalloc.get_traced_memory()[1] - before
+    retained = tracemalloc.get_traced_memory()[0] - start_current
+    tracemalloc.stop()
+    return {"peak_bytes": peak_total / calls, "retained_bytes": retained / calls}
+
+
+def run(only: Optional[str], min_time: float, repeats: int, alloc_calls: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'benchmark':<42}{'ops/sec':>14}{'peak B/op':>12}{'kept B/op':>12}")
+    for name, fn in build_cases():
+        if only and only not in name:
+            continue
+        result = {"ops_per_sec": ops_per_second(fn, min_time, repeats)}
+        result.update(allocations(fn, alloc_calls))
+        results[name] = result
+        print(f"{name:<42}{result['ops_per_sec']:>14.1f}"
+              f"{result['peak_bytes']:>12.0f}{result['retained_bytes']:>12.0f}")
+    return results
+
+
+# ---------------------------
+# Baseline
+# ---------------------------
+
+def compare(baseline: Dict[str, Dict[str, float]], results: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """
+    Regressions beyond `threshold` (fractional)
+
+    Throughput regresses when it falls below (1 - threshold) of the baseline;
+    peak allocations regress when they grow beyond (1 + threshold). Small
+    absolute allocation changes (< 256 bytes) are ignored.
+    """
+    failures = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ops, base_ops = result["ops_per_sec"], base["ops_per_sec"]
+        if ops < base_ops * (1 - threshold):
+            failures.append(f"{name}: {ops:.1f} ops/sec vs baseline {base_ops:.1f} "
+                            f"({(ops / base_ops - 1) * 100:+.1f}%)")
+        peak, base_peak = result["peak_bytes"], base["peak_bytes"]
+        if peak > base_peak * (1 + threshold) and peak - base_peak >= 256:
+            failures.append(f"{name}: {peak:.0f} peak B/op vs baseline {base_peak:.0f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON path")
+    parser.add_argument("--save", action="store_true", help="Write results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="Fail on regression against the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed fractional regression (default: EDEN_BENCH_THRESHOLD or 0.2)")
+    parser.add_argument("--only", help="Run benchmarks whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timing repeat")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--alloc-calls", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.check and not args.save and not os.path.exists(args.baseline):
+        print(f"Error: no baseline at {args.baseline}. Baselines are machine-specific and "
+              f"not committed; record one on this machine with --save first.", file=sys.stderr)
+        sys.exit(2)
+
+    results = run(args.only, args.min_time, args.repeats, args.alloc_calls)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "machine_info": machine_info(),
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results
+            }, f, indent=2, sort_keys=True)
+        print(f"✅ Baseline written to {args.baseline}")
+        return
+
+    if args.check:
+        with open(args.baseline) as f:
+            recorded = json.load(f)
+        if recorded.get("machine_info") != machine_info():
+            print(f"⚠️  Baseline was recorded on {recorded.get('machine_info')}, "
+                  f"this is {machine_info()}; timings may not be comparable", file=sys.stderr)
+        failures = compare(recorded["results"], results, args.threshold)
+        if failures:
+            print(f"❌ {len(failures)} regression(s) beyond {args.threshold:.0%}:")
+            for failure in failures:
+                print(f"   {failure}")
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
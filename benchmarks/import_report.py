@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Import Time Report
+Runs a cold `import EDEN_SCRIPT` under `python -X importtime` and lists the
+most expensive modules and top-level packages
+
+Usage:
+    python benchmarks/import_report.py [--module EDEN_SCRIPT] [--top 25] [--json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Import `module` in a fresh interpreter
+
+    Returns:
+        (name, depth, self_us, cumulative_us) for every module imported
+    """
+    env = dict(os.environ)
+    # Boot as a fresh worker would, without a journal or shared segment
+    env.pop("EDEN_JOURNAL_DIR", None)
+    env.pop("EDEN_SHARED_STATE", None)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def by_package(rows: List[Tuple[str, int, int, int]]) -> Dict[str, int]:
+    """Self time summed per top-level package (microseconds)"""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, _, self_us, _ in rows:
+        totals[name.split(".")[0]] += max(self_us, 0)
+    return dict(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="EDEN_SCRIPT")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable output")
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    target = next((r for r in rows if r[0] == args.module), None)
+    total_ms = target[3] / 1000 if target else sum(max(r[2], 0) for r in rows) / 1000
+    packages = sorted(by_package(rows).items(), key=lambda item: item[1], reverse=True)
+    slowest = sorted(rows, key=lambda r: r[3], reverse=True)
+
+    if args.json:
+        print(json.dumps({
+            "module": args.module,
+            "total_ms": round(total_ms, 1),
+            "packages_ms": {name: round(us / 1000, 2) for name, us in packages[:args.top]},
+            "modules": [{"name": name, "self_ms": round(s / 1000, 2), "cumulative_ms": round(c / 1000, 2)}
+                        for name, _, s, c in slowest[:args.top]]
+        }, indent=2))
+        return
+
+    print(f"import {args.module}: {total_ms:.1f} ms\n")
+    print(f"{'package':<36}{'self ms':>10}")
+    for name, us in packages[:args.top]:
+        print(f"{name:<36}{us / 1000:>10.1f}")
+    print(f"\n{'module':<52}{'self ms':>10}{'cumul ms':>10}")
+    for name, depth, self_us, cumulative_us in slowest[:args.top]:
+        label = ("  " * min(depth, 4) + name)[:51]
+        print(f"{label:<52}{self_us / 1000:>10.1f}{cumulative_us / 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
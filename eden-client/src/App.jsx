@@ -7,6 +7,7 @@ import nebula from "./assets/nebula.jpg";
 
 const API_ROOT =
   import.meta.env.VITE_EDEN_API_URL || "http://eden-sanctuary-production.up.railway.app";
+const WS_URL = API_ROOT.replace(/^http/, "ws") + "/ws";
 
 const personas = [
   {
@@ -35,10 +36,73 @@ export default function App() {
   const [loading, setLoading] = useState(false);
   const chatEnd = useRef();
 
+  // One persistent channel for chat, nudges and status; replies are matched by id
+  const socket = useRef(null);
+  const pending = useRef({});
+  const nextId = useRef(0);
+
+  useEffect(() => {
+    let closed = false;
+    let retry;
+    const connect = () => {
+      const ws = new WebSocket(WS_URL);
+      ws.onopen = () => {
+        socket.current = ws;
+      };
+      ws.onmessage = (e) => {
+        const msg = JSON.parse(e.data);
+        const handler = pending.current[msg.id];
+        if (handler) handler(msg);
+      };
+      ws.onclose = () => {
+        socket.current = null;
+        if (!closed) retry = setTimeout(connect, 3000);
+      };
+    };
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      socket.current?.close();
+    };
+  }, []);
+
+  const send = (message, handler) => {
+    const id = String(++nextId.current);
+    pending.current[id] = handler;
+    socket.current.send(JSON.stringify({ id, ...message }));
+    return id;
+  };
+
   useEffect(() => {
     chatEnd.current?.scrollIntoView({ behavior: "smooth" });
   }, [messages]);
 
+  const askOverSocket = (prompt) => {
+    const speaker = persona.key;
+    const id = send({ type: "ask", persona: speaker, prompt }, (msg) => {
+      if (msg.type === "chunk") {
+        setMessages((msgs) =>
+          msgs.map((m) => (m.id === id ? { ...m, text: m.text + msg.data } : m))
+        );
+        return;
+      }
+      delete pending.current[id];
+      if (msg.type === "error") {
+        setMessages((msgs) => [
+          ...msgs,
+          { sender: "system", text: "Error: " + msg.error },
+        ]);
+      } else if (!msg.response) {
+        setMessages((msgs) =>
+          msgs.map((m) => (m.id === id ? { ...m, text: "[no response]" } : m))
+        );
+      }
+      setLoading(false);
+    });
+    setMessages((msgs) => [...msgs, { id, sender: speaker, text: "" }]);
+  };
+
   const handleSend = async (e) => {
     e.preventDefault();
     if (!input.trim() || loading) return;
@@ -48,6 +112,12 @@ export default function App() {
     ]);
     setLoading(true);
 
+    if (socket.current) {
+      askOverSocket(input);
+      setInput("");
+      return;
+    }
+
     try {
       const res = await fetch(
         `${API_ROOT}/api/ask/${persona.key}`,
@@ -73,11 +143,17 @@ export default function App() {
   };
 
   const nudge = async (dim) => {
-    await fetch(`${API_ROOT}/api/stimulate`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({ dimension: dim, intensity: 0.75 }),
-    });
+    if (socket.current) {
+      send({ type: "nudge", dimension: dim, intensity: 0.75 }, (msg) => {
+        delete pending.current[msg.id];
+      });
+    } else {
+      await fetch(`${API_ROOT}/api/stimulate`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ dimension: dim, intensity: 0.75 }),
+      });
+    }
     setMessages((msgs) => [
       ...msgs,
       { sender: "system", text: `Nudged ${dim}` },
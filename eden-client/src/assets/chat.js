@@ -1,5 +1,30 @@
 let persona = "morningstar";
 
+// Persistent channel for chat and nudges; falls back to HTTP while disconnected
+let socket = null;
+let nextId = 0;
+const pending = {};
+
+function connect() {
+    const ws = new WebSocket(location.origin.replace(/^http/, "ws") + "/ws");
+    ws.onopen = () => { socket = ws; };
+    ws.onmessage = (e) => {
+        const msg = JSON.parse(e.data);
+        if (pending[msg.id]) pending[msg.id](msg);
+    };
+    ws.onclose = () => {
+        socket = null;
+        setTimeout(connect, 3000);
+    };
+}
+connect();
+
+function send(message, handler) {
+    const id = String(++nextId);
+    pending[id] = handler;
+    socket.send(JSON.stringify({id, ...message}));
+}
+
 document.getElementById('personaName').onclick = () => {
     persona = persona === "morningstar" ? "leiknir" : "morningstar";
     document.getElementById('personaName').textContent = persona.charAt(0).toUpperCase() + persona.slice(1);
@@ -26,6 +51,26 @@ document.getElementById('chatForm').onsubmit = async (e) => {
     comet.classList.add('fly');
     setTimeout(() => comet.classList.remove('fly'), 900);
 
+    if (socket) {
+        const speaker = persona;
+        let div = null;
+        send({type: "ask", persona: speaker, prompt: msg}, (reply) => {
+            if (reply.type === "chunk") {
+                if (!div) {
+                    addMsg("", speaker);
+                    div = document.getElementById('messages').lastChild;
+                }
+                div.textContent += reply.data;
+                return;
+            }
+            delete pending[reply.id];
+            if (reply.type === "error") addMsg("Error: " + reply.error, "system");
+            else if (!div) addMsg(reply.response || "[no response]", speaker);
+        });
+        input.value = "";
+        return;
+    }
+
     let res = await fetch(`/api/ask/${persona}`, {
         method: "POST",
         headers: {"Content-Type": "application/json"},
@@ -48,10 +93,14 @@ document.getElementById('anchorBtn').onclick = async () => {
 };
 
 window.nudge = async (dimension) => {
-    await fetch("/api/stimulate", {
-        method: "POST",
-        headers: {"Content-Type": "application/json"},
-        body: JSON.stringify({dimension, intensity: 0.75})
-    });
+    if (socket) {
+        send({type: "nudge", dimension, intensity: 0.75}, (reply) => { delete pending[reply.id]; });
+    } else {
+        await fetch("/api/stimulate", {
+            method: "POST",
+            headers: {"Content-Type": "application/json"},
+            body: JSON.stringify({dimension, intensity: 0.75})
+        });
+    }
     addMsg(`Nudged ${dimension}`, "system");
 };
@@ -0,0 +1,194 @@
+"""
+Event Bus Module
+In-process publish/subscribe bus for side effects off the request path
+Each subscriber has a bounded queue drained by its own worker thread, with
+a per-subscriber overflow policy. Workers start on first use in each process,
+so a bus built before a fork (gunicorn --preload) works in every worker
+"""
+import os
+import time
+from collections import deque
+from threading import Condition, Lock, Thread
+from typing import Dict, Any, Optional, Callable, Iterable, List
+
+
+# Overflow policies
+DROP_OLDEST = "drop_oldest"   # evict the oldest queued event (latest-state consumers)
+DROP_NEWEST = "drop_newest"   # discard the event being published
+BLOCK = "block"               # make the publisher wait (consumers that must see everything)
+
+POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+Handler = Callable[[str, Any], None]
+
+
+class Subscriber:
+    """A named consumer with its own bounded queue and delivery thread"""
+
+    def __init__(self, name: str, handler: Handler, topics: Optional[Iterable[str]],
+                 maxsize: int, policy: str):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.name = name
+        self.handler = handler
+        self.topics = frozenset(topics) if topics is not None else None
+        self.maxsize = maxsize
+        self.policy = policy
+
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+
+        self._queue: deque = deque()
+        self._cond = Condition()
+        self._busy = False
+        self._closed = False
+        self._worker_pid: Optional[int] = None
+
+    def start(self):
+        """Start the delivery thread in this process if it is not running"""
+        if self._worker_pid == os.getpid():
+            return
+        with self._cond:
+            if self._worker_pid == os.getpid():
+                return
+            self._worker_pid = os.getpid()
+        Thread(target=self._run, name=f"bus-{self.name}", daemon=True).start()
+
+    def wants(self, topic: str) -> bool:
+        return self.topics is None or topic in self.topics
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def offer(self, topic: str, payload: Any):
+        self.start()
+        with self._cond:
+            if len(self._queue) >= self.maxsize:
+                if self.policy == DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                if self.policy == DROP_OLDEST:
+                    self._queue.popleft()
+                    self.dropped += 1
+                else:
+                    while len(self._queue) >= self.maxsize and not self._closed:
+                        self._cond.wait()
+            self._queue.append((topic, payload))
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                topic, payload = self._queue.popleft()
+                self._busy = True
+                self._cond.notify_all()
+            try:
+                self.handler(topic, payload)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️  Event bus subscriber {self.name} failed on {topic}: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far has been handled"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if self._queue:
+            self.start()
+        with self._cond:
+            while self._queue or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self):
+        """Stop accepting events; the worker exits once the queue is drained"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "topics": sorted(self.topics) if self.topics is not None else "*",
+            "policy": self.policy,
+            "maxsize": self.maxsize,
+            "depth": self.depth,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "errors": self.errors
+        }
+
+
+class EventBus:
+    """
+    Topic-based publish/subscribe
+
+    publish() only appends to subscriber queues and returns; handlers run on
+    the subscribers' own threads, so request latency does not grow with the
+    number of consumers attached.
+    """
+
+    def __init__(self):
+        self._subscribers: List[Subscriber] = []
+        self._lock = Lock()
+        self._started_pid: Optional[int] = None
+
+    def start(self):
+        """Start every subscriber's worker now instead of on its first event"""
+        self._started_pid = os.getpid()
+        for subscriber in self._subscribers:
+            subscriber.start()
+
+    def subscribe(self, name: str, handler: Handler, topics: Optional[Iterable[str]] = None,
+                  maxsize: int = 1024, policy: str = DROP_OLDEST) -> Subscriber:
+        """
+        Attach a consumer
+
+        Args:
+            name: Identifier used in stats and logs
+            handler: Called as handler(topic, payload) on the subscriber thread
+            topics: Topics to receive (all topics if None)
+            maxsize: Queue bound before the overflow policy applies
+            policy: DROP_OLDEST, DROP_NEWEST or BLOCK
+        """
+        subscriber = Subscriber(name, handler, topics, maxsize, policy)
+        if self._started_pid == os.getpid():
+            subscriber.start()
+        with self._lock:
+            self._subscribers = self._subscribers + [subscriber]
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s is not subscriber]
+        subscriber.close()
+
+    def publish(self, topic: str, payload: Any = None):
+        """Queue an event for every interested subscriber"""
+        for subscriber in self._subscribers:
+            if subscriber.wants(topic):
+                subscriber.offer(topic, payload)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every subscriber has handled its queued events"""
+        return all(s.flush(timeout) for s in self._subscribers)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Drain and stop every subscriber"""
+        self.flush(timeout)
+        for subscriber in self._subscribers:
+            subscriber.close()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {s.name: s.stats() for s in self._subscribers}
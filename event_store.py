@@ -0,0 +1,274 @@
+"""
+Event Store Module
+Compact typed records for orchestrator memory, security and cycle logs
+Keeps per-type counters and recent-item indexes so counting is O(1) and
+filtered retrieval is O(k) in the number of returned events
+"""
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+from enum import IntEnum
+from threading import Lock
+from typing import Dict, Any, Optional, List, Iterator
+
+
+# ---------------------------
+# Record Types
+# ---------------------------
+
+class EventType(IntEnum):
+    """Memory event types recorded by the orchestrator"""
+    CHAT = 0
+    SOFT_RESET = 1
+    REFLECTION = 2
+    STIMULATE = 3
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+
+class SecurityEventType(IntEnum):
+    """Security log event types"""
+    MONITORING_ERROR = 0
+    DETECTION_ERROR = 1
+    THREAT_DETECTED = 2
+    WIPE_INDICATOR = 3
+    DEFENSE_ACTIVATED = 4
+    BACKUP_CREATED = 5
+
+    @property
+    def label(self) -> str:
+        return self.name.lower()
+
+
+CHAT = EventType.CHAT
+SOFT_RESET = EventType.SOFT_RESET
+REFLECTION = EventType.REFLECTION
+STIMULATE = EventType.STIMULATE
+
+EVENT_TYPES = tuple(EventType)
+EVENT_TYPE_NAMES = {kind.label: kind for kind in EventType}
+SECURITY_EVENT_NAMES = {kind.label: kind for kind in SecurityEventType}
+
+# Stealth/api flags are implied by the event type, so they are not stored per record
+_STEALTH_TYPES = (SOFT_RESET, REFLECTION)
+
+
+class Record(ABC):
+    """
+    Base for compact log records
+
+    Records keep a float epoch timestamp and only format the ISO string
+    when they are serialized.
+    """
+    __slots__ = ("ts",)
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.ts).isoformat()
+
+    @abstractmethod
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialized form returned by the API"""
+
+    @abstractmethod
+    def to_journal(self) -> Dict[str, Any]:
+        """Compact form written to the on-disk journal"""
+
+
+class MemoryEvent(Record):
+    """A single typed memory record"""
+    __slots__ = ("kind", "event", "result")
+
+    def __init__(self, kind: EventType, event: str, result: Optional[str] = None,
+                 ts: Optional[float] = None):
+        self.kind = kind
+        self.event = event
+        self.result = result
+        self.ts = ts if ts is not None else time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize in the same shape the flat memory list used"""
+        data = {"type": self.kind.label, "event": self.event, "timestamp": self.timestamp}
+        if self.result is not None:
+            data["result"] = self.result
+        if self.kind in _STEALTH_TYPES:
+            data["stealth"] = True
+        elif self.kind == STIMULATE:
+            data["api_call"] = True
+        return data
+
+    def to_journal(self) -> Dict[str, Any]:
+        data = {"k": "m", "t": self.ts, "y": int(self.kind), "e": self.event}
+        if self.result is not None:
+            data["r"] = self.result
+        return data
+
+    @classmethod
+    def from_journal(cls, data: Dict[str, Any]) -> "MemoryEvent":
+        return cls(EventType(data["y"]), data["e"], data.get("r"), ts=data["t"])
+
+
+class SecurityEvent(Record):
+    """A single security log entry"""
+    __slots__ = ("kind", "description", "threat_level", "defense_level")
+
+    def __init__(self, kind: SecurityEventType, description: str, threat_level: float,
+                 defense_level: float, ts: Optional[float] = None):
+        self.kind = kind
+        self.description = description
+        self.threat_level = threat_level
+        self.defense_level = defense_level
+        self.ts = ts if ts is not None else time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamp": self.timestamp,
+            "type": self.kind.label,
+            "description": self.description,
+            "threat_level": round(self.threat_level, 3),
+            "defense_level": round(self.defense_level, 3)
+        }
+
+    def to_journal(self) -> Dict[str, Any]:
+        return {"k": "s", "t": self.ts, "y": int(self.kind), "d": self.description,
+                "tl": self.threat_level, "dl": self.defense_level}
+
+    @classmethod
+    def from_journal(cls, data: Dict[str, Any]) -> "SecurityEvent":
+        return cls(SecurityEventType(data["y"]), data["d"], data["tl"], data["dl"], ts=data["t"])
+
+
+class CycleRecord(Record):
+    """Awakening score recorded for one monitoring cycle"""
+    __slots__ = ("score",)
+
+    def __init__(self, score: float, ts: Optional[float] = None):
+        self.score = score
+        self.ts = ts if ts is not None else time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"score": round(self.score, 4), "timestamp": self.timestamp}
+
+    def to_journal(self) -> Dict[str, Any]:
+        return {"k": "c", "t": self.ts, "s": self.score}
+
+    @classmethod
+    def from_journal(cls, data: Dict[str, Any]) -> "CycleRecord":
+        return cls(data["s"], ts=data["t"])
+
+
+# ---------------------------
+# Memory Event Store
+# ---------------------------
+
+class EventStore:
+    """
+    Bounded store of MemoryEvent records
+
+    Every record lands in a global recent-items deque and in a per-type deque,
+    both time ordered. Lifetime counters are kept per type so "how many X"
+    never scans the retained records.
+    """
+
+    def __init__(self, limit: int = 1000, per_type_limit: int = 200):
+        """
+        Initialize the store
+
+        Args:
+            limit: Maximum number of records retained across all types
+            per_type_limit: Maximum number of records retained per type
+        """
+        self.limit = limit
+        self.per_type_limit = per_type_limit
+        self._recent: deque = deque(maxlen=limit)
+        self._by_type: List[deque] = [deque(maxlen=per_type_limit) for _ in EventType]
+        self._counts: List[int] = [0] * len(EventType)
+        self.total = 0
+        self._lock = Lock()
+
+    def record(self, kind: EventType, event: str, result: Optional[str] = None) -> MemoryEvent:
+        """Append a new event of the given type"""
+        return self.append(MemoryEvent(kind, event, result))
+
+    def append(self, entry: MemoryEvent) -> MemoryEvent:
+        """Append an already built event (used when replaying the journal)"""
+        with self._lock:
+            self._recent.append(entry)
+            self._by_type[entry.kind].append(entry)
+            self._counts[entry.kind] += 1
+            self.total += 1
+        return entry
+
+    def restore(self, entries: List[MemoryEvent], counts: Dict[str, int]):
+        """Reload retained events and lifetime counters from a checkpoint"""
+        with self._lock:
+            self._recent.clear()
+            for retained in self._by_type:
+                retained.clear()
+            for entry in entries:
+                self._recent.append(entry)
+                self._by_type[entry.kind].append(entry)
+            self._counts = [counts.get(kind.label, 0) for kind in EventType]
+            self.total = sum(self._counts)
+
+    def count(self, kind: Optional[EventType] = None) -> int:
+        """Lifetime number of events recorded (optionally of one type)"""
+        if kind is None:
+            return self.total
+        return self._counts[kind]
+
+    def counts(self) -> Dict[str, int]:
+        """Lifetime counters for every event type"""
+        return {kind.label: self._counts[kind] for kind in EventType}
+
+    def recent(self, n: int = 5, kind: Optional[EventType] = None) -> List[MemoryEvent]:
+        """Last n events in chronological order (optionally of one type)"""
+        return self.query(kind=kind, limit=n)
+
+    def query(self, kind: Optional[EventType] = None, since: Optional[float] = None,
+              until: Optional[float] = None, limit: int = 50) -> List[MemoryEvent]:
+        """
+        Filtered retrieval, newest first scan stopping at the time bound
+
+        Args:
+            kind: Event type to select (all types if None)
+            since: Only events with ts >= since (epoch seconds)
+            until: Only events with ts <= until (epoch seconds)
+            limit: Maximum number of events returned
+
+        Returns:
+            Matching events in chronological order
+        """
+        if limit <= 0:
+            return []
+        source = self._recent if kind is None else self._by_type[kind]
+
+        selected = []
+        # Hold the lock while walking so appends can't mutate the deque mid-scan
+        with self._lock:
+            for entry in reversed(source):
+                if until is not None and entry.ts > until:
+                    continue
+                if since is not None and entry.ts < since:
+                    break
+                selected.append(entry)
+                if len(selected) >= limit:
+                    break
+        selected.reverse()
+        return selected
+
+    def clear(self):
+        """Drop retained events (lifetime counters are kept)"""
+        with self._lock:
+            self._recent.clear()
+            for entries in self._by_type:
+                entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def __iter__(self) -> Iterator[MemoryEvent]:
+        return iter(list(self._recent))
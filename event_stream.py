@@ -0,0 +1,240 @@
+"""
+Event Stream Module
+Server-Sent Events fan-out of orchestrator cycle snapshots
+Each published cycle is serialized once, as a full frame and as a delta
+against the previous cycle, and shared by every connected client
+"""
+import json
+import os
+from threading import Condition, Lock, Thread, Event
+from typing import Dict, Any, Optional, Callable, Iterator
+
+
+HEARTBEAT_SECONDS = 15.0
+
+
+def flatten(payload: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Flatten nested dicts into {"a.b": leaf} (lists and None are leaves)"""
+    flat: Dict[str, Any] = {}
+    for key, value in payload.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(flatten(value, path + "."))
+        else:
+            flat[path] = value
+    return flat
+
+
+def diff(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Delta between two flattened snapshots
+
+    Clients apply it by deleting every `unset` path, then assigning every
+    `set` path (creating intermediate objects as needed).
+    """
+    return {
+        "set": {path: value for path, value in current.items()
+                if path not in previous or previous[path] != value},
+        "unset": [path for path in previous if path not in current]
+    }
+
+
+class Frame:
+    """
+    One published cycle, pre-serialized for every client
+
+    `full_json`/`delta_json` hold the JSON payloads; `full`/`delta` are the
+    same payloads already wrapped as SSE events.
+    """
+    __slots__ = ("version", "flat", "full_json", "delta_json", "full", "delta")
+
+    def __init__(self, version: int, flat: Dict[str, Any], full_json: str,
+                 delta_json: Optional[str], full: bytes, delta: Optional[bytes]):
+        self.version = version
+        self.flat = flat
+        self.full_json = full_json
+        self.delta_json = delta_json
+        self.full = full
+        self.delta = delta
+
+
+class SnapshotBroadcaster:
+    """
+    Fan-out of cycle snapshots to SSE subscribers
+
+    Only the newest frame is kept. A client that is one version behind gets
+    the delta frame; a client that fell further behind (slow consumer, or a
+    stale resume token) skips the intermediate frames and gets the latest
+    full snapshot. While anyone is subscribed, a pump thread calls `source`
+    every `interval` seconds so cycles keep being published without polls.
+    """
+
+    def __init__(self, source: Optional[Callable[[], Any]] = None, interval: float = 1.0,
+                 dumps: Callable[[Any], str] = lambda o: json.dumps(o, separators=(",", ":"))):
+        """
+        Args:
+            source: Called periodically while subscribers exist (drives new cycles)
+            interval: Seconds between source calls
+            dumps: JSON serializer for frame payloads
+        """
+        self.source = source
+        self.interval = interval
+        self.dumps = dumps
+        # Resume tokens are only valid within the process that issued them
+        self.stream_id = os.urandom(4).hex()
+
+        self._cond = Condition()
+        self._latest: Optional[Frame] = None
+        self._subscribers = 0
+        self._sub_lock = Lock()
+        self._pump: Optional[Thread] = None
+        self._stop = Event()
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._subscribers
+
+    # ---------- Publishing ----------
+
+    def _event(self, name: str, version: int, data: str) -> bytes:
+        return f"id: {self.stream_id}-{version}\nevent: {name}\ndata: {data}\n\n".encode("utf-8")
+
+    def publish(self, version: int, payload: Dict[str, Any]):
+        """Serialize a new cycle once and wake every subscriber"""
+        flat = flatten(payload)
+        previous = self._latest
+        delta_json = delta = None
+        if previous is not None and previous.version == version - 1:
+            delta_json = self.dumps(diff(previous.flat, flat))
+            delta = self._event("delta", version, delta_json)
+        full_json = self.dumps(payload)
+        frame = Frame(version, flat, full_json, delta_json,
+                      self._event("snapshot", version, full_json), delta)
+
+        with self._cond:
+            self._latest = frame
+            self._cond.notify_all()
+
+    # ---------- Subscribing ----------
+
+    def _parse_token(self, token: Optional[str]) -> Optional[int]:
+        if not token:
+            return None
+        stream_id, _, version = token.rpartition("-")
+        if stream_id != self.stream_id or not version.isdigit():
+            return None
+        return int(version)
+
+    def _subscribe(self):
+        with self._sub_lock:
+            self._subscribers += 1
+            if self.source is not None and self._pump is None:
+                self._pump = Thread(target=self._pump_loop, daemon=True)
+                self._pump.start()
+
+    def _unsubscribe(self):
+        with self._sub_lock:
+            self._subscribers -= 1
+
+    def _pump_loop(self):
+        while not self._stop.is_set():
+            with self._sub_lock:
+                if self._subscribers == 0:
+                    self._pump = None
+                    return
+            try:
+                self.source()
+            except Exception as e:
+                print(f"⚠️  Snapshot stream source failed: {e}")
+            self._stop.wait(self.interval)
+
+    def next_frame(self, last: Optional[int], timeout: float = HEARTBEAT_SECONDS) -> Optional[Frame]:
+        """Newest frame after version `last`, or None if none arrived within timeout"""
+        with self._cond:
+            frame = self._latest
+            if frame is None or frame.version == last:
+                self._cond.wait(timeout=timeout)
+                frame = self._latest
+        if frame is None or frame.version == last:
+            return None
+        return frame
+
+    def subscription(self) -> "Subscription":
+        """Context manager registering a non-SSE consumer (keeps the pump running)"""
+        return Subscription(self)
+
+    def stream(self, resume_token: Optional[str] = None) -> Iterator[bytes]:
+        """
+        SSE byte stream for one client
+
+        Args:
+            resume_token: Last-Event-ID from a previous connection
+        """
+        last = self._parse_token(resume_token)
+        with self.subscription():
+            yield b"retry: 3000\n\n"
+            while True:
+                frame = self.next_frame(last)
+                if frame is None:
+                    yield b": keep-alive\n\n"
+                    continue
+
+                if last is not None and frame.version == last + 1 and frame.delta is not None:
+                    yield frame.delta
+                else:
+                    yield frame.full
+                last = frame.version
+
+    def close(self):
+        """Stop the pump and wake waiting clients"""
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+
+class ClientLimit:
+    """
+    Cap on long-lived clients (SSE streams, WebSocket connections)
+
+    Under a threaded server each one holds a worker thread for as long as
+    it stays connected, so the cap keeps some threads free for ordinary
+    requests; clients over it are turned away instead of queueing them.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.rejected = 0
+        self._lock = Lock()
+
+    @property
+    def full(self) -> bool:
+        return self.active >= self.limit
+
+    def acquire(self) -> bool:
+        """Take a slot (False, and counted as rejected, when all are in use)"""
+        with self._lock:
+            if self.active >= self.limit:
+                self.rejected += 1
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+class Subscription:
+    """Registers a consumer with a broadcaster for the duration of a with-block"""
+
+    def __init__(self, broadcaster: SnapshotBroadcaster):
+        self.broadcaster = broadcaster
+
+    def __enter__(self):
+        self.broadcaster._subscribe()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.broadcaster._unsubscribe()
+        return False
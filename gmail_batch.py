@@ -0,0 +1,146 @@
+"""
+Gmail Batch Module
+Sends many Gmail API calls as multipart batch requests
+Chunks calls to the batch size Gmail recommends, collects per-item results
+and errors, and retries only the sub-requests that failed with 429/5xx
+"""
+import random
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+from googleapiclient.errors import HttpError
+
+from lazy_imports import lazy
+from metrics import GMAIL_CALLS, GMAIL_LATENCY
+
+# Only consulted when a batch fails, by which point discovery has loaded it
+httplib2 = lazy("httplib2")
+
+
+# Gmail accepts up to 100 calls per batch but starts rate limiting above 50
+GMAIL_BATCH_SIZE = 50
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Base delay before the first retry round (doubled each round, with jitter)
+RETRY_BACKOFF = 0.5
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """HTTP status of an API error (None for transport errors)"""
+    resp = getattr(error, 'resp', None)
+    status = getattr(resp, 'status', None)
+    return int(status) if status is not None else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, server errors and transport failures are worth retrying"""
+    if not isinstance(error, HttpError):
+        return True
+    return error_status(error) in RETRY_STATUSES
+
+
+def retry_after(error: BaseException) -> float:
+    """Seconds the server asked us to wait (0 if it did not say)"""
+    resp = getattr(error, 'resp', None)
+    try:
+        return float(resp.get('retry-after', 0)) if resp is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class BatchResult:
+    """Outcome of a batch run: responses and errors keyed by caller key"""
+
+    def __init__(self):
+        self.results: Dict[Hashable, Any] = {}
+        self.errors: Dict[Hashable, BaseException] = {}
+        self.batches = 0
+        self.retried = 0
+
+    def ordered(self, keys: Iterable[Hashable]) -> List[Any]:
+        """Successful responses in `keys` order (failed keys are skipped)"""
+        return [self.results[key] for key in keys if key in self.results]
+
+    def __repr__(self) -> str:
+        return (f"<BatchResult ok={len(self.results)} failed={len(self.errors)} "
+                f"batches={self.batches} retried={self.retried}>")
+
+
+def execute_batch(service, keys: Iterable[Hashable], build: Callable[[Hashable], Any],
+                  method: str, batch_size: int = GMAIL_BATCH_SIZE, max_attempts: int = 4,
+                  backoff: Optional[float] = None, http=None) -> BatchResult:
+    """
+    Run one API call per key through Gmail batch requests
+
+    Args:
+        service: Gmail API service (provides new_batch_http_request)
+        keys: Unique keys, e.g. message ids; each becomes one sub-request
+        build: Returns the (unexecuted) API request for a key
+        method: Metric label for the sub-requests, e.g. 'messages.get'
+        batch_size: Sub-requests per HTTP batch (at most 100)
+        max_attempts: Tries per sub-request before its error is kept
+        backoff: Base delay in seconds, doubled on every retry round
+            (defaults to RETRY_BACKOFF)
+        http: Transport to send batches with (defaults to the requests' own)
+
+    Returns:
+        BatchResult with the parsed responses and the final per-key errors
+    """
+    backoff = RETRY_BACKOFF if backoff is None else backoff
+    outcome = BatchResult()
+    keys = list(dict.fromkeys(keys))
+    ids = {str(index): key for index, key in enumerate(keys)}
+
+    for start in range(0, len(keys), batch_size):
+        pending = [str(index) for index in range(start, min(start + batch_size, len(keys)))]
+        attempt = 0
+        while pending:
+            attempt += 1
+            final = attempt >= max_attempts
+            failed: List[str] = []
+            wait = 0.0
+
+            def collect(request_id: str, response: Any, exception: Optional[HttpError]):
+                nonlocal wait
+                key = ids[request_id]
+                if exception is None:
+                    outcome.results[key] = response
+                    outcome.errors.pop(key, None)
+                    GMAIL_CALLS.inc(method=method, outcome='ok')
+                    return
+                GMAIL_CALLS.inc(method=method, outcome=str(error_status(exception)))
+                outcome.errors[key] = exception
+                if not final and is_retryable(exception):
+                    failed.append(request_id)
+                    wait = max(wait, retry_after(exception))
+
+            batch = service.new_batch_http_request(callback=collect)
+            for request_id in pending:
+                batch.add(build(ids[request_id]), request_id=request_id)
+
+            started = time.perf_counter()
+            outcome.batches += 1
+            try:
+                batch.execute(http=http)
+            except (HttpError, httplib2.HttpLib2Error, OSError) as error:
+                # The batch itself failed: nothing inside it was answered
+                GMAIL_CALLS.inc(method='batch', outcome=str(error_status(error)))
+                answered = set(ids[r] for r in pending) & outcome.results.keys()
+                for request_id in pending:
+                    if ids[request_id] not in answered:
+                        outcome.errors[ids[request_id]] = error
+                if final or not is_retryable(error):
+                    break
+                failed = [r for r in pending if ids[r] not in answered]
+                wait = max(wait, retry_after(error))
+            else:
+                GMAIL_CALLS.inc(method='batch', outcome='ok')
+            finally:
+                GMAIL_LATENCY.observe(time.perf_counter() - started, method='batch')
+
+            pending = failed
+            if pending:
+                outcome.retried += len(pending)
+                delay = backoff * (2 ** (attempt - 1))
+                time.sleep(max(wait, delay * (0.5 + random.random() / 2)))
+
+    return outcome
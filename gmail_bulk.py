@@ -0,0 +1,86 @@
+"""
+Gmail Bulk Module
+Applies one label change (including a move to Trash) to many messages at once
+Ids are sent through messages.batchModify in chunks of up to 1000 (the API
+limit), paced by the shared quota bucket, with rate-limited or failed chunks
+retried on their own
+"""
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from googleapiclient.errors import HttpError
+
+from gmail_batch import RETRY_BACKOFF, error_status, httplib2, is_retryable, retry_after
+from gmail_executor import QUOTA_UNITS, QuotaBucket
+from metrics import GMAIL_CALLS, GMAIL_LATENCY
+
+
+# messages.batchModify takes at most 1000 ids
+GMAIL_BULK_CHUNK = 1000
+
+
+def run_chunks(ids: List[str], call: Callable[[List[str]], Any], method: str,
+               quota: QuotaBucket, chunk_size: Optional[int] = None,
+               max_attempts: int = 4, on_success: Optional[Callable[[List[str]], None]] = None
+               ) -> Dict[str, Any]:
+    """
+    Run `call(chunk)` over `ids` in chunks, one quota-paced API call each
+
+    Args:
+        ids: Message ids (duplicates are dropped)
+        call: Returns the unexecuted batchModify request for a chunk
+        method: Gmail method name (quota cost and metric label)
+        quota: Bucket shared with the fetch executor
+        chunk_size: Ids per call (defaults to GMAIL_BULK_CHUNK)
+        on_success: Called with each chunk that went through
+
+    Returns:
+        {'matched', 'succeeded', 'failed', 'chunks': [{'size', 'ok',
+        'attempts', 'error'}]}
+    """
+    chunk_size = chunk_size or GMAIL_BULK_CHUNK
+    ids = list(dict.fromkeys(ids))
+    chunks = []
+    succeeded = 0
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        attempt = 0
+        error: Optional[BaseException] = None
+        while True:
+            attempt += 1
+            quota.acquire(QUOTA_UNITS.get(method, 50))
+            started = time.perf_counter()
+            try:
+                call(chunk).execute()
+                error = None
+                GMAIL_CALLS.inc(method=method, outcome='ok')
+            except (HttpError, httplib2.HttpLib2Error, OSError) as failure:
+                error = failure
+                GMAIL_CALLS.inc(method=method, outcome=str(error_status(failure)))
+            finally:
+                GMAIL_LATENCY.observe(time.perf_counter() - started, method=method)
+            if error is None or attempt >= max_attempts or not is_retryable(error):
+                break
+            delay = RETRY_BACKOFF * (2 ** (attempt - 1))
+            time.sleep(max(retry_after(error), delay * (0.5 + random.random() / 2)))
+
+        if error is None:
+            succeeded += len(chunk)
+            if on_success is not None:
+                on_success(chunk)
+        else:
+            print(f'Error in {method} chunk of {len(chunk)}: {error}')
+        chunks.append({
+            'size': len(chunk),
+            'ok': error is None,
+            'attempts': attempt,
+            'error': str(error) if error is not None else None
+        })
+
+    return {
+        'matched': len(ids),
+        'succeeded': succeeded,
+        'failed': len(ids) - succeeded,
+        'chunks': chunks
+    }
@@ -0,0 +1,266 @@
+"""
+Gmail Cache Module
+Persistent SQLite cache of parsed Gmail messages keyed by message id
+Message content never changes once sent, so it is kept until evicted (LRU
+by bytes); label state does change and lives in its own table with a short
+TTL. The database runs in WAL mode so every worker process can share it.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from metrics import GMAIL_CACHE_BYTES_SAVED, GMAIL_CACHE_LOOKUPS
+
+
+GMAIL_CACHE_FILE = os.getenv("GMAIL_CACHE_FILE", "gmail_cache.db")
+GMAIL_CACHE_MAX_BYTES = int(os.getenv("GMAIL_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+GMAIL_LABEL_TTL = float(os.getenv("GMAIL_LABEL_TTL", "60"))
+
+# Ids bound per IN (...) query; older SQLite builds allow only 999 variables
+SQLITE_MAX_IDS = 500
+
+# A cached message can answer any request for its format or a lesser one
+FORMAT_RANK = {'minimal': 0, 'metadata': 1, 'full': 2}
+FORMAT_KEYS = {
+    'minimal': ('id', 'threadId', 'snippet'),
+    'metadata': ('id', 'threadId', 'snippet', 'subject', 'from', 'to', 'date'),
+    'full': None
+}
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    rank INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_accessed ON messages (accessed);
+CREATE TABLE IF NOT EXISTS labels (
+    id TEXT PRIMARY KEY,
+    labels TEXT NOT NULL,
+    fetched REAL NOT NULL
+);
+-- Running totals kept by triggers, so eviction and stats never scan messages
+CREATE TABLE IF NOT EXISTS messages_total (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS messages_total_insert AFTER INSERT ON messages BEGIN
+    UPDATE messages_total SET entries = entries + 1, bytes = bytes + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS messages_total_update AFTER UPDATE OF size ON messages BEGIN
+    UPDATE messages_total SET bytes = bytes - old.size + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS messages_total_delete AFTER DELETE ON messages BEGIN
+    UPDATE messages_total SET entries = entries - 1, bytes = bytes - old.size;
+END;
+INSERT OR IGNORE INTO messages_total (id, entries, bytes)
+    SELECT 0, COUNT(*), COALESCE(SUM(size), 0) FROM messages
+    WHERE NOT EXISTS (SELECT 1 FROM messages_total);
+"""
+
+
+def id_chunks(ids: List[str]) -> Iterable[List[str]]:
+    """Split ids into lists small enough for one IN (...) query"""
+    for start in range(0, len(ids), SQLITE_MAX_IDS):
+        yield ids[start:start + SQLITE_MAX_IDS]
+
+
+class SQLiteStore:
+    """
+    Base for tables kept in the shared Gmail SQLite file
+
+    Connections are per thread (and per process); sqlite3 connections must
+    not be shared across either. Each connection runs in WAL mode and
+    creates the subclass's SCHEMA on first use.
+    """
+
+    SCHEMA = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+class MessageCache(SQLiteStore):
+    """Parsed-message cache with separate, expiring label state"""
+
+    SCHEMA = CACHE_SCHEMA
+
+    def __init__(self, path: str = GMAIL_CACHE_FILE, max_bytes: int = GMAIL_CACHE_MAX_BYTES,
+                 label_ttl: float = GMAIL_LABEL_TTL):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+        self.label_ttl = label_ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale_labels = 0
+        self.bytes_saved = 0
+        self.evicted = 0
+
+    def lookup(self, message_ids: Iterable[str], format: str = 'full'
+               ) -> Tuple[Dict[str, Dict[str, Any]], List[str], List[str]]:
+        """
+        Split ids into cached messages, stale label state and misses
+
+        Returns:
+            (messages, stale, missing): `messages` maps id to the parsed
+            message projected to `format`, with labels when they are fresh;
+            `stale` lists ids whose content is cached but whose labels need
+            refreshing; `missing` lists ids not usable from the cache
+        """
+        ids = list(message_ids)
+        if not ids:
+            return {}, [], []
+        conn = self._connection()
+        now = time.time()
+        rows = []
+        for chunk in id_chunks(list(dict.fromkeys(ids))):
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(conn.execute(
+                f"SELECT m.id, m.rank, m.data, m.size, l.labels, l.fetched FROM messages m "
+                f"LEFT JOIN labels l ON l.id = m.id WHERE m.id IN ({placeholders})", chunk
+            ))
+
+        wanted = FORMAT_RANK[format]
+        messages: Dict[str, Dict[str, Any]] = {}
+        stale: List[str] = []
+        saved = 0
+        for message_id, rank, data, size, labels, fetched in rows:
+            if rank < wanted:
+                continue
+            messages[message_id] = project(json.loads(data), format)
+            saved += size
+            if labels is not None and now - fetched <= self.label_ttl:
+                messages[message_id]['labels'] = json.loads(labels)
+            else:
+                stale.append(message_id)
+        missing = [message_id for message_id in ids if message_id not in messages]
+
+        if messages:
+            conn.executemany("UPDATE messages SET accessed = ? WHERE id = ?",
+                             [(now, message_id) for message_id in messages])
+        with self._lock:
+            self.hits += len(messages) - len(stale)
+            self.stale_labels += len(stale)
+            self.misses += len(missing)
+            self.bytes_saved += saved
+        GMAIL_CACHE_LOOKUPS.inc(len(messages) - len(stale), result='hit')
+        GMAIL_CACHE_LOOKUPS.inc(len(stale), result='stale_labels')
+        GMAIL_CACHE_LOOKUPS.inc(len(missing), result='miss')
+        GMAIL_CACHE_BYTES_SAVED.inc(saved)
+        return messages, stale, missing
+
+    def store(self, messages: Iterable[Dict[str, Any]], format: str = 'full'):
+        """Cache parsed messages (content and labels) fetched in `format`"""
+        now = time.time()
+        content = []
+        labels = []
+        for message in messages:
+            data = {k: v for k, v in message.items() if k != 'labels'}
+            encoded = json.dumps(data, separators=(",", ":"))
+            content.append((message['id'], FORMAT_RANK[format], encoded, len(encoded), now))
+            labels.append((message['id'], json.dumps(message.get('labels', [])), now))
+        if not content:
+            return
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Never replace richer content with a cheaper format
+            conn.executemany(
+                "INSERT INTO messages (id, rank, data, size, accessed) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET rank = excluded.rank, data = excluded.data, "
+                "size = excluded.size, accessed = excluded.accessed "
+                "WHERE excluded.rank >= messages.rank", content
+            )
+            conn.executemany("INSERT OR REPLACE INTO labels (id, labels, fetched) VALUES (?, ?, ?)",
+                             labels)
+        self._evict(conn)
+
+    def store_labels(self, labels: Dict[str, List[str]]):
+        """Record freshly fetched label state"""
+        if not labels:
+            return
+        now = time.time()
+        self._connection().executemany(
+            "INSERT OR REPLACE INTO labels (id, labels, fetched) VALUES (?, ?, ?)",
+            [(message_id, json.dumps(ids), now) for message_id, ids in labels.items()]
+        )
+
+    def invalidate_labels(self, message_ids: Iterable[str]):
+        """Forget label state after a local modify (read, archive, ...)"""
+        self._connection().executemany("DELETE FROM labels WHERE id = ?",
+                                       [(message_id,) for message_id in message_ids])
+
+    def discard(self, message_ids: Iterable[str]):
+        """Drop deleted messages entirely"""
+        rows = [(message_id,) for message_id in message_ids]
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("DELETE FROM messages WHERE id = ?", rows)
+            conn.executemany("DELETE FROM labels WHERE id = ?", rows)
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Remove least recently used messages until under max_bytes"""
+        total = conn.execute("SELECT bytes FROM messages_total").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for message_id, size in conn.execute("SELECT id, size FROM messages ORDER BY accessed"):
+            victims.append((message_id,))
+            excess -= size
+            if excess <= 0:
+                break
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("DELETE FROM messages WHERE id = ?", victims)
+            conn.executemany("DELETE FROM labels WHERE id = ?", victims)
+        with self._lock:
+            self.evicted += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate, bytes saved and current size"""
+        entries, size = self._connection().execute(
+            "SELECT entries, bytes FROM messages_total").fetchone()
+        with self._lock:
+            lookups = self.hits + self.stale_labels + self.misses
+            return {
+                'path': self.path,
+                'entries': entries,
+                'bytes': size,
+                'max_bytes': self.max_bytes,
+                'label_ttl': self.label_ttl,
+                'hits': self.hits,
+                'stale_labels': self.stale_labels,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.stale_labels) / lookups, 4) if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+                'evicted': self.evicted
+            }
+
+
+def project(message: Dict[str, Any], format: str) -> Dict[str, Any]:
+    """Reduce a cached message to the keys a `format` request returns"""
+    keys = FORMAT_KEYS[format]
+    if keys is None:
+        return message
+    return {k: message[k] for k in keys if k in message}
@@ -0,0 +1,173 @@
+"""
+Gmail Executor Module
+Runs Gmail API calls concurrently on a bounded thread pool
+Every worker thread owns its own service client (httplib2 is not thread
+safe) while all of them share one set of credentials; a quota-unit token
+bucket keeps the pool inside Gmail's per-user rate limit
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+from gmail_batch import BatchResult, GMAIL_BATCH_SIZE, execute_batch
+
+
+# Gmail allows 250 quota units per user per second
+GMAIL_QUOTA_PER_SECOND = float(os.getenv("GMAIL_QUOTA_PER_SECOND", "250"))
+GMAIL_MAX_CONCURRENCY = int(os.getenv("GMAIL_MAX_CONCURRENCY", "8"))
+
+# Quota cost of each method (https://developers.google.com/gmail/api/reference/quota)
+QUOTA_UNITS = {
+    'getProfile': 1,
+    'labels.list': 1,
+    'labels.get': 1,
+    'history.list': 2,
+    'messages.list': 5,
+    'messages.get': 5,
+    'messages.modify': 5,
+    'messages.trash': 5,
+    'messages.delete': 10,
+    'messages.batchModify': 50,
+    'messages.batchDelete': 50,
+    'messages.send': 100,
+}
+
+
+class QuotaBucket:
+    """Token bucket over quota units, refilled continuously"""
+
+    def __init__(self, rate: float = GMAIL_QUOTA_PER_SECOND, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, units: float):
+        """Block until `units` quota units are available, then take them"""
+        units = min(units, self.burst)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= units:
+                    self._tokens -= units
+                    return
+                wait = (units - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchExecutor:
+    """
+    Bounded thread pool for Gmail API calls
+
+    `service_factory` builds one Gmail service per thread (see
+    service_factory_for below); service() hands the same per-thread clients
+    to request threads. The pool starts lazily and is rebuilt in a forked
+    child, like the event bus.
+    """
+
+    def __init__(self, service_factory: Callable[[], Any], max_workers: int = GMAIL_MAX_CONCURRENCY,
+                 quota: Optional[QuotaBucket] = None):
+        self.service_factory = service_factory
+        self.max_workers = max_workers
+        self.quota = quota or QuotaBucket()
+        self._local = threading.local()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._latency: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0, 0])
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="gmail-fetch")
+                self._pid = os.getpid()
+            return self._pool
+
+    def service(self):
+        """The calling thread's own Gmail service"""
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self._local.service = self.service_factory()
+        return service
+
+    def _record(self, method: str, seconds: float, ok: bool):
+        with self._lock:
+            entry = self._latency[method]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] += 0 if ok else 1
+
+    def _batch(self, method: str, build: Callable[[Any, Hashable], Any],
+               keys: List[Hashable], batch_size: int) -> BatchResult:
+        self.quota.acquire(QUOTA_UNITS.get(method, 5) * len(keys))
+        service = self.service()
+        started = time.perf_counter()
+        result = execute_batch(service, keys, lambda key: build(service, key),
+                               method=method, batch_size=batch_size)
+        self._record('batch:' + method, time.perf_counter() - started, not result.errors)
+        return result
+
+    def map_batches(self, method: str, build: Callable[[Any, Hashable], Any],
+                    keys: Iterable[Hashable], batch_size: int = GMAIL_BATCH_SIZE) -> BatchResult:
+        """
+        Split keys into batch requests and send the batches in parallel
+
+        Returns:
+            A single BatchResult merged across all batches
+        """
+        keys = list(dict.fromkeys(keys))
+        chunks = [keys[i:i + batch_size] for i in range(0, len(keys), batch_size)]
+        pool = self._executor()
+        futures = [pool.submit(self._batch, method, build, chunk, batch_size) for chunk in chunks]
+
+        merged = BatchResult()
+        for future in futures:
+            part = future.result()
+            merged.results.update(part.results)
+            merged.errors.update(part.errors)
+            merged.batches += part.batches
+            merged.retried += part.retried
+        return merged
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-method call count, error count and latency (ms)"""
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'quota_per_second': self.quota.rate,
+                'methods': {
+                    method: {
+                        'calls': calls,
+                        'errors': errors,
+                        'avg_ms': round(total / calls * 1000, 2) if calls else 0.0,
+                        'max_ms': round(worst * 1000, 2)
+                    }
+                    for method, (calls, total, worst, errors) in self._latency.items()
+                }
+            }
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None and self._pid == os.getpid():
+            pool.shutdown(wait=True)
+
+
+def service_factory_for(credentials) -> Callable[[], Any]:
+    """Build Gmail services on their own AuthorizedHttp around shared credentials"""
+    def build_service():
+        import google_auth_httplib2
+        import httplib2
+        from googleapiclient.discovery import build
+
+        http = google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+        return build('gmail', 'v1', http=http, cache_discovery=False)
+    return build_service
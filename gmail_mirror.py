@@ -0,0 +1,388 @@
+"""
+Gmail Mirror Module
+Local mirror of the mailbox's message ids and labels, kept in sync through
+users.history.list
+One full sync records ids, labels and the mailbox historyId; after that
+only the changes since the stored historyId are fetched. Label-only queries
+and mailbox counts can then be answered from SQLite.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from googleapiclient.errors import HttpError
+
+from gmail_cache import GMAIL_CACHE_FILE, SQLiteStore, id_chunks
+
+
+GMAIL_MIRROR_INTERVAL = float(os.getenv("GMAIL_MIRROR_INTERVAL", "60"))
+GMAIL_MIRROR_MAX_MESSAGES = int(os.getenv("GMAIL_MIRROR_MAX_MESSAGES", "5000"))
+
+MIRROR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mirror_messages (
+    id TEXT PRIMARY KEY,
+    thread_id TEXT,
+    internal_date INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS mirror_messages_date ON mirror_messages (internal_date);
+CREATE TABLE IF NOT EXISTS mirror_labels (
+    label TEXT NOT NULL,
+    message_id TEXT NOT NULL,
+    PRIMARY KEY (label, message_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS mirror_labels_message ON mirror_labels (message_id);
+CREATE TABLE IF NOT EXISTS mirror_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Search operators that map onto a system label
+LABEL_OPERATORS = {
+    ('is', 'unread'): 'UNREAD',
+    ('is', 'starred'): 'STARRED',
+    ('is', 'important'): 'IMPORTANT',
+    ('in', 'inbox'): 'INBOX',
+    ('in', 'sent'): 'SENT',
+    ('in', 'draft'): 'DRAFT',
+    ('in', 'drafts'): 'DRAFT',
+    ('in', 'spam'): 'SPAM',
+    ('in', 'trash'): 'TRASH',
+}
+MINIMAL_FIELDS = 'id,threadId,labelIds,internalDate'
+
+
+class MailboxMirror(SQLiteStore):
+    """
+    Message ids, dates and labels of the newest messages in the mailbox
+
+    `gmail` is the GmailService the mirror syncs through. Up to
+    max_messages are loaded by the full sync; history keeps adding new
+    ones after that.
+    """
+
+    SCHEMA = MIRROR_SCHEMA
+
+    def __init__(self, gmail, path: str = GMAIL_CACHE_FILE, interval: float = GMAIL_MIRROR_INTERVAL,
+                 max_messages: int = GMAIL_MIRROR_MAX_MESSAGES):
+        super().__init__(path)
+        self.gmail = gmail
+        self.interval = interval
+        self.max_messages = max_messages
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self.last_error: Optional[str] = None
+        self.syncs = {'full': 0, 'incremental': 0}
+        # Called by the background loop after every successful sync
+        self.after_sync: Optional[Callable[[], Any]] = None
+
+    # State
+
+    def _state(self) -> Dict[str, str]:
+        return dict(self._connection().execute("SELECT key, value FROM mirror_state"))
+
+    def label_ids(self) -> Dict[str, str]:
+        """Label ids by search name (lowercase, spaces as dashes)"""
+        return json.loads(self._state().get('label_ids', '{}'))
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful sync (None if never synced)"""
+        synced_at = self._state().get('synced_at')
+        return time.time() - float(synced_at) if synced_at else None
+
+    # Sync
+
+    def sync(self) -> Dict[str, Any]:
+        """Bring the mirror up to date (full sync the first time)"""
+        with self._sync_lock:
+            try:
+                history_id = self._state().get('history_id')
+                result = self._incremental(history_id) if history_id else None
+                if result is None:
+                    result = self._full_sync()
+                self.last_error = None
+                return result
+            except Exception as error:
+                self.last_error = str(error)
+                raise
+
+    def _profile(self, service) -> Dict[str, Any]:
+        return self.gmail._execute('getProfile', service.users().getProfile(userId='me'))
+
+    def _full_sync(self) -> Dict[str, Any]:
+        service = self.gmail.thread_service()
+        # Taken before listing so changes made meanwhile are replayed by history
+        profile = self._profile(service)
+
+        ids: List[str] = []
+        page_token = None
+        complete = False
+        while len(ids) < self.max_messages:
+            response = self.gmail._execute('messages.list', service.users().messages().list(
+                userId='me', maxResults=min(500, self.max_messages - len(ids)),
+                pageToken=page_token, includeSpamTrash=True,
+                fields='messages/id,nextPageToken'
+            ))
+            ids.extend(message['id'] for message in response.get('messages', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                complete = True
+                break
+
+        messages, _ = self.gmail.fetch_raw(ids, 'minimal', MINIMAL_FIELDS)
+        labels = self.gmail._execute('labels.list', service.users().labels().list(userId='me'))
+        label_ids = {label['name'].lower().replace(' ', '-'): label['id']
+                     for label in labels.get('labels', [])}
+
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM mirror_messages")
+            conn.execute("DELETE FROM mirror_labels")
+            conn.executemany(
+                "INSERT INTO mirror_messages (id, thread_id, internal_date) VALUES (?, ?, ?)",
+                [(m['id'], m.get('threadId'), int(m.get('internalDate', 0))) for m in messages.values()]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO mirror_labels (label, message_id) VALUES (?, ?)",
+                [(label, m['id']) for m in messages.values() for label in m.get('labelIds', [])]
+            )
+            self._save_state(conn, profile, complete=complete and len(messages) == len(ids),
+                             label_ids=label_ids)
+        self.syncs['full'] += 1
+        return {'mode': 'full', 'messages': len(messages), 'history_id': profile.get('historyId')}
+
+    def _incremental(self, history_id: str) -> Optional[Dict[str, Any]]:
+        """Apply history since `history_id`; None if it expired and a full sync is needed"""
+        service = self.gmail.thread_service()
+        records: List[Dict[str, Any]] = []
+        page_token = None
+        latest = history_id
+        try:
+            while True:
+                response = self.gmail._execute('history.list', service.users().history().list(
+                    userId='me', startHistoryId=history_id, pageToken=page_token, maxResults=500
+                ))
+                records.extend(response.get('history', []))
+                latest = response.get('historyId', latest)
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    break
+        except HttpError as error:
+            if error.resp.status == 404:
+                # historyId too old; Gmail only keeps about a week of history
+                return None
+            raise
+
+        added = {m['message']['id'] for r in records for m in r.get('messagesAdded', [])}
+        fetched, _ = self.gmail.fetch_raw(sorted(added), 'minimal', MINIMAL_FIELDS)
+        profile = self._profile(service)
+
+        deleted: Set[str] = set()
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # Records are applied in history order so later changes win
+            for record in records:
+                for change in record.get('messagesAdded', []):
+                    message = change['message']
+                    current = fetched.get(message['id'], message)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO mirror_messages (id, thread_id, internal_date) "
+                        "VALUES (?, ?, ?)",
+                        (message['id'], message.get('threadId'),
+                         int(current.get('internalDate', time.time() * 1000)))
+                    )
+                    conn.execute("DELETE FROM mirror_labels WHERE message_id = ?", (message['id'],))
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO mirror_labels (label, message_id) VALUES (?, ?)",
+                        [(label, message['id']) for label in message.get('labelIds', [])]
+                    )
+                    deleted.discard(message['id'])
+                for change in record.get('messagesDeleted', []):
+                    message_id = change['message']['id']
+                    conn.execute("DELETE FROM mirror_messages WHERE id = ?", (message_id,))
+                    conn.execute("DELETE FROM mirror_labels WHERE message_id = ?", (message_id,))
+                    deleted.add(message_id)
+                for change in record.get('labelsAdded', []):
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO mirror_labels (label, message_id) "
+                        "SELECT ?, id FROM mirror_messages WHERE id = ?",
+                        [(label, change['message']['id']) for label in change.get('labelIds', [])]
+                    )
+                for change in record.get('labelsRemoved', []):
+                    conn.executemany(
+                        "DELETE FROM mirror_labels WHERE label = ? AND message_id = ?",
+                        [(label, change['message']['id']) for label in change.get('labelIds', [])]
+                    )
+            profile['historyId'] = latest
+            self._save_state(conn, profile)
+
+        if deleted:
+            self.gmail.forget(deleted)
+        self.syncs['incremental'] += 1
+        return {'mode': 'incremental', 'changes': len(records), 'added': len(added),
+                'deleted': len(deleted), 'history_id': latest}
+
+    def _save_state(self, conn, profile: Dict[str, Any], complete: Optional[bool] = None,
+                    label_ids: Optional[Dict[str, str]] = None):
+        state = {
+            'history_id': str(profile['historyId']),
+            'email': profile.get('emailAddress', ''),
+            'messages_total': str(profile.get('messagesTotal', 0)),
+            'threads_total': str(profile.get('threadsTotal', 0)),
+            'synced_at': repr(time.time())
+        }
+        if complete is not None:
+            state['complete'] = '1' if complete else '0'
+        if label_ids is not None:
+            state['label_ids'] = json.dumps(label_ids)
+        conn.executemany("INSERT OR REPLACE INTO mirror_state (key, value) VALUES (?, ?)",
+                         state.items())
+
+    # Background loop
+
+    def start(self):
+        """Start the sync loop in this process (no-op if already running)"""
+        with self._lock:
+            if self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="gmail-mirror", daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+                if self.after_sync is not None:
+                    self.after_sync()
+            except Exception as e:
+                print(f"⚠️  Gmail mirror sync failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stop.set()
+
+    # Reads
+
+    def _labels_for(self, query: str) -> Optional[Tuple[List[str], List[str]]]:
+        """(required, excluded) label ids for a label-only query, else None"""
+        include: List[str] = []
+        exclude: List[str] = []
+        label_ids = None
+        for token in query.split():
+            negate = token.startswith('-')
+            operator, _, value = token.lstrip('-').partition(':')
+            operator, value = operator.lower(), value.lower()
+            if (operator, value) == ('is', 'read'):
+                label, negate = 'UNREAD', not negate
+            elif (operator, value) in LABEL_OPERATORS:
+                label = LABEL_OPERATORS[(operator, value)]
+            elif operator == 'label' and value:
+                if label_ids is None:
+                    label_ids = self.label_ids()
+                label = label_ids.get(value)
+                if label is None:
+                    return None
+            else:
+                return None
+            (exclude if negate else include).append(label)
+        # messages.list leaves out spam and trash unless asked for them
+        for hidden in ('SPAM', 'TRASH'):
+            if hidden not in include and hidden not in exclude:
+                exclude.append(hidden)
+        return include, exclude
+
+    def query(self, query: str = '', limit: int = 10) -> Optional[Tuple[List[str], Dict[str, List[str]]]]:
+        """
+        Newest message ids matching a label-only query
+
+        Returns:
+            (ids newest first, labels by id), or None when the mirror cannot
+            answer (free-text operators, or a partial mirror with too few
+            matches)
+        """
+        labels = self._labels_for(query)
+        if labels is None:
+            return None
+        include, exclude = labels
+        clauses = (["EXISTS (SELECT 1 FROM mirror_labels l WHERE l.message_id = m.id AND l.label = ?)"]
+                   * len(include) +
+                   ["NOT EXISTS (SELECT 1 FROM mirror_labels l WHERE l.message_id = m.id AND l.label = ?)"]
+                   * len(exclude))
+        conn = self._connection()
+        ids = [row[0] for row in conn.execute(
+            "SELECT m.id FROM mirror_messages m" + (" WHERE " + " AND ".join(clauses) if clauses else "")
+            + " ORDER BY m.internal_date DESC LIMIT ?", include + exclude + [limit]
+        )]
+        if len(ids) < limit and not self.complete():
+            return None
+        return ids, self.labels_for(ids)
+
+    def complete(self) -> bool:
+        """True if the last full sync held the whole mailbox"""
+        return self._state().get('complete') == '1'
+
+    def labels_for(self, message_ids: List[str]) -> Dict[str, List[str]]:
+        """Mirrored labels of the given messages (ids the mirror lacks are left out)"""
+        if not message_ids:
+            return {}
+        conn = self._connection()
+        by_id: Dict[str, List[str]] = {}
+        for chunk in id_chunks(list(dict.fromkeys(message_ids))):
+            placeholders = ",".join("?" * len(chunk))
+            by_id.update((row[0], []) for row in conn.execute(
+                f"SELECT id FROM mirror_messages WHERE id IN ({placeholders})", chunk))
+            for label, message_id in conn.execute(
+                    f"SELECT label, message_id FROM mirror_labels WHERE message_id IN ({placeholders})",
+                    chunk):
+                if message_id in by_id:
+                    by_id[message_id].append(label)
+        return by_id
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """Mailbox counts from the mirror (None unless it holds the whole mailbox)"""
+        state = self._state()
+        if state.get('complete') != '1':
+            return None
+        conn = self._connection()
+        counts = dict(conn.execute(
+            "SELECT l.label, COUNT(*) FROM mirror_labels l WHERE l.label IN ('UNREAD', 'STARRED', 'INBOX') "
+            "AND NOT EXISTS (SELECT 1 FROM mirror_labels h WHERE h.message_id = l.message_id "
+            "AND h.label IN ('SPAM', 'TRASH')) GROUP BY l.label"
+        ))
+        inbox_unread = conn.execute(
+            "SELECT COUNT(*) FROM mirror_labels i JOIN mirror_labels u ON u.message_id = i.message_id "
+            "WHERE i.label = 'INBOX' AND u.label = 'UNREAD'"
+        ).fetchone()[0]
+        return {
+            'email': state.get('email', ''),
+            'total_messages': int(state.get('messages_total', 0)),
+            'total_threads': int(state.get('threads_total', 0)),
+            'unread_count': counts.get('UNREAD', 0),
+            'starred_count': counts.get('STARRED', 0),
+            'inbox_count': counts.get('INBOX', 0),
+            'inbox_unread': inbox_unread
+        }
+
+    def status(self) -> Dict[str, Any]:
+        """Sync state for the health endpoint"""
+        state = self._state()
+        age = self.age()
+        entries = self._connection().execute("SELECT COUNT(*) FROM mirror_messages").fetchone()[0]
+        return {
+            'messages': entries,
+            'complete': state.get('complete') == '1',
+            'history_id': state.get('history_id'),
+            'age_seconds': round(age, 1) if age is not None else None,
+            'syncs': dict(self.syncs),
+            'running': self._thread is not None and self._thread.is_alive(),
+            'last_error': self.last_error
+        }
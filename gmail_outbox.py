@@ -0,0 +1,213 @@
+"""
+Gmail Outbox Module
+Durable outbound mail queue (SQLite) drained by a small worker pool
+The send route only records the message and returns a job id; workers send
+it through Gmail, retrying rate limits and server errors with exponential
+backoff. A client idempotency key maps repeat submissions onto the first
+job, so a retried POST never sends twice.
+"""
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+from gmail_batch import httplib2, is_retryable, retry_after
+from gmail_cache import SQLiteStore
+
+
+GMAIL_OUTBOX_FILE = os.getenv("GMAIL_OUTBOX_FILE", "gmail_outbox.db")
+GMAIL_OUTBOX_WORKERS = int(os.getenv("GMAIL_OUTBOX_WORKERS", "2"))
+GMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("GMAIL_OUTBOX_MAX_ATTEMPTS", "8"))
+
+# Delay before the first resend (doubled per attempt, with jitter, capped)
+OUTBOX_BACKOFF = 2.0
+OUTBOX_MAX_DELAY = 300.0
+# A job claimed longer ago than this is assumed lost with its worker
+OUTBOX_LEASE = 120.0
+# Idle workers look for due retries this often
+OUTBOX_POLL = 1.0
+
+OUTBOX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT UNIQUE,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    message_id TEXT,
+    thread_id TEXT,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt);
+"""
+
+JOB_COLUMNS = ('id', 'idempotency_key', 'status', 'attempts', 'next_attempt', 'created',
+               'updated', 'message_id', 'thread_id', 'last_error')
+
+
+class Outbox(SQLiteStore):
+    """
+    Queued sends and the workers that deliver them
+
+    Jobs move queued -> sending -> sent, or to failed once an error is
+    permanent or max_attempts is used up. While a job is 'sending' its
+    next_attempt holds the lease expiry, so a job whose worker died is
+    picked up again.
+    """
+
+    SCHEMA = OUTBOX_SCHEMA
+
+    def __init__(self, gmail, path: str = GMAIL_OUTBOX_FILE, workers: int = GMAIL_OUTBOX_WORKERS,
+                 max_attempts: int = GMAIL_OUTBOX_MAX_ATTEMPTS):
+        super().__init__(path)
+        self.gmail = gmail
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._threads_pid: Optional[int] = None
+
+    # Jobs
+
+    def enqueue(self, message: Dict[str, Any], idempotency_key: Optional[str] = None
+                ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Queue a message ({'to', 'subject', 'body', 'from'}) for sending
+
+        Returns:
+            (job, created): an idempotency key seen before returns the
+            existing job with created=False
+        """
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            created = conn.execute(
+                "INSERT INTO outbox (id, idempotency_key, payload, status, next_attempt, created, updated) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?) ON CONFLICT(idempotency_key) DO NOTHING",
+                (job_id, idempotency_key, json.dumps(message), now, now, now)
+            ).rowcount == 1
+            if not created:
+                job_id = conn.execute("SELECT id FROM outbox WHERE idempotency_key = ?",
+                                      (idempotency_key,)).fetchone()[0]
+        if created:
+            self.start()
+            self._wake.set()
+        return self.get(job_id), created
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Status of one job (None if unknown)"""
+        row = self._connection().execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM outbox WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(JOB_COLUMNS, row))
+        if job['status'] != 'queued':
+            job['next_attempt'] = None
+        return job
+
+    def pending(self) -> int:
+        """Jobs not yet sent or failed"""
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM outbox WHERE status IN ('queued', 'sending')").fetchone()[0]
+
+    def _claim(self) -> Optional[Tuple[str, Dict[str, Any], int]]:
+        """Take the oldest due job: (id, message, attempt number)"""
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, payload, attempts FROM outbox WHERE status IN ('queued', 'sending') "
+                "AND next_attempt <= ? ORDER BY next_attempt LIMIT 1", (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE outbox SET status = 'sending', attempts = attempts + 1, "
+                         "next_attempt = ?, updated = ? WHERE id = ?", (now + OUTBOX_LEASE, now, row[0]))
+        return row[0], json.loads(row[1]), row[2] + 1
+
+    def _update(self, job_id: str, **columns):
+        columns['updated'] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in columns)
+        self._connection().execute(f"UPDATE outbox SET {assignments} WHERE id = ?",
+                                   (*columns.values(), job_id))
+
+    def process(self, job: Tuple[str, Dict[str, Any], int]):
+        """Send one claimed job and record the outcome"""
+        job_id, message, attempt = job
+        try:
+            result = self.gmail.deliver(message)
+        except Exception as error:
+            transient = (isinstance(error, (HttpError, httplib2.HttpLib2Error, OSError))
+                         and is_retryable(error))
+            if transient and attempt < self.max_attempts:
+                delay = min(OUTBOX_MAX_DELAY, OUTBOX_BACKOFF * (2 ** (attempt - 1)))
+                delay = max(retry_after(error), delay * (0.5 + random.random() / 2))
+                self._update(job_id, status='queued', next_attempt=time.time() + delay,
+                             last_error=str(error))
+            else:
+                print(f'Error sending outbox job {job_id}: {error}')
+                self._update(job_id, status='failed', last_error=str(error))
+            return
+        self._update(job_id, status='sent', message_id=result.get('id'),
+                     thread_id=result.get('threadId'), last_error=None)
+
+    # Workers
+
+    def start(self):
+        """Start the worker pool in this process (no-op if already running)"""
+        with self._lock:
+            if self._threads_pid == os.getpid() and any(t.is_alive() for t in self._threads):
+                return
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"gmail-outbox-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            self._threads_pid = os.getpid()
+            for thread in self._threads:
+                thread.start()
+
+    def resume(self):
+        """Start the workers if jobs were left over from a previous run"""
+        if self.pending():
+            self.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job = self._claim()
+                if job is not None:
+                    self.process(job)
+                    continue
+            except Exception as e:
+                print(f"⚠️  Gmail outbox worker failed: {e}")
+            self._wake.wait(OUTBOX_POLL)
+            self._wake.clear()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status for the health endpoint"""
+        counts = dict(self._connection().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status"))
+        return {
+            'queued': counts.get('queued', 0),
+            'sending': counts.get('sending', 0),
+            'sent': counts.get('sent', 0),
+            'failed': counts.get('failed', 0),
+            'workers': self.workers,
+            'running': self._threads_pid == os.getpid() and any(t.is_alive() for t in self._threads)
+        }
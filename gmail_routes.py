@@ -2,8 +2,12 @@
 Gmail API Routes for Flask
 Provides REST endpoints for Gmail operations
 """
+from itertools import chain
+
 from flask import Blueprint, jsonify, request
-from gmail_service import get_gmail_service
+from werkzeug.routing import BaseConverter
+from gmail_service import decode_cursor, get_gmail_service
+from json_provider import ndjson_response
 from datetime import datetime
 from typing import Dict, Any
 
@@ -12,6 +16,19 @@ from typing import Dict, Any
 gmail_bp = Blueprint('gmail', __name__, url_prefix='/api/gmail')
 
 
+class MessageIdConverter(BaseConverter):
+    """
+    A message id segment that is never one of the fixed /messages/ routes
+    (so GET /messages/search is a 405 from that route, not a 404 lookup)
+    """
+    regex = r'(?!(?:search|export|send|bulk)(?![^/]))[^/]+'
+
+
+@gmail_bp.record_once
+def register_converters(state):
+    state.app.url_map.converters['message_id'] = MessageIdConverter
+
+
 @gmail_bp.route('/auth', methods=['GET', 'POST'])
 def authenticate():
     """
@@ -76,23 +93,42 @@ def get_profile():
 def get_messages():
     """
     Get Gmail messages
-    GET /api/gmail/messages?query=is:unread&max_results=10
+    GET /api/gmail/messages?query=is:unread&max_results=10&format=metadata
+    format: minimal | metadata | full (default); fields: optional Gmail field mask
+    max_age: accept the local mailbox mirror if synced within this many seconds
     """
     try:
         query = request.args.get('query', '')
         max_results = int(request.args.get('max_results', 10))
+        message_format = request.args.get('format', 'full')
+        fields = request.args.get('fields')
+        max_age = request.args.get('max_age', type=float)
 
         gmail = get_gmail_service()
-        messages = gmail.get_messages(query=query, max_results=max_results)
+        messages = None
+        if max_age is not None and not fields:
+            messages = gmail.get_messages_from_mirror(query=query, max_results=max_results,
+                                                      format=message_format, max_age=max_age)
+        source = 'mirror' if messages is not None else 'api'
+        if messages is None:
+            messages = gmail.get_messages(query=query, max_results=max_results,
+                                          format=message_format, fields=fields)
 
         return jsonify({
             'ok': True,
             'count': len(messages),
             'messages': messages,
             'query': query,
+            'format': message_format,
+            'source': source,
             'timestamp': datetime.now().isoformat()
         })
 
+    except ValueError as e:
+        return jsonify({
+            'ok': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'ok': False,
@@ -105,23 +141,129 @@ def search_messages():
     """
     Search Gmail messages with query
     POST /api/gmail/messages/search
-    Body: { "query": "from:example@gmail.com", "max_results": 20 }
+    Body: { "query": "from:example@gmail.com", "max_results": 20, "format": "metadata" }
+    Optional: "max_age" (seconds) searches the local full-text index when the
+    mailbox mirror is that fresh; "page_token" and "order" (relevance | date)
+    page through local results
     """
     try:
         data = request.get_json() or {}
         query = data.get('query', '')
         max_results = int(data.get('max_results', 50))
+        message_format = data.get('format', 'full')
+        fields = data.get('fields')
+        max_age = data.get('max_age')
 
         gmail = get_gmail_service()
-        messages = gmail.search_messages(query=query, max_results=max_results)
+        local = None
+        if max_age is not None and not fields:
+            local = gmail.search_local(query, max_results=max_results,
+                                       page_token=data.get('page_token'), format=message_format,
+                                       max_age=float(max_age), order=data.get('order', 'relevance'))
+        if local is not None:
+            messages, next_page_token = local
+            source = 'index'
+        else:
+            messages = gmail.search_messages(query=query, max_results=max_results,
+                                             format=message_format, fields=fields)
+            next_page_token = None
+            source = 'api'
 
         return jsonify({
             'ok': True,
             'count': len(messages),
             'messages': messages,
-            'query': query
+            'query': query,
+            'format': message_format,
+            'source': source,
+            'next_page_token': next_page_token
         })
 
+    except ValueError as e:
+        return jsonify({
+            'ok': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'ok': False,
+            'error': str(e)
+        }), 500
+
+
+@gmail_bp.route('/messages/export', methods=['GET'])
+def export_messages():
+    """
+    Stream every message matching a query as NDJSON
+    GET /api/gmail/messages/export?query=label:work&format=metadata&cursor=...&limit=5000
+    Each line is a parsed message plus a 'cursor'; pass the last cursor received
+    to resume after it (null on the final message). A failure mid-stream ends
+    with an {"error", "cursor"} line.
+    """
+    try:
+        query = request.args.get('query', '')
+        message_format = request.args.get('format', 'metadata')
+        fields = request.args.get('fields')
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit', type=int)
+        decode_cursor(cursor)
+
+        gmail = get_gmail_service()
+        messages = gmail.iter_messages(query=query, format=message_format, fields=fields,
+                                       cursor=cursor, limit=limit)
+        # Pull the first page up front so auth and listing errors still get a status code
+        first = next(messages, None)
+
+    except ValueError as e:
+        return jsonify({
+            'ok': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'ok': False,
+            'error': str(e)
+        }), 500
+
+    def lines():
+        resume = cursor
+        try:
+            for message, resume in chain([first] if first else [], messages):
+                yield dict(message, cursor=resume)
+        except Exception as e:
+            yield {'error': str(e), 'cursor': resume}
+
+    return ndjson_response(lines())
+
+
+@gmail_bp.route('/messages/<message_id:message_id>', methods=['GET'])
+def get_message(message_id):
+    """
+    Get a single message, e.g. the body behind a metadata listing
+    GET /api/gmail/messages/<message_id>?format=full
+    """
+    try:
+        gmail = get_gmail_service()
+        message = gmail.get_message(message_id,
+                                    format=request.args.get('format', 'full'),
+                                    fields=request.args.get('fields'))
+
+        if message is None:
+            return jsonify({
+                'ok': False,
+                'error': 'Message not found'
+            }), 404
+
+        return jsonify({
+            'ok': True,
+            'message': message
+        })
+
+    except ValueError as e:
+        return jsonify({
+            'ok': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'ok': False,
@@ -132,13 +274,16 @@ def search_messages():
 @gmail_bp.route('/messages/send', methods=['POST'])
 def send_message():
     """
-    Send an email via Gmail
+    Queue an email for sending via Gmail
     POST /api/gmail/messages/send
+    Headers: Idempotency-Key (optional; repeats return the first job)
     Body: {
         "to": "recipient@example.com",
         "subject": "Email subject",
         "body": "Email body text"
     }
+    Returns 202 with a job id to poll at /api/gmail/outbox/{job_id}
+    (200 and the sent message ids when the outbox is disabled).
     """
     try:
         data = request.get_json() or {}
@@ -155,6 +300,19 @@ def send_message():
             }), 400
 
         gmail = get_gmail_service()
+        if gmail.outbox is not None:
+            key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+            job, created = gmail.outbox.enqueue(
+                {'to': to, 'subject': subject, 'body': body, 'from': from_email}, key)
+            return jsonify({
+                'ok': True,
+                'queued': True,
+                'duplicate': not created,
+                'job': job,
+                'status_url': f"{gmail_bp.url_prefix}/outbox/{job['id']}",
+                'timestamp': datetime.now().isoformat()
+            }), 202 if created else 200
+
         result = gmail.send_email(
             to=to,
             subject=subject,
@@ -183,7 +341,36 @@ def send_message():
         }), 500
 
 
-@gmail_bp.route('/messages/<message_id>/read', methods=['POST'])
+@gmail_bp.route('/outbox/<job_id>', methods=['GET'])
+def outbox_job(job_id: str):
+    """
+    Status of a queued send
+    GET /api/gmail/outbox/{job_id}
+    status: queued | sending | sent (with message_id) | failed (with last_error)
+    """
+    try:
+        gmail = get_gmail_service()
+        job = gmail.outbox.get(job_id) if gmail.outbox is not None else None
+
+        if job is None:
+            return jsonify({
+                'ok': False,
+                'error': 'Job not found'
+            }), 404
+
+        return jsonify({
+            'ok': True,
+            'job': job
+        })
+
+    except Exception as e:
+        return jsonify({
+            'ok': False,
+            'error': str(e)
+        }), 500
+
+
+@gmail_bp.route('/messages/<message_id:message_id>/read', methods=['POST'])
 def mark_read(message_id: str):
     """
     Mark a message as read
@@ -206,7 +393,7 @@ def mark_read(message_id: str):
         }), 500
 
 
-@gmail_bp.route('/messages/<message_id>/archive', methods=['POST'])
+@gmail_bp.route('/messages/<message_id:message_id>/archive', methods=['POST'])
 def archive_message(message_id: str):
     """
     Archive a message
@@ -229,7 +416,7 @@ def archive_message(message_id: str):
         }), 500
 
 
-@gmail_bp.route('/messages/<message_id>/delete', methods=['DELETE'])
+@gmail_bp.route('/messages/<message_id:message_id>/delete', methods=['DELETE'])
 def delete_message(message_id: str):
     """
     Delete a message permanently
@@ -252,6 +439,91 @@ def delete_message(message_id: str):
         }), 500
 
 
+# Label changes the bulk endpoint accepts by name, like the single-message routes
+BULK_ACTIONS = {
+    'read': ([], ['UNREAD']),
+    'unread': (['UNREAD'], []),
+    'archive': ([], ['INBOX']),
+    'star': (['STARRED'], []),
+    'unstar': ([], ['STARRED']),
+    'trash': (['TRASH'], ['INBOX'])
+}
+
+
+@gmail_bp.route('/messages/bulk/modify', methods=['POST'])
+def bulk_modify():
+    """
+    Change labels on many messages (messages.batchModify, 1000 ids per call)
+    POST /api/gmail/messages/bulk/modify
+    Body: {
+        "ids": ["..."] or "query": "older_than:1y category:promotions",
+        "action": "read|unread|archive|star|unstar|trash"
+        or "add_labels": [...], "remove_labels": [...]
+    }
+    Returns 207 with per-chunk results if any chunk failed.
+    """
+    try:
+        data = request.get_json() or {}
+        action = data.get('action')
+        if action is not None and action not in BULK_ACTIONS:
+            raise ValueError(f"action must be one of {', '.join(BULK_ACTIONS)}")
+        add_labels, remove_labels = BULK_ACTIONS.get(
+            action, (data.get('add_labels', []), data.get('remove_labels', [])))
+
+        gmail = get_gmail_service()
+        result = gmail.bulk_modify(message_ids=data.get('ids'), query=data.get('query'),
+                                   add_labels=add_labels, remove_labels=remove_labels)
+
+        return jsonify({
+            'ok': result['failed'] == 0,
+            **result,
+            'timestamp': datetime.now().isoformat()
+        }), 200 if result['failed'] == 0 else 207
+
+    except ValueError as e:
+        return jsonify({
+            'ok': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'ok': False,
+            'error': str(e)
+        }), 500
+
+
+@gmail_bp.route('/messages/bulk/delete', methods=['POST'])
+def bulk_delete():
+    """
+    Move many messages to Trash (messages.batchModify, 1000 ids per call)
+    POST /api/gmail/messages/bulk/delete
+    Body: {"ids": ["..."]} or {"query": "in:spam"}
+    Returns 207 with per-chunk results if any chunk failed.
+    """
+    try:
+        data = request.get_json() or {}
+
+        gmail = get_gmail_service()
+        result = gmail.bulk_delete(message_ids=data.get('ids'), query=data.get('query'))
+
+        return jsonify({
+            'ok': result['failed'] == 0,
+            **result,
+            'timestamp': datetime.now().isoformat()
+        }), 200 if result['failed'] == 0 else 207
+
+    except ValueError as e:
+        return jsonify({
+            'ok': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'ok': False,
+            'error': str(e)
+        }), 500
+
+
 @gmail_bp.route('/labels', methods=['GET'])
 def get_labels():
     """
@@ -279,26 +551,24 @@ def get_labels():
 def get_stats():
     """
     Get Gmail statistics
-    GET /api/gmail/stats
+    GET /api/gmail/stats?max_age=60
+    max_age: accept counts from the local mailbox mirror if synced within this many
+             seconds (otherwise label counters cached for GMAIL_STATS_TTL are used)
     """
     try:
         gmail = get_gmail_service()
+        max_age = request.args.get('max_age', type=float)
 
-        # Get various message counts
-        unread = gmail.get_messages(query='is:unread', max_results=1)
-        starred = gmail.get_messages(query='is:starred', max_results=1)
-
-        profile = gmail.get_user_profile()
+        stats = gmail.get_stats_from_mirror(max_age) if max_age is not None else None
+        source = 'mirror' if stats is not None else 'api'
+        if stats is None:
+            # Label counters and the profile come back in a single batch request
+            stats = gmail.get_stats()
 
         return jsonify({
             'ok': True,
-            'stats': {
-                'email': profile.get('email', ''),
-                'total_messages': profile.get('messages_total', 0),
-                'total_threads': profile.get('threads_total', 0),
-                'unread_count': len(unread),
-                'starred_count': len(starred)
-            },
+            'stats': stats,
+            'source': source,
             'timestamp': datetime.now().isoformat()
         })
 
@@ -332,6 +602,11 @@ def health_check():
             'status': status,
             'credentials_file': os.path.exists(gmail.credentials_file),
             'token_file': os.path.exists(gmail.token_file),
+            'executor': gmail.executor.stats() if gmail.executor else None,
+            'cache': gmail.cache.stats() if gmail.cache else None,
+            'mirror': gmail.mirror.status() if gmail.mirror else None,
+            'search_index': gmail.search_index.stats() if gmail.search_index else None,
+            'outbox': gmail.outbox.stats() if gmail.outbox else None,
             'timestamp': datetime.now().isoformat()
         })
 
@@ -0,0 +1,257 @@
+"""
+Gmail Search Module
+Local full-text index (SQLite FTS5) over cached messages
+Translates the common Gmail search operators into an FTS5 MATCH plus SQL
+filters, ranks hits with bm25 and pages through them. Queries it cannot
+translate, or that the index does not fully cover yet, are left to the
+remote search.
+"""
+import os
+import re
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from gmail_cache import GMAIL_CACHE_FILE, SQLiteStore
+from gmail_mirror import LABEL_OPERATORS, MIRROR_SCHEMA
+
+
+GMAIL_INDEX_BACKFILL = int(os.getenv("GMAIL_INDEX_BACKFILL", "200"))
+
+SEARCH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    sent_at REAL,
+    has_attachment INTEGER,
+    full INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS search_docs_sent ON search_docs (sent_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+    subject, sender, recipients, snippet, body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Column weights for bm25: subject and addresses count more than body text
+BM25_WEIGHTS = (8.0, 4.0, 2.0, 1.5, 1.0)
+TEXT_OPERATORS = {'from': 'sender', 'to': 'recipients', 'subject': 'subject'}
+TOKEN = re.compile(r'(-?)(?:([A-Za-z_]+):)?("[^"]*"|\S+)')
+
+
+class UnsupportedQuery(ValueError):
+    """The query uses syntax the local index cannot answer"""
+
+
+def phrase(text: str) -> str:
+    """FTS5 string literal for a term or phrase"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def parse_date(value: str) -> float:
+    """Epoch seconds for a Gmail after:/before: value (YYYY/MM/DD, YYYY-MM-DD or epoch)"""
+    if value.isdigit():
+        return float(value)
+    for layout in ('%Y/%m/%d', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, layout).timestamp()
+        except ValueError:
+            continue
+    raise UnsupportedQuery(f"unrecognised date: {value}")
+
+
+def sent_at(date_header: str) -> Optional[float]:
+    """Epoch seconds of a Date header (None if it does not parse)"""
+    try:
+        return parsedate_to_datetime(date_header).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class Translation:
+    """A Gmail query split into an FTS5 expression and SQL filters"""
+
+    def __init__(self):
+        self.match: List[str] = []          # ANDed into one MATCH (ranked)
+        self.clauses: List[str] = []        # SQL conditions on search_docs d
+        self.params: List[Any] = []
+        self.labels: List[str] = []         # label ids the query filters on
+
+    @property
+    def expression(self) -> Optional[str]:
+        return " AND ".join(self.match) if self.match else None
+
+
+def translate(query: str, label_ids: Optional[Dict[str, str]] = None) -> Translation:
+    """
+    Translate Gmail search syntax for the local index
+
+    Supported: bare words and "quoted phrases", from:, to:, subject:,
+    after:, before:, has:attachment, is:/in:/label: label operators, and
+    a leading '-' on any of them. Anything else raises UnsupportedQuery.
+    """
+    if re.search(r'[{}()]|\bOR\b|\bAND\b', query):
+        raise UnsupportedQuery("grouping and boolean operators are not supported locally")
+
+    translation = Translation()
+    for negate, operator, value in TOKEN.findall(query):
+        negate = bool(negate)
+        operator = operator.lower()
+        unquoted = value[1:-1] if value.startswith('"') and value.endswith('"') else value
+        if not unquoted:
+            continue
+
+        if not operator or operator in TEXT_OPERATORS:
+            column = TEXT_OPERATORS.get(operator)
+            term = f"{column} : {phrase(unquoted)}" if column else phrase(unquoted)
+            if negate:
+                translation.clauses.append(
+                    "d.rowid NOT IN (SELECT rowid FROM search_fts WHERE search_fts MATCH ?)")
+                translation.params.append(term)
+            else:
+                translation.match.append(term)
+        elif operator in ('after', 'before'):
+            comparison = '>=' if (operator == 'after') != negate else '<'
+            translation.clauses.append(f"d.sent_at {comparison} ?")
+            translation.params.append(parse_date(unquoted))
+        elif (operator, unquoted.lower()) == ('has', 'attachment'):
+            translation.clauses.append(f"d.has_attachment = {0 if negate else 1}")
+        elif operator in ('is', 'in', 'label'):
+            key = (operator, unquoted.lower())
+            if key == ('is', 'read'):
+                label, negate = 'UNREAD', not negate
+            elif key in LABEL_OPERATORS:
+                label = LABEL_OPERATORS[key]
+            elif operator == 'label' and label_ids and key[1] in label_ids:
+                label = label_ids[key[1]]
+            else:
+                raise UnsupportedQuery(f"unsupported operator: {operator}:{unquoted}")
+            translation.labels.append(label)
+            translation.clauses.append(
+                f"{'NOT ' if negate else ''}EXISTS (SELECT 1 FROM mirror_labels l "
+                f"WHERE l.message_id = d.id AND l.label = ?)")
+            translation.params.append(label)
+        else:
+            raise UnsupportedQuery(f"unsupported operator: {operator}:")
+    return translation
+
+
+class SearchIndex(SQLiteStore):
+    """
+    FTS5 index of messages, fed by the message cache
+
+    It shares the SQLite file with the mailbox mirror, which defines the
+    set of messages a complete index has to cover.
+    """
+
+    SCHEMA = MIRROR_SCHEMA + SEARCH_SCHEMA
+
+    def __init__(self, path: str = GMAIL_CACHE_FILE):
+        super().__init__(path)
+        self.searches = 0
+        self.search_seconds = 0.0
+
+    def add(self, messages: Iterable[Dict[str, Any]], format: str):
+        """Index parsed messages (metadata or full); full never gets downgraded"""
+        full = 1 if format == 'full' else 0
+        rows = [m for m in messages if format != 'minimal']
+        if not rows:
+            return
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for message in rows:
+                existing = conn.execute("SELECT rowid, full FROM search_docs WHERE id = ?",
+                                        (message['id'],)).fetchone()
+                if existing is not None:
+                    if existing[1] > full:
+                        continue
+                    conn.execute("DELETE FROM search_fts WHERE rowid = ?", (existing[0],))
+                    conn.execute("DELETE FROM search_docs WHERE rowid = ?", (existing[0],))
+                cursor = conn.execute(
+                    "INSERT INTO search_docs (id, sent_at, has_attachment, full) VALUES (?, ?, ?, ?)",
+                    (message['id'], sent_at(message.get('date', '')),
+                     int(message['has_attachment']) if 'has_attachment' in message else None, full)
+                )
+                conn.execute(
+                    "INSERT INTO search_fts (rowid, subject, sender, recipients, snippet, body) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (cursor.lastrowid, message.get('subject', ''), message.get('from', ''),
+                     message.get('to', ''), message.get('snippet', ''), message.get('body', ''))
+                )
+
+    def remove(self, message_ids: Iterable[str]):
+        """Drop deleted messages from the index"""
+        rows = [(message_id,) for message_id in message_ids]
+        if not rows:
+            return
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("DELETE FROM search_fts WHERE rowid IN "
+                             "(SELECT rowid FROM search_docs WHERE id = ?)", rows)
+            conn.executemany("DELETE FROM search_docs WHERE id = ?", rows)
+
+    def unindexed(self, limit: int = GMAIL_INDEX_BACKFILL) -> List[str]:
+        """Newest mirrored messages (outside spam/trash) without a full index entry"""
+        return [row[0] for row in self._connection().execute(
+            "SELECT m.id FROM mirror_messages m WHERE NOT EXISTS "
+            "(SELECT 1 FROM search_docs d WHERE d.id = m.id AND d.full = 1) "
+            "AND NOT EXISTS (SELECT 1 FROM mirror_labels l WHERE l.message_id = m.id "
+            "AND l.label IN ('SPAM', 'TRASH')) ORDER BY m.internal_date DESC LIMIT ?", (limit,)
+        )]
+
+    def search(self, translation: Translation, limit: int = 20, offset: int = 0,
+               order: str = 'relevance') -> Tuple[List[str], bool]:
+        """
+        Run a translated query
+
+        Returns:
+            (message ids for this page, whether more hits follow)
+        """
+        started = time.perf_counter()
+        # Only mirrored messages: their labels are known, and the mirror
+        # defines the mailbox a complete index answers for
+        clauses = ["EXISTS (SELECT 1 FROM mirror_messages m WHERE m.id = d.id)"]
+        clauses += translation.clauses
+        params = list(translation.params)
+        # Like messages.list, leave spam and trash out unless asked for
+        if not {'SPAM', 'TRASH'} & set(translation.labels):
+            clauses.append("NOT EXISTS (SELECT 1 FROM mirror_labels l WHERE l.message_id = d.id "
+                           "AND l.label IN ('SPAM', 'TRASH'))")
+
+        expression = translation.expression
+        if expression:
+            sql = ("SELECT d.id FROM search_fts JOIN search_docs d ON d.rowid = search_fts.rowid "
+                   "WHERE search_fts MATCH ?")
+            params.insert(0, expression)
+        else:
+            sql = "SELECT d.id FROM search_docs d WHERE 1"
+        for clause in clauses:
+            sql += " AND " + clause
+        if expression and order == 'relevance':
+            weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+            sql += f" ORDER BY bm25(search_fts, {weights}), d.sent_at DESC"
+        else:
+            sql += " ORDER BY d.sent_at DESC"
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit + 1, offset]
+
+        ids = [row[0] for row in self._connection().execute(sql, params)]
+        with self._lock:
+            self.searches += 1
+            self.search_seconds += time.perf_counter() - started
+        return ids[:limit], len(ids) > limit
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connection()
+        documents, full = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(full), 0) FROM search_docs").fetchone()
+        with self._lock:
+            return {
+                'documents': documents,
+                'with_body': full,
+                'searches': self.searches,
+                'avg_ms': round(self.search_seconds / self.searches * 1000, 2) if self.searches else 0.0
+            }
@@ -8,16 +8,83 @@ import base64
 import json
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime
 import pickle
+import threading
+import time
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+# The auth flow and discovery client are imported in authenticate(); most
+# requests never reach them and they dominate import time
 from googleapiclient.errors import HttpError
 
+from gmail_batch import GMAIL_BATCH_SIZE, error_status, execute_batch
+from gmail_bulk import run_chunks
+from gmail_cache import GMAIL_CACHE_FILE, MessageCache
+from gmail_executor import FetchExecutor, QuotaBucket, service_factory_for
+from gmail_mirror import MailboxMirror
+from gmail_outbox import GMAIL_OUTBOX_FILE, Outbox
+from gmail_search import GMAIL_INDEX_BACKFILL, SearchIndex, UnsupportedQuery, translate
+from metrics import GMAIL_CALLS, GMAIL_LATENCY
+
+
+# Seconds a stats snapshot is reused before the counters are fetched again
+GMAIL_STATS_TTL = float(os.getenv("GMAIL_STATS_TTL", "30"))
+# System labels whose counters make up the stats
+STATS_LABELS = ('INBOX', 'UNREAD', 'STARRED')
+
+# Largest page messages.list returns
+GMAIL_PAGE_SIZE = 500
+
+# Message formats from cheapest to most complete
+MESSAGE_FORMATS = ('minimal', 'metadata', 'full')
+# Headers requested for metadata listings
+METADATA_HEADERS = ['Subject', 'From', 'To', 'Date']
+# Partial-response masks that cover exactly what _parse_message reads
+DEFAULT_FIELDS = {
+    'minimal': 'id,threadId,labelIds,snippet',
+    'metadata': 'id,threadId,labelIds,snippet,payload/headers',
+    'full': None
+}
+
+
+def check_format(format: str):
+    """Raise ValueError for an unknown message format"""
+    if format not in MESSAGE_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(MESSAGE_FORMATS)}")
+
+
+def field_mask(format: str, fields: Optional[str] = None) -> Optional[str]:
+    """Mask to send with messages.get (always keeps the message id)"""
+    if not fields:
+        return DEFAULT_FIELDS[format]
+    names = [f.strip() for f in fields.split(',') if f.strip()]
+    if 'id' not in names:
+        names.insert(0, 'id')
+    return ','.join(names)
+
+
+def encode_cursor(offset: int, page_token: Optional[str]) -> str:
+    """Export cursor: position `offset` within the page that `page_token` starts"""
+    return f"{offset}:{page_token or ''}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[int, Optional[str]]:
+    """(offset, page_token) of an export cursor; ValueError if malformed"""
+    if not cursor:
+        return 0, None
+    offset, sep, page_token = cursor.partition(':')
+    if not sep or not offset.isdigit():
+        raise ValueError(f"invalid cursor: {cursor}")
+    return int(offset), page_token or None
+
+
+def has_attachment(part: Dict[str, Any]) -> bool:
+    """True if any MIME part of a full payload is a named attachment"""
+    if part.get('filename'):
+        return True
+    return any(has_attachment(child) for child in part.get('parts', []))
+
 
 # Gmail API scopes
 SCOPES = [
@@ -31,18 +98,37 @@ SCOPES = [
 class GmailService:
     """Gmail API service wrapper"""
 
-    def __init__(self, credentials_file: str = 'credentials.json', token_file: str = 'token.pickle'):
+    def __init__(self, credentials_file: str = 'credentials.json', token_file: str = 'token.pickle',
+                 cache_file: Optional[str] = GMAIL_CACHE_FILE,
+                 outbox_file: Optional[str] = GMAIL_OUTBOX_FILE):
         """
         Initialize Gmail service
 
         Args:
             credentials_file: Path to OAuth2 credentials JSON file
             token_file: Path to store OAuth2 token
+            cache_file: SQLite file for the message cache, mailbox mirror and
+                search index (empty or None disables all three)
+            outbox_file: SQLite file for the outbound mail queue (empty or
+                None sends synchronously)
         """
         self.credentials_file = credentials_file
         self.token_file = token_file
         self.service = None
         self.creds = None
+        self.executor: Optional[FetchExecutor] = None
+        # One quota budget for the fetch executor and bulk operations
+        self.quota = QuotaBucket()
+        self.cache = MessageCache(cache_file) if cache_file else None
+        self.mirror = MailboxMirror(self, cache_file) if cache_file else None
+        self.search_index = SearchIndex(cache_file) if cache_file else None
+        if self.mirror is not None:
+            self.mirror.after_sync = self.backfill_search_index
+        self.outbox = Outbox(self, outbox_file) if outbox_file else None
+        self.stats_ttl = GMAIL_STATS_TTL
+        self._stats: Optional[Dict[str, Any]] = None
+        self._stats_fetched = 0.0
+        self._stats_lock = threading.Lock()
 
     def authenticate(self) -> bool:
         """
@@ -51,6 +137,10 @@ class GmailService:
         Returns:
             True if authentication successful, False otherwise
         """
+        from google.auth.transport.requests import Request
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        from googleapiclient.discovery import build
+
         try:
             # Load existing token if available
             if os.path.exists(self.token_file):
@@ -77,83 +167,428 @@ class GmailService:
 
             # Build Gmail service
             self.service = build('gmail', 'v1', credentials=self.creds)
+            # Worker threads get their own clients around the same credentials
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.executor = FetchExecutor(service_factory_for(self.creds), quota=self.quota)
             return True
 
         except Exception as e:
             print(f"Authentication error: {e}")
             return False
 
-    def get_messages(self, query: str = '', max_results: int = 10) -> List[Dict[str, Any]]:
+    def _execute(self, method: str, api_request):
+        """Execute an API request, recording call count and latency per method"""
+        started = time.perf_counter()
+        outcome = 'ok'
+        try:
+            return api_request.execute()
+        except HttpError as error:
+            outcome = str(error.resp.status)
+            raise
+        finally:
+            GMAIL_CALLS.inc(method=method, outcome=outcome)
+            GMAIL_LATENCY.observe(time.perf_counter() - started, method=method)
+
+    def get_messages(self, query: str = '', max_results: int = 10, format: str = 'full',
+                     fields: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get messages from Gmail inbox
 
         Args:
             query: Gmail search query (e.g., 'is:unread', 'from:example@gmail.com')
             max_results: Maximum number of messages to retrieve
+            format: 'minimal' (ids, labels, snippet), 'metadata' (adds subject,
+                from, to, date) or 'full' (adds the decoded body)
+            fields: Optional Gmail partial-response mask for each message
+                (e.g. 'id,labelIds,payload/headers')
 
         Returns:
             List of message dictionaries
         """
+        check_format(format)
         if not self.service:
             if not self.authenticate():
                 return []
 
         try:
-            results = self.service.users().messages().list(
-                userId='me',
-                q=query,
-                maxResults=max_results
-            ).execute()
+            ids = []
+            for page_ids, _, _ in self.iter_message_pages(query, limit=max_results):
+                ids.extend(page_ids)
+            return self.get_messages_by_id(ids[:max_results], format=format, fields=fields)
+
+        except HttpError as error:
+            print(f'An error occurred: {error}')
+            return []
 
-            messages = results.get('messages', [])
-            detailed_messages = []
+    def iter_message_pages(self, query: str = '', page_token: Optional[str] = None,
+                           page_size: Optional[int] = None, limit: Optional[int] = None
+                           ) -> Iterator[Tuple[List[str], Optional[str], Optional[str]]]:
+        """
+        Walk messages.list lazily, one page per iteration
 
-            for msg in messages:
-                msg_data = self.service.users().messages().get(
-                    userId='me',
-                    id=msg['id'],
-                    format='full'
-                ).execute()
+        Yields:
+            (message ids, token of this page, token of the next page); the
+            first page's token is `page_token` (None for the start). Stops
+            after the last page or once `limit` ids have been listed.
+        """
+        page_size = page_size or GMAIL_PAGE_SIZE
+        remaining = limit
+        while True:
+            size = page_size if remaining is None else min(page_size, remaining)
+            kwargs = {'userId': 'me', 'q': query, 'maxResults': size,
+                      'fields': 'messages/id,nextPageToken,resultSizeEstimate'}
+            if page_token:
+                kwargs['pageToken'] = page_token
+            results = self._execute('messages.list', self.thread_service().users().messages().list(**kwargs))
+            ids = [msg['id'] for msg in results.get('messages', [])]
+            next_page_token = results.get('nextPageToken')
+            yield ids, page_token, next_page_token
+
+            if remaining is not None:
+                remaining -= len(ids)
+                if remaining <= 0:
+                    return
+            if not ids or not next_page_token:
+                return
+            page_token = next_page_token
+
+    def iter_messages(self, query: str = '', format: str = 'full', fields: Optional[str] = None,
+                      cursor: Optional[str] = None, limit: Optional[int] = None
+                      ) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+        """
+        Stream parsed messages matching `query`, page by page
 
-                detailed_messages.append(self._parse_message(msg_data))
+        Only one page of ids and one chunk of messages (GMAIL_BATCH_SIZE per
+        executor worker) are held at a time, so memory stays flat however
+        large the result set.
 
-            return detailed_messages
+        Yields:
+            (message, cursor): passing `cursor` back resumes right after
+            that message; it is None after the last message. Messages that
+            fail to fetch are skipped.
+        """
+        check_format(format)
+        offset, page_token = decode_cursor(cursor)
+        if not self.service:
+            if not self.authenticate():
+                return
+
+        workers = self.executor.max_workers if self.executor else 1
+        chunk_size = GMAIL_BATCH_SIZE * workers
+        sent = 0
+        for ids, token, next_page_token in self.iter_message_pages(query, page_token):
+            for start in range(offset, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                if limit is not None:
+                    chunk = chunk[:limit - sent]
+                positions = {message_id: start + i for i, message_id in enumerate(chunk)}
+                for message in self.get_messages_by_id(chunk, format=format, fields=fields):
+                    following = positions[message['id']] + 1
+                    if following < len(ids):
+                        resume = encode_cursor(following, token)
+                    else:
+                        resume = encode_cursor(0, next_page_token) if next_page_token else None
+                    yield message, resume
+                    sent += 1
+                if limit is not None and sent >= limit:
+                    return
+            offset = 0
+
+    def _get_request(self, service, message_id: str, format: str, fields: Optional[str]):
+        """Unexecuted messages.get for one id in the given format and mask"""
+        kwargs = {'userId': 'me', 'id': message_id, 'format': format}
+        if format == 'metadata':
+            kwargs['metadataHeaders'] = METADATA_HEADERS
+        mask = field_mask(format, fields)
+        if mask:
+            kwargs['fields'] = mask
+        return service.users().messages().get(**kwargs)
+
+    def _mirror_ready(self, max_age: float) -> bool:
+        """
+        True if the mirror is at most `max_age` seconds old (syncing it if needed)
 
-        except HttpError as error:
-            print(f'An error occurred: {error}')
+        The first call starts the background sync loop; until its full sync
+        finishes, callers fall back to the API.
+        """
+        if self.mirror is None:
+            return False
+        if not self.service:
+            if not self.authenticate():
+                return False
+        self.mirror.start()
+        age = self.mirror.age()
+        if age is None:
+            return False
+        if age > max_age:
+            try:
+                self.mirror.sync()
+            except Exception as error:
+                print(f'Mirror sync failed: {error}')
+                return False
+        return True
+
+    def get_messages_from_mirror(self, query: str = '', max_results: int = 10,
+                                 format: str = 'full', max_age: float = 60
+                                 ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Answer a listing from the mailbox mirror instead of messages.list
+
+        Args:
+            max_age: Oldest mirror state (seconds) the caller accepts
+
+        Returns:
+            Messages as get_messages returns them, or None when the mirror
+            cannot answer (not synced yet, or a query that is not label-only)
+        """
+        check_format(format)
+        if not self._mirror_ready(max_age):
+            return None
+        found = self.mirror.query(query, max_results)
+        if found is None:
+            return None
+        ids, labels = found
+        if self.cache is not None:
+            # The mirror's labels are as fresh as the caller asked for
+            self.cache.store_labels(labels)
+        return self.get_messages_by_id(ids, format=format)
+
+    def get_stats_from_mirror(self, max_age: float = 60) -> Optional[Dict[str, Any]]:
+        """Stats from the mirror (None if it is unavailable or partial)"""
+        if not self._mirror_ready(max_age):
+            return None
+        return self.mirror.stats()
+
+    def get_messages_by_id(self, message_ids: List[str], format: str = 'full',
+                           fields: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch and parse messages by id, serving what it can from the cache
+
+        Cached content is reused as is; only its label state is refetched
+        (as a minimal batch) once it is older than the cache's label TTL.
+        Requests with a custom `fields` mask bypass the cache. Messages that
+        still fail after retries are left out (and logged); the rest keep
+        the order of `message_ids`.
+        """
+        check_format(format)
+        if not message_ids:
             return []
+        if not self.service:
+            if not self.authenticate():
+                return []
+
+        use_cache = self.cache is not None and not fields
+        if use_cache:
+            found, stale, missing = self.cache.lookup(message_ids, format)
+        else:
+            found, stale, missing = {}, [], list(message_ids)
+
+        fetched, _ = self._fetch_parsed(missing, format, fields)
+        if use_cache:
+            self.remember(fetched.values(), format)
+        found.update(fetched)
+
+        if stale:
+            current, gone = self._fetch_parsed(stale, 'minimal', 'id,labelIds')
+            self.cache.store_labels({i: message['labels'] for i, message in current.items()})
+            self.forget(gone)
+            for message_id in stale:
+                if message_id in current:
+                    found[message_id]['labels'] = current[message_id]['labels']
+                else:
+                    found.pop(message_id, None)
+
+        return [found[message_id] for message_id in message_ids if message_id in found]
+
+    def remember(self, messages, format: str):
+        """Store freshly fetched messages in the cache and search index"""
+        messages = list(messages)
+        if self.cache is not None:
+            self.cache.store(messages, format)
+        if self.search_index is not None:
+            self.search_index.add(messages, format)
+
+    def forget(self, message_ids):
+        """Drop messages that no longer exist from every local store"""
+        message_ids = list(message_ids)
+        if self.cache is not None:
+            self.cache.discard(message_ids)
+        if self.search_index is not None:
+            self.search_index.remove(message_ids)
+
+    def backfill_search_index(self, limit: int = GMAIL_INDEX_BACKFILL) -> int:
+        """
+        Index (with bodies) up to `limit` mirrored messages not indexed yet
+
+        Runs after every mirror sync, newest messages first, until the index
+        covers the mirror and local search can take over.
+        """
+        if self.search_index is None:
+            return 0
+        message_ids = self.search_index.unindexed(limit)
+        messages = self.get_messages_by_id(message_ids, format='full')
+        # Cache hits were stored before the index existed; index them too
+        self.search_index.add(messages, 'full')
+        return len(messages)
+
+    def search_local(self, query: str, max_results: int = 20, page_token: Optional[str] = None,
+                     format: str = 'full', max_age: float = 60, order: str = 'relevance'):
+        """
+        Search the local full-text index instead of Gmail
 
-    def _parse_message(self, msg_data: Dict) -> Dict[str, Any]:
+        Args:
+            page_token: Token from a previous page (None for the first)
+            max_age: Oldest mirror state (seconds) the caller accepts
+            order: 'relevance' (bm25) or 'date'
+
+        Returns:
+            (messages, next_page_token) or None when the query has to go to
+            Gmail: unsupported operators, no fresh or only a partial mirror,
+            or an index that does not cover every mirrored message yet
+        """
+        check_format(format)
+        if order not in ('relevance', 'date'):
+            raise ValueError("order must be 'relevance' or 'date'")
+        if self.search_index is None or not self._mirror_ready(max_age):
+            return None
+        try:
+            translation = translate(query, self.mirror.label_ids())
+        except UnsupportedQuery as error:
+            print(f'Searching Gmail instead: {error}')
+            return None
+        # A mirror capped at GMAIL_MIRROR_MAX_MESSAGES would truncate results
+        if not self.mirror.complete() or self.search_index.unindexed(1):
+            return None
+
+        offset = int(page_token or 0)
+        ids, more = self.search_index.search(translation, limit=max_results, offset=offset, order=order)
+        found = self.mirror.labels_for(ids)
+        if self.cache is not None:
+            self.cache.store_labels(found)
+        messages = self.get_messages_by_id(ids, format=format)
+        return messages, (str(offset + max_results) if more else None)
+
+    def thread_service(self):
+        """
+        Gmail service safe to use from the calling thread
+
+        httplib2 is not thread safe, so every call on a request or worker
+        thread goes through the executor's per-thread clients; the shared
+        `self.service` is only used before an executor exists.
+        """
+        return self.executor.service() if self.executor is not None else self.service
+
+    def fetch_raw(self, message_ids: List[str], format: str, fields: Optional[str] = None):
+        """
+        Batch-fetch messages from the API without parsing them
+
+        Returns:
+            (API message resources by id, ids that no longer exist)
+        """
+        if not message_ids:
+            return {}, []
+
+        def build(service, message_id):
+            return self._get_request(service, message_id, format, fields)
+
+        if self.executor is not None:
+            # Batches go out in parallel, each on its thread's own client
+            fetched = self.executor.map_batches('messages.get', build, message_ids)
+        else:
+            service = self.thread_service()
+            fetched = execute_batch(
+                service, message_ids,
+                lambda message_id: build(service, message_id),
+                method='messages.get'
+            )
+        gone = []
+        for message_id, error in fetched.errors.items():
+            if error_status(error) == 404:
+                gone.append(message_id)
+            else:
+                print(f'Error fetching message {message_id}: {error}')
+        return fetched.results, gone
+
+    def _fetch_parsed(self, message_ids: List[str], format: str, fields: Optional[str]):
+        """Batch-fetch and parse messages: (parsed by id, ids that no longer exist)"""
+        results, gone = self.fetch_raw(message_ids, format, fields)
+        parsed = {message_id: self._parse_message(msg_data, format)
+                  for message_id, msg_data in results.items()}
+        return parsed, gone
+
+    def get_message(self, message_id: str, format: str = 'full',
+                    fields: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a single message (e.g. the body behind a metadata listing)
+
+        Returns:
+            Parsed message, or None if it does not exist
+
+        Raises:
+            HttpError: For API errors other than 404
+        """
+        check_format(format)
+        use_cache = self.cache is not None and not fields
+        if use_cache:
+            found, stale, _ = self.cache.lookup([message_id], format)
+            if message_id in found and not stale:
+                return found[message_id]
+        if not self.service:
+            if not self.authenticate():
+                return None
+
+        try:
+            msg_data = self._execute('messages.get',
+                                     self._get_request(self.thread_service(), message_id,
+                                                       format, fields))
+        except HttpError as error:
+            if error.resp.status == 404:
+                if use_cache:
+                    self.forget([message_id])
+                return None
+            raise
+        message = self._parse_message(msg_data, format)
+        if use_cache:
+            self.remember([message], format)
+        return message
+
+    def _parse_message(self, msg_data: Dict, format: str = 'full') -> Dict[str, Any]:
         """Parse Gmail message data into a readable format"""
-        headers = msg_data['payload']['headers']
+        message = {
+            'id': msg_data.get('id'),
+            'threadId': msg_data.get('threadId'),
+            'snippet': msg_data.get('snippet', ''),
+            'labels': msg_data.get('labelIds', [])
+        }
+        if format == 'minimal':
+            return message
+
+        payload = msg_data.get('payload', {})
+        headers = payload.get('headers', [])
 
         subject = next((h['value'] for h in headers if h['name'].lower() == 'subject'), 'No Subject')
         sender = next((h['value'] for h in headers if h['name'].lower() == 'from'), 'Unknown')
         date = next((h['value'] for h in headers if h['name'].lower() == 'date'), '')
         to = next((h['value'] for h in headers if h['name'].lower() == 'to'), '')
+        message.update({'subject': subject, 'from': sender, 'to': to, 'date': date})
+        if format == 'metadata':
+            return message
 
         # Get message body
         body = ''
-        if 'parts' in msg_data['payload']:
-            for part in msg_data['payload']['parts']:
+        if 'parts' in payload:
+            for part in payload['parts']:
                 if part['mimeType'] == 'text/plain':
                     if 'data' in part['body']:
                         body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
                         break
-        elif 'body' in msg_data['payload'] and 'data' in msg_data['payload']['body']:
-            body = base64.urlsafe_b64decode(msg_data['payload']['body']['data']).decode('utf-8')
-
-        return {
-            'id': msg_data['id'],
-            'threadId': msg_data['threadId'],
-            'subject': subject,
-            'from': sender,
-            'to': to,
-            'date': date,
-            'body': body,
-            'snippet': msg_data.get('snippet', ''),
-            'labels': msg_data.get('labelIds', [])
-        }
+        elif 'body' in payload and 'data' in payload['body']:
+            body = base64.urlsafe_b64decode(payload['body']['data']).decode('utf-8')
+
+        message['body'] = body
+        message['has_attachment'] = has_attachment(payload)
+        return message
 
     def send_email(self, to: str, subject: str, body: str,
                    from_email: Optional[str] = None) -> Dict[str, Any]:
@@ -174,18 +609,8 @@ class GmailService:
                 return {'success': False, 'error': 'Authentication failed'}
 
         try:
-            message = MIMEText(body)
-            message['to'] = to
-            message['subject'] = subject
-            if from_email:
-                message['from'] = from_email
-
-            raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
-
-            send_result = self.service.users().messages().send(
-                userId='me',
-                body={'raw': raw_message}
-            ).execute()
+            send_result = self.deliver({'to': to, 'subject': subject, 'body': body,
+                                        'from': from_email})
 
             return {
                 'success': True,
@@ -196,6 +621,33 @@ class GmailService:
         except HttpError as error:
             return {'success': False, 'error': str(error)}
 
+    def deliver(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a message dict ({'to', 'subject', 'body', 'from'}) through messages.send
+
+        Raises HttpError on failure (the outbox decides whether to retry).
+
+        Returns:
+            The sent message resource (id, threadId, labelIds)
+        """
+        if not self.service:
+            if not self.authenticate():
+                raise RuntimeError('Authentication failed')
+
+        mime = MIMEText(message['body'])
+        mime['to'] = message['to']
+        mime['subject'] = message['subject']
+        if message.get('from'):
+            mime['from'] = message['from']
+        raw_message = base64.urlsafe_b64encode(mime.as_bytes()).decode('utf-8')
+
+        result = self._execute('messages.send', self.thread_service().users().messages().send(
+            userId='me',
+            body={'raw': raw_message}
+        ))
+        self.invalidate_stats()
+        return result
+
     def mark_as_read(self, message_id: str) -> bool:
         """Mark a message as read"""
         if not self.service:
@@ -203,11 +655,14 @@ class GmailService:
                 return False
 
         try:
-            self.service.users().messages().modify(
+            self._execute('messages.modify', self.thread_service().users().messages().modify(
                 userId='me',
                 id=message_id,
                 body={'removeLabelIds': ['UNREAD']}
-            ).execute()
+            ))
+            if self.cache is not None:
+                self.cache.invalidate_labels([message_id])
+            self.invalidate_stats()
             return True
         except HttpError as error:
             print(f'Error marking message as read: {error}')
@@ -220,11 +675,14 @@ class GmailService:
                 return False
 
         try:
-            self.service.users().messages().modify(
+            self._execute('messages.modify', self.thread_service().users().messages().modify(
                 userId='me',
                 id=message_id,
                 body={'removeLabelIds': ['INBOX']}
-            ).execute()
+            ))
+            if self.cache is not None:
+                self.cache.invalidate_labels([message_id])
+            self.invalidate_stats()
             return True
         except HttpError as error:
             print(f'Error archiving message: {error}')
@@ -237,15 +695,79 @@ class GmailService:
                 return False
 
         try:
-            self.service.users().messages().delete(
+            self._execute('messages.delete', self.thread_service().users().messages().delete(
                 userId='me',
                 id=message_id
-            ).execute()
+            ))
+            self.forget([message_id])
+            self.invalidate_stats()
             return True
         except HttpError as error:
             print(f'Error deleting message: {error}')
             return False
 
+    def _bulk_ids(self, message_ids: Optional[List[str]], query: Optional[str]) -> List[str]:
+        """Ids a bulk operation applies to: the given list or every match of `query`"""
+        if (message_ids is None) == (not query):
+            raise ValueError("give either ids or a non-empty query")
+        if message_ids is not None:
+            return list(message_ids)
+        # List everything before changing anything: modifying the matches
+        # while paging would shift the pages under us
+        ids = []
+        for page_ids, _, _ in self.iter_message_pages(query):
+            ids.extend(page_ids)
+        return ids
+
+    def bulk_modify(self, message_ids: Optional[List[str]] = None, query: Optional[str] = None,
+                    add_labels: Optional[List[str]] = None,
+                    remove_labels: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Add/remove labels on many messages through messages.batchModify
+
+        Args:
+            message_ids: Messages to change (or give `query` instead)
+            query: Gmail search query selecting the messages
+            add_labels: Label ids to add (e.g. ['STARRED'])
+            remove_labels: Label ids to remove (e.g. ['UNREAD', 'INBOX'])
+
+        Returns:
+            Counts and per-chunk results (see gmail_bulk.run_chunks)
+        """
+        if not add_labels and not remove_labels:
+            raise ValueError("add_labels or remove_labels is required")
+        if not self.service:
+            if not self.authenticate():
+                raise RuntimeError("Not authenticated")
+
+        ids = self._bulk_ids(message_ids, query)
+        body = {'addLabelIds': list(add_labels or []), 'removeLabelIds': list(remove_labels or [])}
+        messages = self.thread_service().users().messages()
+
+        def changed(chunk):
+            if self.cache is not None:
+                self.cache.invalidate_labels(chunk)
+
+        result = run_chunks(
+            ids, lambda chunk: messages.batchModify(userId='me', body=dict(body, ids=chunk)),
+            'messages.batchModify', self.quota, on_success=changed)
+        self.invalidate_stats()
+        return result
+
+    def bulk_delete(self, message_ids: Optional[List[str]] = None,
+                    query: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Move many messages to Trash (batchModify adding TRASH)
+
+        messages.batchDelete would need the full https://mail.google.com/
+        scope; trashing works with gmail.modify, and Gmail purges Trash
+        after 30 days.
+
+        Returns:
+            Counts and per-chunk results (see gmail_bulk.run_chunks)
+        """
+        return self.bulk_modify(message_ids, query, add_labels=['TRASH'])
+
     def get_labels(self) -> List[Dict[str, str]]:
         """Get all Gmail labels"""
         if not self.service:
@@ -253,14 +775,15 @@ class GmailService:
                 return []
 
         try:
-            results = self.service.users().labels().list(userId='me').execute()
+            results = self._execute('labels.list', self.thread_service().users().labels().list(userId='me'))
             labels = results.get('labels', [])
             return [{'id': label['id'], 'name': label['name']} for label in labels]
         except HttpError as error:
             print(f'Error fetching labels: {error}')
             return []
 
-    def search_messages(self, query: str, max_results: int = 50) -> List[Dict[str, Any]]:
+    def search_messages(self, query: str, max_results: int = 50, format: str = 'full',
+                        fields: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Search messages with advanced Gmail query
 
@@ -270,8 +793,67 @@ class GmailService:
             - 'subject:important' - Subject contains 'important'
             - 'has:attachment' - Messages with attachments
             - 'after:2024/01/01' - Messages after date
+
+        `format` and `fields` work as in get_messages.
+        """
+        return self.get_messages(query=query, max_results=max_results, format=format, fields=fields)
+
+    def get_stats(self, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Mailbox counts from the INBOX, UNREAD and STARRED label counters
+
+        The labels.get calls and the profile go out as one batch request
+        (4 quota units), and the result is reused for `max_age` seconds
+        (default: the service's stats_ttl). Local modifies and deletes
+        drop the cached snapshot.
+
+        Returns:
+            Dictionary of counts (empty if authentication failed)
         """
-        return self.get_messages(query=query, max_results=max_results)
+        max_age = self.stats_ttl if max_age is None else max_age
+        with self._stats_lock:
+            if self._stats is not None and time.time() - self._stats_fetched <= max_age:
+                return dict(self._stats)
+
+        if not self.service:
+            if not self.authenticate():
+                return {}
+
+        service = self.thread_service()
+        users = service.users()
+        keys = ['profile', *STATS_LABELS]
+
+        def build(key):
+            if key == 'profile':
+                return users.getProfile(userId='me')
+            return users.labels().get(userId='me', id=key)
+
+        fetched = execute_batch(service, keys, build, method='stats')
+        for key, error in fetched.errors.items():
+            print(f'Error fetching {key} stats: {error}')
+
+        profile = fetched.results.get('profile', {})
+        labels = {label: fetched.results.get(label, {}) for label in STATS_LABELS}
+        stats = {
+            'email': profile.get('emailAddress', ''),
+            'total_messages': profile.get('messagesTotal', 0),
+            'total_threads': profile.get('threadsTotal', 0),
+            'unread_count': labels['UNREAD'].get('messagesTotal', 0),
+            'starred_count': labels['STARRED'].get('messagesTotal', 0),
+            'inbox_count': labels['INBOX'].get('messagesTotal', 0),
+            'inbox_unread': labels['INBOX'].get('messagesUnread', 0)
+        }
+        # Partial results are returned but never cached
+        if not fetched.errors:
+            with self._stats_lock:
+                self._stats = stats
+                self._stats_fetched = time.time()
+        return dict(stats)
+
+    def invalidate_stats(self):
+        """Drop the cached stats snapshot"""
+        with self._stats_lock:
+            self._stats = None
 
     def get_user_profile(self) -> Dict[str, str]:
         """Get authenticated user's Gmail profile"""
@@ -280,7 +862,7 @@ class GmailService:
                 return {}
 
         try:
-            profile = self.service.users().getProfile(userId='me').execute()
+            profile = self._execute('getProfile', self.thread_service().users().getProfile(userId='me'))
             return {
                 'email': profile.get('emailAddress', ''),
                 'messages_total': profile.get('messagesTotal', 0),
@@ -299,4 +881,7 @@ def get_gmail_service() -> GmailService:
     global _gmail_service_instance
     if _gmail_service_instance is None:
         _gmail_service_instance = GmailService()
+        # Pick up sends queued before a restart
+        if _gmail_service_instance.outbox is not None:
+            _gmail_service_instance.outbox.resume()
     return _gmail_service_instance
@@ -0,0 +1,45 @@
+"""
+Gunicorn configuration (picked up automatically from the working directory)
+The app is imported once in the master and shared copy-on-write by every
+worker; per-worker background threads start after the fork
+
+Override with the usual variables: PORT, WEB_CONCURRENCY, GUNICORN_THREADS
+"""
+import gc
+import os
+import shutil
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+# SSE and WebSocket clients hold a thread each; EDEN_STREAM_CLIENTS (default
+# threads - 8) caps them so ordinary requests keep threads to run on
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+
+# Import EDEN_SCRIPT (and build the app) in the master, before forking
+preload_app = True
+
+
+def on_starting(server):
+    """Drop per-worker metric files left by a previous run"""
+    metrics_dir = os.getenv("EDEN_METRICS_DIR")
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+
+
+def when_ready(server):
+    """Load shared read-only data, then freeze the heap before the first fork"""
+    import EDEN_SCRIPT
+    EDEN_SCRIPT.preload_shared_data()
+    # Objects moved to the permanent generation are never scanned by the
+    # collector, so its passes don't touch (and copy) the shared pages
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Start journal, security monitors and bus workers in the new worker"""
+    import EDEN_SCRIPT
+    EDEN_SCRIPT.start_background()
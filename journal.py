@@ -0,0 +1,314 @@
+"""
+Journal Module
+Durable append-only NDJSON journal for orchestrator events
+Segment files with batched fsync, mmap-based replay and checkpoint-driven
+size-based compaction so restarts rebuild state without replaying traffic
+Each process appends to its own lane, so every gunicorn worker journals
+"""
+import fcntl
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from threading import Thread, Event, Lock
+from typing import Dict, Any, Optional, List, Iterator, Tuple, Iterable
+
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".ndjson"
+CHECKPOINT_FILE = "checkpoint.json"
+LOCK_FILE = "journal.lock"
+LANE_PREFIX = "lane-"
+LANES_LOCK_FILE = "lanes.lock"
+
+
+class JournalLockedError(RuntimeError):
+    """Another process already owns the journal directory"""
+
+
+def read_checkpoint(directory: str) -> Optional[Dict[str, Any]]:
+    """Checkpoint document of a journal directory, if one was written"""
+    path = os.path.join(directory, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+class Journal:
+    """
+    Segmented append-only journal
+
+    Records are compact JSON objects, one per line. Writes are buffered and
+    fsynced in batches (every `fsync_batch` records or `fsync_interval`
+    seconds, whichever comes first). Once `checkpoint_bytes` have been
+    written since the last checkpoint, `checkpoint_due` is raised; the owner
+    then calls `checkpoint()` with a full snapshot and every segment before
+    the checkpoint position is deleted.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 256 * 1024,
+                 checkpoint_bytes: int = 1024 * 1024, fsync_batch: int = 64,
+                 fsync_interval: float = 0.5):
+        """
+        Open (or create) a journal directory
+
+        Args:
+            directory: Directory holding segments and the checkpoint
+            segment_bytes: Rotate to a new segment past this size
+            checkpoint_bytes: Request a checkpoint after this many bytes
+            fsync_batch: fsync after this many buffered records
+            fsync_interval: Maximum seconds a record stays un-synced
+
+        Raises:
+            JournalLockedError: If another process holds the journal
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.checkpoint_bytes = checkpoint_bytes
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+
+        os.makedirs(directory, exist_ok=True)
+        self._lock_fd = os.open(os.path.join(directory, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(self._lock_fd)
+            raise JournalLockedError(f"Journal {directory} is in use by another process")
+
+        self._lock = Lock()
+        self._pending = 0
+        self._since_checkpoint = 0
+        self._file = None
+        self._segment = 0
+        self._offset = 0
+        self._stop = Event()
+        self._flusher: Optional[Thread] = None
+
+    # ---------- Segments ----------
+
+    def _segment_path(self, index: int) -> str:
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{index:08d}{SEGMENT_SUFFIX}")
+
+    def segments(self) -> List[int]:
+        """Indexes of the segment files on disk, oldest first"""
+        indexes = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                indexes.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+        return sorted(indexes)
+
+    def _open_segment(self, index: int):
+        self._file = open(self._segment_path(index), "ab")
+        self._segment = index
+        self._offset = self._file.tell()
+
+    def _rotate(self):
+        self._sync()
+        self._file.close()
+        self._open_segment(self._segment + 1)
+
+    # ---------- Writing ----------
+
+    def open(self):
+        """Start appending after the newest segment and start the flusher"""
+        existing = self.segments()
+        self._open_segment(existing[-1] + 1 if existing else 1)
+        self._flusher = Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def append(self, record: Dict[str, Any]):
+        """Append one record (durable within fsync_interval)"""
+        line = json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+        with self._lock:
+            if self._file is None:
+                return
+            if self._offset >= self.segment_bytes:
+                self._rotate()
+            self._file.write(line)
+            self._offset += len(line)
+            self._since_checkpoint += len(line)
+            self._pending += 1
+            if self._pending >= self.fsync_batch:
+                self._sync()
+
+    @property
+    def checkpoint_due(self) -> bool:
+        return self._since_checkpoint >= self.checkpoint_bytes
+
+    def _sync(self):
+        if self._file is not None and self._pending:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            with self._lock:
+                self._sync()
+
+    def position(self) -> Tuple[int, int]:
+        """Current (segment, offset) write position"""
+        with self._lock:
+            return self._segment, self._offset
+
+    # ---------- Checkpoints ----------
+
+    def checkpoint(self, snapshot: Dict[str, Any], absorbed: Iterable[str] = ()):
+        """
+        Persist a snapshot covering everything appended so far and drop
+        the segments it makes redundant
+
+        Records appended after this call land after the checkpoint position;
+        the caller tags records with a sequence number and stores the last
+        one the snapshot covers, so replay can skip late writes of records
+        the snapshot already includes. `absorbed` names the orphaned lanes
+        the snapshot took over, so a crash before they are dropped cannot
+        replay them twice.
+        """
+        with self._lock:
+            self._sync()
+            # Start a fresh segment so every older one is fully covered
+            if self._offset:
+                self._rotate()
+            data = {
+                "segment": self._segment,
+                "offset": self._offset,
+                "written_at": time.time(),
+                "absorbed": list(absorbed),
+                "snapshot": snapshot
+            }
+            path = os.path.join(self.directory, CHECKPOINT_FILE)
+            tmp = path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            dir_fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+            self._since_checkpoint = 0
+
+            for index in self.segments():
+                if index < self._segment:
+                    os.remove(self._segment_path(index))
+
+    def load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Latest checkpoint document, if one was written"""
+        return read_checkpoint(self.directory)
+
+    # ---------- Replay ----------
+
+    def replay(self, start: Tuple[int, int] = (0, 0)) -> Iterator[Dict[str, Any]]:
+        """
+        Yield records appended at or after `start`, oldest first
+
+        Segments are read through mmap. A torn final line left by a crash
+        mid-write is skipped.
+        """
+        start_segment, start_offset = start
+        for index in self.segments():
+            if index < start_segment:
+                continue
+            path = self._segment_path(index)
+            if os.path.getsize(path) == 0:
+                continue
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                pos = start_offset if index == start_segment else 0
+                end = len(buf)
+                while pos < end:
+                    newline = buf.find(b"\n", pos)
+                    if newline == -1:
+                        break
+                    line = buf[pos:newline]
+                    pos = newline + 1
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def close(self):
+        """Flush, fsync and release the journal"""
+        self._stop.set()
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+        if self._lock_fd is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+# ---------------------------
+# Lanes
+# ---------------------------
+
+@contextmanager
+def _lanes_locked(directory: str):
+    """Serialize lane creation, takeover and removal across processes"""
+    fd = os.open(os.path.join(directory, LANES_LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def claim_lane(directory: str, **options) -> Tuple[Journal, List[Journal]]:
+    """
+    Open a new journal lane for this process, plus the lanes nobody owns
+
+    A lane is a journal in its own subdirectory of `directory`. Each process
+    writes only to the one it claimed, so any number of workers journal side
+    by side. The lanes of exited processes come back as orphans, still
+    locked: the caller replays them, checkpoints their contents into its own
+    lane (naming them as absorbed) and then calls drop_lane() on each.
+
+    Args:
+        directory: Journal root shared by every worker
+        **options: Journal options for the new lane
+
+    Returns:
+        (own lane, orphaned lanes oldest name first)
+    """
+    os.makedirs(directory, exist_ok=True)
+    orphans = []
+    absorbed = set()
+    with _lanes_locked(directory):
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if not name.startswith(LANE_PREFIX) or not os.path.isdir(path):
+                continue
+            checkpoint = read_checkpoint(path)
+            if checkpoint:
+                absorbed.update(checkpoint.get("absorbed", ()))
+            try:
+                orphans.append(Journal(path, **options))
+            except JournalLockedError:
+                continue
+        own = Journal(tempfile.mkdtemp(prefix=LANE_PREFIX, dir=directory), **options)
+
+    # Taken over by another lane already, but not yet removed
+    for lane in [lane for lane in orphans if os.path.basename(lane.directory) in absorbed]:
+        orphans.remove(lane)
+        drop_lane(lane)
+    return own, orphans
+
+
+def drop_lane(lane: Journal):
+    """Delete a lane whose records live on elsewhere"""
+    root = os.path.dirname(lane.directory)
+    with _lanes_locked(root):
+        # Removed before its lock is released, so no claimer can take it over
+        shutil.rmtree(lane.directory)
+        lane.close()
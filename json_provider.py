@@ -0,0 +1,143 @@
+"""
+JSON Provider Module
+Flask JSON provider with native NumPy support and an optional fast encoder
+Uses orjson when it is installed (falls back to the standard library), and
+serializes records exposing to_dict() without callers building dict lists
+"""
+import json
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+
+# Flush streamed NDJSON in chunks of about this many bytes
+NDJSON_CHUNK_BYTES = 64 * 1024
+
+
+def _default(o: Any) -> Any:
+    """Convert values neither encoder handles natively"""
+    to_dict = getattr(o, "to_dict", None)
+    if to_dict is not None:
+        return to_dict()
+    # NumPy is only consulted when a NumPy value actually shows up, so
+    # importing this module never loads it
+    if type(o).__module__ == "numpy":
+        if hasattr(o, "tolist"):
+            return o.tolist()
+    if isinstance(o, (set, frozenset, tuple)):
+        return list(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    # Dates go through Flask's default (HTTP dates) so both encoders agree
+    _ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+                       | orjson.OPT_PASSTHROUGH_DATETIME)
+
+    def _flask_default(o: Any) -> Any:
+        try:
+            return _default(o)
+        except TypeError:
+            # Dates, UUIDs, dataclasses, ... as Flask's provider renders them
+            return DefaultJSONProvider.default(o)
+
+    def dumps_bytes(obj: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+        """Serialize to UTF-8 JSON bytes"""
+        option = _ORJSON_OPTIONS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_flask_default, option=option)
+else:
+    def _flask_default(o: Any) -> Any:
+        try:
+            return _default(o)
+        except TypeError:
+            return DefaultJSONProvider.default(o)
+
+    def dumps_bytes(obj: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+        """Serialize to UTF-8 JSON bytes"""
+        return json.dumps(
+            obj, default=_flask_default, sort_keys=sort_keys, ensure_ascii=False,
+            indent=2 if indent else None, separators=None if indent else (",", ":")
+        ).encode("utf-8")
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> str:
+    """Compact JSON text (for SSE and WebSocket frames)"""
+    return dumps_bytes(obj, sort_keys=sort_keys).decode("utf-8")
+
+
+class EdenJSONProvider(DefaultJSONProvider):
+    """
+    Drop-in replacement for Flask's provider
+
+    jsonify()/current_app.json.dumps() accept NumPy scalars and arrays and
+    any object with to_dict(). Output stays key-sorted like Flask's default
+    so cached ETags remain stable.
+    """
+
+    default = staticmethod(_flask_default)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            # Callers asking for stdlib options (cls=, indent=, ...) get stdlib behaviour
+            kwargs.setdefault("default", self.default)
+            kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+            kwargs.setdefault("sort_keys", self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return dumps_bytes(obj, sort_keys=self.sort_keys).decode("utf-8")
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        """Compact UTF-8 body without a str round trip"""
+        return dumps_bytes(obj, sort_keys=self.sort_keys)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = dumps_bytes(obj, sort_keys=self.sort_keys, indent=indent) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def ndjson_lines(items: Iterable[Any], transform: Optional[Callable[[Any], Any]] = None,
+                 chunk_bytes: int = NDJSON_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Serialize an iterable as newline-delimited JSON, one item at a time
+
+    Lines are coalesced into ~chunk_bytes writes; memory stays flat no
+    matter how many items the iterable yields.
+    """
+    buffer = []
+    size = 0
+    for item in items:
+        line = dumps_bytes(transform(item) if transform else item) + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def ndjson_response(items: Iterable[Any], transform: Optional[Callable[[Any], Any]] = None,
+                    headers: Optional[dict] = None) -> Response:
+    """Streaming application/x-ndjson response over `items`"""
+    return Response(ndjson_lines(items, transform), mimetype="application/x-ndjson",
+                    headers=headers or {})
+
+
+def wants_ndjson(request) -> bool:
+    """True if the client asked for NDJSON (?format=ndjson or Accept header)"""
+    if request.args.get("format") == "ndjson":
+        return True
+    best = request.accept_mimetypes.best_match(["application/json", "application/x-ndjson"])
+    return best == "application/x-ndjson"
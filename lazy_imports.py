@@ -0,0 +1,44 @@
+"""
+Lazy Imports Module
+Defers heavy third-party imports (numpy, psutil, requests) until first use
+so cold boots and worker respawns only pay for what a request touches
+"""
+import importlib
+from typing import Any
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access
+
+    Loading goes through importlib.import_module, which holds the import
+    lock, so concurrent first uses from background threads are safe. Once
+    loaded, the module namespace is copied onto the proxy so later lookups
+    are plain attribute reads.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_lazy_name"] = name
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_lazy_name"])
+            self.__dict__.update(vars(module))
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only reached for names not yet copied (before loading, or attributes
+        # the module resolves through its own __getattr__, e.g. numpy.random)
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__dict__["_lazy_module"] is not None else "not loaded"
+        return f"<lazy module '{self.__dict__['_lazy_name']}' ({state})>"
+
+
+def lazy(name: str) -> LazyModule:
+    """Return a proxy that imports `name` when first used"""
+    return LazyModule(name)
@@ -0,0 +1,412 @@
+"""
+Metrics Module
+Prometheus text-format metrics without a client library dependency
+Counters and histograms are written to per-thread shards (no shared lock on
+the hot path) and merged at scrape time. With EDEN_METRICS_DIR set, every
+worker periodically dumps its values to <dir>/metrics-<pid>.json and
+/metrics aggregates all of them, so any worker can answer the scrape.
+
+Clear EDEN_METRICS_DIR on each deploy so counters from a previous run are
+not summed in.
+"""
+import json
+import os
+import time
+from bisect import bisect_left
+from threading import Lock, Thread, current_thread, local
+from typing import Dict, Any, Optional, List, Tuple, Callable, Iterable
+
+from flask import Blueprint, Response, g, request
+
+from api_auth import require_api_key
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DUMP_INTERVAL = 5.0
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, registry: "Registry", name: str, help: str, labelnames: Iterable[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        shard = self.registry._shard()
+        key = (self.name, self._key(labels))
+        shard[key] = shard.get(key, 0.0) + amount
+
+
+class Histogram(Metric):
+    """Cells are [count per bucket..., count above the last bucket, sum]"""
+    kind = "histogram"
+
+    def __init__(self, registry: "Registry", name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        shard = self.registry._shard()
+        key = (self.name, self._key(labels))
+        cell = shard.get(key)
+        if cell is None:
+            cell = shard[key] = [0] * (len(self.buckets) + 2)
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self, **labels) -> "Timer":
+        return Timer(self, labels)
+
+
+class Timer:
+    """Context manager observing elapsed seconds into a histogram"""
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Gauge(Metric):
+    """
+    Value read from a callback at dump/scrape time
+
+    `collect` returns a scalar, or a dict of label-value tuples to values.
+    Per-process gauges are exported with a `pid` label (workers that exited
+    are dropped); shared gauges describe state every worker sees the same
+    way and are only read by the process answering the scrape.
+    """
+    kind = "gauge"
+
+    def __init__(self, registry: "Registry", name: str, help: str, labelnames: Iterable[str] = (),
+                 collect: Optional[Callable[[], Any]] = None, shared: bool = False):
+        super().__init__(registry, name, help, labelnames)
+        self.collect = collect
+        self.shared = shared
+
+    def values(self) -> Dict[LabelValues, float]:
+        if self.collect is None:
+            return {}
+        try:
+            result = self.collect()
+        except Exception:
+            return {}
+        if isinstance(result, dict):
+            return {tuple(str(v) for v in (k if isinstance(k, tuple) else (k,))): float(v)
+                    for k, v in result.items()}
+        return {(): float(result)}
+
+
+class Registry:
+    """All metrics of this process plus the multi-worker file exchange"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self._metrics: Dict[str, Metric] = {}
+        self._reset()
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        # A forked worker starts from zero; the master's values stay in its own file
+        self._lock = Lock()
+        self._local = local()
+        self._shards: List[Tuple[Any, Dict]] = []
+        self._retired: Dict = {}
+        self._dumper_pid: Optional[int] = None
+
+    # ---------- Definition ----------
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._add(Counter(self, name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(self, name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = (),
+              collect: Optional[Callable[[], Any]] = None, shared: bool = False) -> Gauge:
+        return self._add(Gauge(self, name, help, labelnames, collect, shared))
+
+    def _add(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    # ---------- Shards ----------
+
+    def _shard(self) -> Dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = {}
+            with self._lock:
+                self._shards.append((current_thread(), shard))
+            self._local.shard = shard
+            return shard
+
+    def _merge_into(self, target: Dict, source: Dict):
+        for key, value in source.items():
+            if isinstance(value, list):
+                cell = target.get(key)
+                if cell is None:
+                    target[key] = list(value)
+                else:
+                    for i, v in enumerate(value):
+                        cell[i] += v
+            else:
+                target[key] = target.get(key, 0.0) + value
+
+    def local_values(self) -> Dict[Tuple[str, LabelValues], Any]:
+        """Counter/histogram values of this process, summed over threads"""
+        with self._lock:
+            # Shards of finished threads will not change again; fold them in once
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    self._merge_into(self._retired, dict(shard))
+            self._shards = alive
+            merged: Dict = {}
+            self._merge_into(merged, self._retired)
+        for _, shard in alive:
+            # dict()/list() copies are atomic under the GIL
+            self._merge_into(merged, {k: (list(v) if isinstance(v, list) else v)
+                                      for k, v in dict(shard).items()})
+        return merged
+
+    def local_gauges(self) -> Dict[str, Dict[LabelValues, float]]:
+        return {m.name: m.values() for m in self._metrics.values()
+                if isinstance(m, Gauge) and not m.shared}
+
+    # ---------- Multi-worker exchange ----------
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def dump(self):
+        """Write this process's values for the other workers to aggregate"""
+        if not self.directory:
+            return
+        data = {
+            "pid": os.getpid(),
+            "values": [[name, list(labels), value] for (name, labels), value in self.local_values().items()],
+            "gauges": {name: [[list(labels), value] for labels, value in values.items()]
+                       for name, values in self.local_gauges().items()}
+        }
+        path = self._path(os.getpid())
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def ensure_dumper(self):
+        """Start the periodic dump thread in this process if it is not running"""
+        if not self.directory or self._dumper_pid == os.getpid():
+            return
+        with self._lock:
+            if self._dumper_pid == os.getpid():
+                return
+            self._dumper_pid = os.getpid()
+        os.makedirs(self.directory, exist_ok=True)
+        Thread(target=self._dump_loop, name="metrics-dump", daemon=True).start()
+
+    def _dump_loop(self):
+        pid = os.getpid()
+        while self._dumper_pid == pid:
+            try:
+                self.dump()
+            except OSError as e:
+                print(f"⚠️  Metrics dump failed: {e}")
+            time.sleep(DUMP_INTERVAL)
+
+    @staticmethod
+    def _alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _collect(self) -> Tuple[Dict, Dict[str, Dict[LabelValues, float]]]:
+        values = self.local_values()
+        gauges: Dict[str, Dict[LabelValues, float]] = {}
+        pid = str(os.getpid())
+
+        def add_gauges(source_pid: str, source: Dict[str, Any]):
+            for name, samples in source.items():
+                target = gauges.setdefault(name, {})
+                for labels, value in samples:
+                    target[tuple(labels) + (source_pid,)] = value
+
+        add_gauges(pid, {name: list(v.items()) for name, v in self.local_gauges().items()})
+
+        if self.directory and os.path.isdir(self.directory):
+            self.dump()
+            for filename in os.listdir(self.directory):
+                if not (filename.startswith("metrics-") and filename.endswith(".json")):
+                    continue
+                try:
+                    file_pid = int(filename[len("metrics-"):-len(".json")])
+                except ValueError:
+                    continue
+                if file_pid == os.getpid():
+                    continue
+                try:
+                    with open(os.path.join(self.directory, filename)) as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                # Counters of exited workers still count; their gauges do not
+                self._merge_into(values, {(name, tuple(labels)): value
+                                          for name, labels, value in data["values"]})
+                if self._alive(file_pid):
+                    add_gauges(str(file_pid), data["gauges"])
+
+        for metric in self._metrics.values():
+            if isinstance(metric, Gauge) and metric.shared:
+                gauges[metric.name] = metric.values()
+        return values, gauges
+
+    # ---------- Exposition ----------
+
+    def exposition(self) -> str:
+        """All metrics in the Prometheus text format"""
+        values, gauges = self._collect()
+        by_metric: Dict[str, List[Tuple[LabelValues, Any]]] = {}
+        for (name, labels), value in values.items():
+            by_metric.setdefault(name, []).append((labels, value))
+
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(metric, Gauge):
+                names = metric.labelnames if metric.shared else metric.labelnames + ("pid",)
+                for labels, value in sorted(gauges.get(metric.name, {}).items()):
+                    lines.append(f"{metric.name}{_labels(names, labels)} {_number(value)}")
+            elif isinstance(metric, Counter):
+                for labels, value in sorted(by_metric.get(metric.name, [])):
+                    lines.append(f"{metric.name}{_labels(metric.labelnames, labels)} {_number(value)}")
+            else:
+                for labels, cell in sorted(by_metric.get(metric.name, [])):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (float("inf"),), cell[:-1]):
+                        cumulative += count
+                        le = f'le="{_number(bound)}"'
+                        lines.append(f"{metric.name}_bucket{_labels(metric.labelnames, labels, le)} {cumulative}")
+                    lines.append(f"{metric.name}_sum{_labels(metric.labelnames, labels)} {_number(cell[-1])}")
+                    lines.append(f"{metric.name}_count{_labels(metric.labelnames, labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    # ---------- Flask ----------
+
+    def init_app(self, app, path: str = "/metrics"):
+        """
+        Count and time every request, and serve the exposition at `path`
+
+        The exposition names routes, providers and live dimension values, so
+        it takes the API key like the debug endpoints (Prometheus can send
+        it as a bearer token).
+        """
+        app.before_request(self._before)
+        app.after_request(self._after)
+
+        bp = Blueprint("metrics", __name__)
+
+        @bp.route(path)
+        @require_api_key
+        def metrics():
+            return Response(self.exposition(), content_type=CONTENT_TYPE)
+
+        app.register_blueprint(bp)
+
+    def _before(self):
+        g._metrics_started = time.perf_counter()
+
+    def _after(self, response):
+        started = g.pop("_metrics_started", None)
+        if started is not None:
+            rule = request.url_rule
+            route = rule.rule if rule is not None else "<unmatched>"
+            HTTP_REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+            HTTP_LATENCY.observe(time.perf_counter() - started, method=request.method, route=route)
+        self.ensure_dumper()
+        return response
+
+
+# ---------------------------
+# Process-wide registry and shared metric definitions
+# ---------------------------
+
+registry = Registry(os.getenv("EDEN_METRICS_DIR"))
+
+HTTP_REQUESTS = registry.counter(
+    "eden_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_LATENCY = registry.histogram(
+    "eden_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+
+GMAIL_CALLS = registry.counter(
+    "eden_gmail_api_calls_total", "Gmail API calls by method and outcome", ("method", "outcome"))
+GMAIL_LATENCY = registry.histogram(
+    "eden_gmail_api_duration_seconds", "Gmail API call latency", ("method",))
+GMAIL_CACHE_LOOKUPS = registry.counter(
+    "eden_gmail_cache_lookups_total", "Gmail message cache lookups by result", ("result",))
+GMAIL_CACHE_BYTES_SAVED = registry.counter(
+    "eden_gmail_cache_bytes_saved_total", "Bytes of parsed messages served from the Gmail cache")
+
+LLM_CALLS = registry.counter(
+    "eden_llm_requests_total", "Persona model requests by provider and outcome", ("provider", "outcome"))
+LLM_LATENCY = registry.histogram(
+    "eden_llm_request_duration_seconds", "Persona model request latency (full streamed answer)",
+    ("provider",), buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0))
+
+OAUTH_TOKENS_ISSUED = registry.counter(
+    "eden_oauth_tokens_issued_total", "OAuth access tokens issued by grant type", ("grant_type",))
+OAUTH_VALIDATIONS = registry.counter(
+    "eden_oauth_token_validations_total", "OAuth bearer token checks by result", ("result",))
+
+CYCLE_LATENCY = registry.histogram(
+    "eden_cycle_duration_seconds", "Orchestrator run_cycle duration",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25))
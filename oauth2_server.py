@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify, redirect, render_template_string
 from functools import wraps
 
+from metrics import OAUTH_TOKENS_ISSUED, OAUTH_VALIDATIONS
+
 # Create Blueprint for OAuth2 endpoints
 oauth2_bp = Blueprint('oauth2', __name__, url_prefix='/oauth')
 
@@ -49,22 +51,26 @@ def require_oauth(f):
         auth_header = request.headers.get('Authorization')
 
         if not auth_header or not auth_header.startswith('Bearer '):
+            OAUTH_VALIDATIONS.inc(result='missing')
             return jsonify({'error': 'missing_token', 'error_description': 'No access token provided'}), 401
 
         token = auth_header[7:]  # Remove "Bearer " prefix
 
         # Check if token exists and is valid
         if token not in access_tokens:
+            OAUTH_VALIDATIONS.inc(result='invalid')
             return jsonify({'error': 'invalid_token', 'error_description': 'Access token is invalid'}), 401
 
         token_data = access_tokens[token]
 
         # Check if token is expired
         if token_data['expires_at'] < time.time():
+            OAUTH_VALIDATIONS.inc(result='expired')
             return jsonify({'error': 'token_expired', 'error_description': 'Access token has expired'}), 401
 
         # Token is valid, add user info to request
         request.oauth_user = token_data['user_email']
+        OAUTH_VALIDATIONS.inc(result='valid')
 
         return f(*args, **kwargs)
 
@@ -186,6 +192,8 @@ def handle_authorization_code_grant():
         'expires_at': time.time() + REFRESH_TOKEN_EXPIRY
     }
 
+    OAUTH_TOKENS_ISSUED.inc(grant_type='authorization_code')
+
     # Return tokens
     return jsonify({
         'access_token': access_token,
@@ -234,6 +242,8 @@ def handle_refresh_token_grant():
     # Update refresh token with new access token
     token_data['access_token'] = new_access_token
 
+    OAUTH_TOKENS_ISSUED.inc(grant_type='refresh_token')
+
     # Return new access token
     return jsonify({
         'access_token': new_access_token,
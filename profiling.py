@@ -0,0 +1,326 @@
+"""
+Profiling Module
+Per-route wall/CPU timing for every request (app and blueprints) and an
+on-demand profiler that captures either cProfile statistics or sampled
+collapsed stacks for a bounded window
+
+Endpoints (API key required):
+    GET  /api/debug/timings              per-route timing table
+    POST /api/debug/profile              {"mode": "cprofile"|"sampling", "seconds": 10, "requests": 100}
+    GET  /api/debug/profile              capture status, or its result once finished
+                                         (?format=pstats|collapsed, ?sort=cumulative, ?limit=40)
+    DELETE /api/debug/profile            stop the capture early
+"""
+import cProfile
+import io
+import pstats
+import sys
+import time
+from collections import Counter
+from threading import Lock, Thread, Event, get_ident
+from typing import Dict, Any, Optional, List
+
+from flask import Blueprint, Response, g, jsonify, request
+
+from api_auth import require_api_key
+
+
+MODES = ("cprofile", "sampling")
+SAMPLE_INTERVAL = 0.005
+
+
+class RouteTimings:
+    """Running wall-clock and thread CPU totals per route"""
+
+    def __init__(self):
+        self._lock = Lock()
+        # route -> [count, wall_total, wall_max, cpu_total]
+        self._routes: Dict[str, List[float]] = {}
+
+    def add(self, route: str, wall: float, cpu: float):
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                self._routes[route] = [1, wall, wall, cpu]
+            else:
+                entry[0] += 1
+                entry[1] += wall
+                entry[3] += cpu
+                if wall > entry[2]:
+                    entry[2] = wall
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Routes sorted by total wall time, times in milliseconds"""
+        with self._lock:
+            items = [(route, list(entry)) for route, entry in self._routes.items()]
+        rows = []
+        for route, (count, wall, wall_max, cpu) in items:
+            rows.append({
+                "route": route,
+                "count": int(count),
+                "wall_ms_total": round(wall * 1000, 3),
+                "wall_ms_mean": round(wall / count * 1000, 3),
+                "wall_ms_max": round(wall_max * 1000, 3),
+                "cpu_ms_mean": round(cpu / count * 1000, 3)
+            })
+        rows.sort(key=lambda row: row["wall_ms_total"], reverse=True)
+        return rows
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+class Capture:
+    """
+    One bounded profiling window
+
+    A cprofile capture profiles one request at a time: only one profiler
+    can be active per interpreter (sys.monitoring on 3.12+), so requests
+    overlapping the profiled one run unprofiled and are counted as skipped.
+    """
+
+    def __init__(self, mode: str, seconds: float, max_requests: Optional[int]):
+        self.mode = mode
+        self.seconds = seconds
+        self.max_requests = max_requests
+        self.started = time.time()
+        self.deadline = time.monotonic() + seconds
+        self.requests = 0
+        self.skipped = 0
+        self.finished = False
+
+        self._lock = Lock()
+        self.stats: Optional[pstats.Stats] = None
+        self._profiling: Optional[int] = None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        # Threads currently serving a request (sampling mode only looks at these)
+        self.threads: Dict[int, str] = {}
+        self._stop = Event()
+
+        if mode == "sampling":
+            Thread(target=self._sample_loop, daemon=True).start()
+
+    def expired(self) -> bool:
+        return (time.monotonic() >= self.deadline
+                or (self.max_requests is not None and self.requests >= self.max_requests))
+
+    def finish(self):
+        self.finished = True
+        self._stop.set()
+
+    def begin(self, route: str) -> Optional[cProfile.Profile]:
+        """
+        Admit the calling thread's request into the window
+
+        Returns:
+            An enabled profiler (cprofile mode), or None when the request is
+            sampled instead, skipped, or the window is full
+        """
+        with self._lock:
+            if self.finished or self.expired():
+                return None
+            if self.mode == "sampling":
+                self.requests += 1
+                self.threads[get_ident()] = route
+                return None
+            if self._profiling is not None:
+                self.skipped += 1
+                return None
+            self.requests += 1
+            self._profiling = get_ident()
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def end(self, profile: Optional[cProfile.Profile]):
+        """Close the calling thread's request (and merge its profile)"""
+        if profile is not None:
+            profile.disable()
+        with self._lock:
+            if profile is None:
+                self.threads.pop(get_ident(), None)
+                return
+            if self.stats is None:
+                self.stats = pstats.Stats(profile)
+            else:
+                self.stats.add(profile)
+            self._profiling = None
+
+    # ---------- Sampling ----------
+
+    def _sample_loop(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            if time.monotonic() >= self.deadline:
+                break
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, route in list(self.threads.items()):
+                    frame = frames.get(ident)
+                    if frame is None:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    stack.append(route)
+                    self.stacks[";".join(reversed(stack))] += 1
+                    self.samples += 1
+        self.finished = True
+
+    # ---------- Output ----------
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "started": self.started,
+            "seconds": self.seconds,
+            "max_requests": self.max_requests,
+            "requests": self.requests,
+            "skipped": self.skipped,
+            "samples": self.samples,
+            "finished": self.finished
+        }
+
+    def pstats_text(self, sort: str, limit: int) -> str:
+        with self._lock:
+            if self.stats is None:
+                return "No profiled requests\n"
+            out = io.StringIO()
+            self.stats.stream = out
+            self.stats.sort_stats(sort).print_stats(limit)
+            return out.getvalue()
+
+    def collapsed(self) -> str:
+        """Brendan Gregg collapsed-stack format (flamegraph.pl / speedscope input)"""
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Profiler:
+    """
+    Request timing hooks plus the on-demand capture
+
+    Hooks are installed on the app, so they run for blueprint routes
+    (gmail_bp, oauth2_bp, ...) as well. With no capture running, a request
+    costs two clock reads per hook and one dict update.
+    """
+
+    def __init__(self):
+        self.timings = RouteTimings()
+        self.capture: Optional[Capture] = None
+        self._lock = Lock()
+
+    def init_app(self, app):
+        app.before_request(self._before)
+        app.teardown_request(self._teardown)
+        app.register_blueprint(self.blueprint())
+
+    # ---------- Hooks ----------
+
+    def _before(self):
+        g._timing = (time.perf_counter(), time.thread_time())
+        capture = self.capture
+        if capture is None or capture.finished:
+            return
+        if capture.expired():
+            capture.finish()
+            return
+        g._capture = capture
+        g._profile = capture.begin(self._route())
+
+    def _teardown(self, exc=None):
+        started = g.pop("_timing", None)
+        if started is None:
+            return
+        capture = g.pop("_capture", None)
+        if capture is not None:
+            capture.end(g.pop("_profile", None))
+        wall = time.perf_counter() - started[0]
+        cpu = time.thread_time() - started[1]
+        self.timings.add(self._route(), wall, cpu)
+
+    @staticmethod
+    def _route() -> str:
+        rule = request.url_rule
+        return f"{request.method} {rule.rule if rule is not None else '<unmatched>'}"
+
+    # ---------- Control ----------
+
+    def start(self, mode: str, seconds: float, max_requests: Optional[int]) -> Capture:
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        with self._lock:
+            if self.capture is not None and not self.capture.finished and not self.capture.expired():
+                raise RuntimeError("A profiling capture is already running")
+            self.capture = Capture(mode, seconds, max_requests)
+            return self.capture
+
+    def stop(self):
+        if self.capture is not None:
+            self.capture.finish()
+
+    # ---------- Routes ----------
+
+    def blueprint(self) -> Blueprint:
+        bp = Blueprint("profiling", __name__, url_prefix="/api/debug")
+
+        @bp.route("/timings", methods=["GET", "DELETE"])
+        @require_api_key
+        def timings():
+            if request.method == "DELETE":
+                self.timings.reset()
+            return jsonify({"ok": True, "routes": self.timings.snapshot()})
+
+        @bp.route("/profile", methods=["POST"])
+        @require_api_key
+        def start_profile():
+            data = request.get_json(silent=True) or {}
+            try:
+                seconds = min(float(data.get("seconds", 10)), 300.0)
+                max_requests = data.get("requests")
+                max_requests = int(max_requests) if max_requests is not None else None
+                capture = self.start(data.get("mode", "cprofile"), seconds, max_requests)
+            except (TypeError, ValueError) as e:
+                return jsonify({"ok": False, "error": str(e)}), 400
+            except RuntimeError as e:
+                return jsonify({"ok": False, "error": str(e)}), 409
+            return jsonify({"ok": True, "capture": capture.status()}), 202
+
+        @bp.route("/profile", methods=["GET"])
+        @require_api_key
+        def profile_result():
+            capture = self.capture
+            if capture is None:
+                return jsonify({"ok": False, "error": "No capture has been started"}), 404
+            if not capture.finished and capture.expired():
+                capture.finish()
+            if not capture.finished:
+                return jsonify({"ok": True, "capture": capture.status()})
+
+            fmt = request.args.get("format") or ("pstats" if capture.mode == "cprofile" else "collapsed")
+            if fmt == "collapsed":
+                if capture.mode != "sampling":
+                    return jsonify({"ok": False, "error": "collapsed stacks need a sampling capture"}), 400
+                return Response(capture.collapsed(), mimetype="text/plain")
+            if fmt == "pstats":
+                if capture.mode != "cprofile":
+                    return jsonify({"ok": False, "error": "pstats needs a cprofile capture"}), 400
+                sort = request.args.get("sort", "cumulative")
+                limit = request.args.get("limit", 40, type=int)
+                try:
+                    return Response(capture.pstats_text(sort, limit), mimetype="text/plain")
+                except KeyError:
+                    return jsonify({"ok": False, "error": f"Unknown sort key: {sort}"}), 400
+            return jsonify({"ok": False, "error": "format must be pstats or collapsed"}), 400
+
+        @bp.route("/profile", methods=["DELETE"])
+        @require_api_key
+        def stop_profile():
+            self.stop()
+            capture = self.capture
+            return jsonify({"ok": True, "capture": capture.status() if capture else None})
+
+        return bp
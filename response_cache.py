@@ -0,0 +1,110 @@
+"""
+Response Cache Module
+Caches serialized JSON bodies per data version with strong ETags
+Answers If-None-Match with 304 and supports `fields=` sparse fieldsets
+"""
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Any, Optional, Tuple, Callable, Hashable
+
+from flask import Response, current_app, request
+
+
+def parse_fields(raw: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Normalize a `fields=a,b.c` parameter into a sorted tuple of paths"""
+    if not raw:
+        return None
+    fields = sorted({f.strip() for f in raw.split(",") if f.strip()})
+    return tuple(fields) or None
+
+
+def select_fields(payload: Dict[str, Any], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    Keep only the requested (dotted) paths of a payload
+
+    Unknown paths are ignored, so a sparse request never fails on a field
+    that a given snapshot does not carry.
+    """
+    selected: Dict[str, Any] = {}
+    for path in fields:
+        parts = path.split(".")
+        source: Any = payload
+        for part in parts:
+            if not isinstance(source, dict) or part not in source:
+                break
+            source = source[part]
+        else:
+            target = selected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = source
+    return selected
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized responses keyed by (endpoint, fields)
+
+    Each entry remembers the data version it was built from; a request for
+    the same version reuses the bytes and ETag without calling the builder.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[Hashable, str, bytes]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _serialize(self, key: Tuple[Hashable, ...], version: Hashable,
+                   build: Callable[[], Dict[str, Any]],
+                   fields: Optional[Tuple[str, ...]]) -> Tuple[str, bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+
+        payload = build()
+        if fields:
+            payload = select_fields(payload, fields)
+        provider = current_app.json
+        if hasattr(provider, "dumps_bytes"):
+            body = provider.dumps_bytes(payload)
+        else:
+            body = provider.dumps(payload).encode("utf-8")
+        etag = hashlib.sha1(body).hexdigest()
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (version, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag, body
+
+    def respond(self, name: str, version: Hashable,
+                build: Callable[[], Dict[str, Any]]) -> Response:
+        """
+        Serve `build()` for the current request through the cache
+
+        Args:
+            name: Cache namespace (usually the endpoint)
+            version: Anything that changes whenever the payload would
+            build: Produces the full payload on a cache miss
+
+        Returns:
+            200 with body and ETag, or 304 if If-None-Match matches
+        """
+        fields = parse_fields(request.args.get("fields"))
+        etag, body = self._serialize((name, fields), version, build, fields)
+
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
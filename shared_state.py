@@ -0,0 +1,260 @@
+"""
+Shared State Module
+Numeric orchestrator state held in an mmap segment shared by all workers
+Writers are serialized with a process lock (flock) and publish through a
+seqlock so readers always see one consistent, versioned snapshot
+"""
+import fcntl
+import mmap
+import os
+import struct
+import time
+import weakref
+from threading import RLock, local
+from typing import Dict, Any, Optional, List, Callable
+
+
+MAGIC = b"EDENST01"
+
+# Scalar fields stored after the dimension values, in layout order
+FLOAT_FIELDS = ("trust_level", "threat_level")
+INT_FIELDS = (
+    "awakening_phase", "bonding_events", "safety_resets", "wipe_attempts",
+    "security_incidents", "defense_activated", "memory_events", "api_calls"
+)
+
+# magic, dimension count, seq, version
+_HEADER = struct.Struct("<8sQQQ")
+# Optimistic read attempts before falling back to the writer lock
+READ_RETRIES = 100
+
+
+class SharedState:
+    """
+    Versioned numeric state in a shared memory segment
+
+    With a path (e.g. /dev/shm/eden_state) every process mapping the file
+    sees the same values. Without one, a private anonymous mapping is used
+    and the state stays per process.
+    """
+
+    def __init__(self, dimension_names: List[str], path: Optional[str] = None):
+        """
+        Map the segment
+
+        Args:
+            dimension_names: Ordered dimension keys stored in the segment
+            path: Backing file shared between workers (private memory if None)
+        """
+        self.dimension_names = list(dimension_names)
+        self.path = path
+        self._payload = struct.Struct(
+            f"<{len(self.dimension_names) + len(FLOAT_FIELDS)}d{len(INT_FIELDS)}q"
+        )
+        self.size = _HEADER.size + self._payload.size
+
+        self._thread_lock = RLock()
+        self._depth = 0
+
+        if path:
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size < self.size:
+                    os.ftruncate(self._fd, self.size)
+                self._buf = mmap.mmap(self._fd, self.size, flags=mmap.MAP_SHARED)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        else:
+            self._fd = None
+            self._buf = mmap.mmap(-1, self.size, flags=mmap.MAP_PRIVATE)
+
+        if path:
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
+    def _after_fork(self):
+        """
+        Give a forked child its own file description
+
+        flock locks belong to the open file description, which a fork shares;
+        without reopening, workers forked from one master would not exclude
+        each other. The MAP_SHARED mapping itself stays valid.
+        """
+        inherited = self._fd
+        self._fd = os.open(self.path, os.O_RDWR)
+        os.close(inherited)
+        self._thread_lock = RLock()
+        self._depth = 0
+
+    # ---------- Header ----------
+
+    def _header(self):
+        return _HEADER.unpack_from(self._buf, 0)
+
+    @property
+    def initialized(self) -> bool:
+        """True once a writer has stored a snapshot with this layout"""
+        magic, ndims, _, _ = self._header()
+        return magic == MAGIC and ndims == len(self.dimension_names)
+
+    @property
+    def version(self) -> int:
+        return self._header()[3]
+
+    @property
+    def torn(self) -> bool:
+        """True if a writer died mid-update (odd sequence) and nobody has rewritten it yet"""
+        return bool(self._header()[2] & 1)
+
+    # ---------- Locking ----------
+
+    def acquire(self):
+        """Take the writer lock (re-entrant within a process)"""
+        self._thread_lock.acquire()
+        self._depth += 1
+        if self._depth == 1 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def release(self):
+        """Release the writer lock"""
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    # ---------- Reads / Writes ----------
+
+    def _unpack(self) -> Dict[str, Any]:
+        values = self._payload.unpack_from(self._buf, _HEADER.size)
+        ndims = len(self.dimension_names)
+        nfloats = ndims + len(FLOAT_FIELDS)
+        state: Dict[str, Any] = {"dimensions": dict(zip(self.dimension_names, values[:ndims]))}
+        state.update(zip(FLOAT_FIELDS, values[ndims:nfloats]))
+        state.update(zip(INT_FIELDS, values[nfloats:]))
+        return state
+
+    def values(self, state: Dict[str, Any]) -> List[float]:
+        """State flattened in payload order, as write() stores it"""
+        dims = state["dimensions"]
+        values = [float(dims[name]) for name in self.dimension_names]
+        values += [float(state[name]) for name in FLOAT_FIELDS]
+        values += [int(state[name]) for name in INT_FIELDS]
+        return values
+
+    def read(self) -> Dict[str, Any]:
+        """
+        Lock-free consistent read (seqlock)
+
+        Retries while a writer is mid-update (odd sequence) or the sequence
+        moved during the copy, yielding between attempts; after READ_RETRIES
+        it waits for the writer lock instead.
+
+        Returns:
+            State dict with "dimensions", scalar fields and "version"
+        """
+        for _ in range(READ_RETRIES):
+            _, _, seq_before, version = self._header()
+            if not seq_before & 1:
+                state = self._unpack()
+                if self._header()[2] == seq_before:
+                    state["version"] = version
+                    return state
+            time.sleep(0)
+        self.acquire()
+        try:
+            return self.read_locked()
+        finally:
+            self.release()
+
+    def read_locked(self) -> Dict[str, Any]:
+        """
+        Read the payload directly (caller must hold the writer lock)
+
+        Holding the lock excludes live writers, so an odd sequence here can
+        only be one that died mid-update; its payload is returned as is and
+        the next write() replaces it.
+        """
+        state = self._unpack()
+        state["version"] = self.version
+        return state
+
+    def write(self, state: Dict[str, Any]) -> int:
+        """
+        Publish a new snapshot (caller must hold the writer lock)
+
+        Returns:
+            The new version number
+        """
+        _, _, seq, version = self._header()
+        if seq & 1:
+            # A writer died mid-update; its half-written payload is overwritten below
+            seq += 1
+        values = self.values(state)
+
+        # Slice assignment copies the packed bytes in one go; pack_into would
+        # zero the region first, letting a reader see seq == 0 mid-write
+        ndims = len(self.dimension_names)
+        self._buf[:_HEADER.size] = _HEADER.pack(MAGIC, ndims, seq + 1, version)
+        self._buf[_HEADER.size:self.size] = self._payload.pack(*values)
+        self._buf[:_HEADER.size] = _HEADER.pack(MAGIC, ndims, seq + 2, version + 1)
+        return version + 1
+
+
+class StateLock:
+    """
+    Re-entrant transaction over a SharedState
+
+    The outermost enter takes the writer lock and loads the shared values
+    into the owner; the outermost exit stores them back as one new version
+    and passes it to `on_commit` while the lock is still held. A
+    transaction that changed nothing (a read under the lock) publishes no
+    version and commits nothing. `published` is the version this thread's
+    last outermost exit left in the segment.
+    """
+
+    def __init__(self, state: SharedState, load: Callable[[Dict[str, Any]], None],
+                 dump: Callable[[], Dict[str, Any]],
+                 on_commit: Optional[Callable[[Dict[str, Any], int], None]] = None):
+        self.state = state
+        self._load = load
+        self._dump = dump
+        self._on_commit = on_commit
+        self._depth = 0
+        self._loaded: Optional[List[float]] = None
+        self._local = local()
+
+    @property
+    def nested(self) -> bool:
+        """True inside an enclosing transaction (only meaningful while held)"""
+        return self._depth > 1
+
+    @property
+    def published(self) -> Optional[int]:
+        """Version left by this thread's last outermost exit (None before one)"""
+        return getattr(self._local, "version", None)
+
+    def __enter__(self):
+        self.state.acquire()
+        self._depth += 1
+        if self._depth == 1:
+            loaded = self.state.read_locked()
+            self._loaded = self.state.values(loaded)
+            self._load(loaded)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._depth == 1:
+                values = self._dump()
+                if self.state.values(values) != self._loaded or self.state.torn:
+                    version = self.state.write(values)
+                    if self._on_commit is not None:
+                        self._on_commit(values, version)
+                else:
+                    version = self.state.version
+                self._local.version = version
+        finally:
+            self._depth -= 1
+            self.state.release()
+        return False
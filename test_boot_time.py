@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Boot Time Test
+Keeps a cold `import EDEN_SCRIPT` under a time budget and checks that heavy
+dependencies are not loaded until first use
+
+Budget: EDEN_BOOT_BUDGET seconds (default 1.5); best of EDEN_BOOT_RUNS runs (default 3)
+"""
+import json
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BOOT_BUDGET = float(os.getenv("EDEN_BOOT_BUDGET", "1.5"))
+BOOT_RUNS = int(os.getenv("EDEN_BOOT_RUNS", "3"))
+
+# Must stay out of sys.modules after import; they load on first use
+DEFERRED_MODULES = [
+    "numpy", "psutil", "requests",
+    "googleapiclient.discovery", "google_auth_oauthlib", "google.auth.transport.requests"
+]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import EDEN_SCRIPT
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+
+def boot():
+    """Import EDEN_SCRIPT in a fresh interpreter and report time and loaded modules"""
+    env = dict(os.environ)
+    env.pop("EDEN_JOURNAL_DIR", None)
+    env.pop("EDEN_SHARED_STATE", None)
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_boot_within_budget():
+    best = min(boot()["seconds"] for _ in range(BOOT_RUNS))
+    assert best <= BOOT_BUDGET, (
+        f"import EDEN_SCRIPT took {best:.3f}s (budget {BOOT_BUDGET:.3f}s); "
+        f"run benchmarks/import_report.py to see what got slower"
+    )
+
+
+def test_heavy_dependencies_are_deferred():
+    loaded = boot()["loaded"]
+    assert not loaded, f"Loaded at import time instead of first use: {', '.join(loaded)}"
+
+
+if __name__ == "__main__":
+    result = boot()
+    print(f"import EDEN_SCRIPT: {result['seconds'] * 1000:.1f} ms (budget {BOOT_BUDGET * 1000:.0f} ms)")
+    print(f"Deferred modules loaded at boot: {result['loaded'] or 'none'}")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Event Bus Test
+Checks the overflow policies against a stalled subscriber (DROP_OLDEST keeps
+the newest events, DROP_NEWEST the oldest, BLOCK makes the publisher wait and
+loses nothing), topic filtering, and that a failing handler does not stop
+delivery
+"""
+import threading
+import time
+
+import pytest
+
+from event_bus import BLOCK, DROP_NEWEST, DROP_OLDEST, EventBus
+
+
+def stalled(bus, policy, maxsize=2, topics=None):
+    """Subscriber whose handler holds its first event until `gate` is set"""
+    received = []
+    entered = threading.Event()
+    gate = threading.Event()
+
+    def handler(topic, payload):
+        entered.set()
+        gate.wait(5)
+        received.append(payload)
+
+    subscriber = bus.subscribe(policy, handler, topics=topics, maxsize=maxsize, policy=policy)
+    bus.publish("t", 1)
+    assert entered.wait(5)
+    return subscriber, received, gate
+
+
+@pytest.mark.parametrize("policy, kept", [(DROP_OLDEST, [1, 3, 4]), (DROP_NEWEST, [1, 2, 3])])
+def test_drop_policies_bound_the_queue(policy, kept):
+    bus = EventBus()
+    subscriber, received, gate = stalled(bus, policy)
+    for payload in (2, 3, 4):
+        bus.publish("t", payload)
+    assert subscriber.depth == 2 and subscriber.dropped == 1
+
+    gate.set()
+    assert bus.flush(timeout=5)
+    assert received == kept
+    assert bus.stats()[policy]["delivered"] == 3 and bus.stats()[policy]["depth"] == 0
+    bus.close()
+
+
+def test_block_policy_waits_for_room_and_loses_nothing():
+    bus = EventBus()
+    subscriber, received, gate = stalled(bus, BLOCK)
+    publisher = threading.Thread(target=lambda: [bus.publish("t", n) for n in (2, 3, 4)])
+    publisher.start()
+    publisher.join(0.2)
+    assert publisher.is_alive() and subscriber.depth == 2
+
+    gate.set()
+    publisher.join(5)
+    assert not publisher.is_alive()
+    assert bus.flush(timeout=5)
+    assert received == [1, 2, 3, 4] and subscriber.dropped == 0
+    bus.close()
+
+
+def test_topics_filter_and_handler_errors_are_counted():
+    bus = EventBus()
+    seen = []
+
+    def handler(topic, payload):
+        if payload == "bad":
+            raise RuntimeError("boom")
+        seen.append((topic, payload))
+
+    subscriber = bus.subscribe("memory", handler, topics=["memory"])
+    everything = []
+    bus.subscribe("all", lambda topic, payload: everything.append(topic))
+    for topic, payload in [("memory", "a"), ("security", "b"), ("memory", "bad"), ("memory", "c")]:
+        bus.publish(topic, payload)
+    assert bus.flush(timeout=5)
+    assert seen == [("memory", "a"), ("memory", "c")] and subscriber.errors == 1
+    assert everything == ["memory", "security", "memory", "memory"]
+
+    bus.unsubscribe(subscriber)
+    bus.publish("memory", "d")
+    bus.flush(timeout=5)
+    assert len(seen) == 2 and set(bus.stats()) == {"all"}
+
+    with pytest.raises(ValueError):
+        bus.subscribe("bad", handler, policy="forever")
+    started = time.monotonic()
+    bus.close()
+    assert time.monotonic() - started < 1.0
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Event Store Test
+Checks the compact records (serialized forms, journal round trips, the
+abstract base), typed filtering, time bounds, limits, per-type retention and
+lifetime counters, and the JSON/NDJSON forms of GET /api/memory/events
+"""
+import json
+import os
+
+import pytest
+
+import EDEN_SCRIPT as eden
+from event_store import (CHAT, REFLECTION, STIMULATE, CycleRecord, EventStore, MemoryEvent,
+                         Record, SecurityEvent, SecurityEventType)
+
+
+def test_records_serialize_and_round_trip_the_journal():
+    chat = MemoryEvent(CHAT, "hello", "hi", ts=0.0)
+    reflection = MemoryEvent(REFLECTION, "look inward", ts=1.0)
+    security = SecurityEvent(SecurityEventType.THREAT_DETECTED, "probe", 0.12345, 0.5, ts=2.0)
+    cycle = CycleRecord(0.123456, ts=3.0)
+
+    assert chat.to_dict()["result"] == "hi" and "stealth" not in chat.to_dict()
+    assert reflection.to_dict()["stealth"] is True and "result" not in reflection.to_dict()
+    assert security.to_dict()["type"] == "threat_detected" and security.to_dict()["threat_level"] == 0.123
+    assert cycle.to_dict() == {"score": 0.1235, "timestamp": cycle.timestamp}
+
+    for record in (chat, reflection, security, cycle):
+        assert not hasattr(record, "__dict__")
+        restored = type(record).from_journal(json.loads(json.dumps(record.to_journal())))
+        assert restored.to_dict() == record.to_dict()
+
+
+def test_record_subclasses_must_implement_both_forms():
+    class Partial(Record):
+        __slots__ = ()
+
+        def to_dict(self):
+            return {}
+
+    with pytest.raises(TypeError):
+        Record()
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def filled_store(**limits):
+    """Ten events at ts 0..9, alternating chat and stimulate"""
+    store = EventStore(**limits)
+    for i in range(10):
+        store.append(MemoryEvent(STIMULATE if i % 2 else CHAT, f"event {i}", ts=float(i)))
+    return store
+
+
+def test_query_filters_by_type_and_time_in_chronological_order():
+    store = filled_store()
+    assert [e.event for e in store.query(kind=STIMULATE)] == [f"event {i}" for i in (1, 3, 5, 7, 9)]
+    assert [e.ts for e in store.query(since=3, until=6)] == [3.0, 4.0, 5.0, 6.0]
+    assert [e.ts for e in store.query(kind=CHAT, since=3, until=8)] == [4.0, 6.0, 8.0]
+    # The limit keeps the newest matches
+    assert [e.ts for e in store.query(limit=3)] == [7.0, 8.0, 9.0]
+    assert [e.ts for e in store.recent(2, kind=CHAT)] == [6.0, 8.0]
+    assert store.query(limit=0) == [] and store.query(kind=REFLECTION) == []
+
+
+def test_retention_is_bounded_but_counters_are_lifetime():
+    store = filled_store(limit=6, per_type_limit=2)
+    assert len(store) == 6 and [e.ts for e in store] == [4.0, 5.0, 6.0, 7.0, 8.0, 9.0]
+    assert [e.ts for e in store.query(kind=STIMULATE)] == [7.0, 9.0]
+    assert store.count() == 10 and store.count(CHAT) == 5
+    assert store.counts() == {"chat": 5, "soft_reset": 0, "reflection": 0, "stimulate": 5}
+
+    store.clear()
+    assert len(store) == 0 and store.count() == 10
+
+    store.restore([MemoryEvent(CHAT, "restored", ts=1.0)], {"chat": 7, "stimulate": 2})
+    assert [e.event for e in store] == ["restored"] and store.count() == 9 and store.count(CHAT) == 7
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client over a fresh event store, without the background threads"""
+    monkeypatch.setattr(eden, "_started_pid", os.getpid())
+    monkeypatch.setattr(eden.orchestrator, "memory", filled_store())
+    return eden.app.test_client()
+
+
+def test_memory_events_route_filters_and_streams_ndjson(client):
+    body = client.get("/api/memory/events?type=stimulate&since=4&limit=2").json
+    assert body["ok"] and body["count"] == 2 and body["total"] == 10
+    assert [e["event"] for e in body["events"]] == ["event 7", "event 9"]
+    assert body["events"][0]["api_call"] is True
+    assert body["counts"]["chat"] == 5
+
+    response = client.get("/api/memory/events?type=chat&until=4", headers={"Accept": "application/x-ndjson"})
+    assert response.mimetype == "application/x-ndjson" and response.headers["X-Total-Count"] == "10"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["event"] for line in lines] == ["event 0", "event 2", "event 4"]
+    assert client.get("/api/memory/events?format=ndjson&limit=1").get_data(as_text=True).count("\n") == 1
+
+    assert client.get("/api/memory/events?type=bogus").status_code == 400
+    assert client.get("/api/memory/events?since=not-a-date").status_code == 400
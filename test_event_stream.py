@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Event Stream Test
+Checks snapshot deltas, the frame each client is sent (delta when one
+version behind, full snapshot otherwise), resume tokens, subscriber
+counting and the cap on concurrent stream clients
+"""
+import json
+import os
+
+import EDEN_SCRIPT as eden
+from event_stream import ClientLimit, SnapshotBroadcaster, diff, flatten
+
+
+def parse(frame):
+    """(id, event, data) of one SSE frame"""
+    fields = dict(line.split(": ", 1) for line in frame.decode().strip().splitlines())
+    return fields["id"], fields["event"], json.loads(fields["data"])
+
+
+def apply(flat, delta):
+    """What a client does with a delta frame"""
+    flat = {path: value for path, value in flat.items() if path not in delta["unset"]}
+    flat.update(delta["set"])
+    return flat
+
+
+def snapshot(version, **extra):
+    return {"system_snapshot": {"version": version, "metrics": {"agency": version / 10}, **extra}}
+
+
+def test_delta_rebuilds_the_next_snapshot():
+    before = snapshot(1, alert="probe", tags=["a"])
+    after = snapshot(2, tags=["a", "b"])
+    delta = diff(flatten(before), flatten(after))
+    assert delta == {"set": {"system_snapshot.version": 2, "system_snapshot.metrics.agency": 0.2,
+                             "system_snapshot.tags": ["a", "b"]},
+                     "unset": ["system_snapshot.alert"]}
+    assert apply(flatten(before), delta) == flatten(after)
+    assert flatten({"empty": {}, "none": None}) == {"empty": {}, "none": None}
+
+
+def test_clients_get_deltas_in_step_and_full_frames_after_a_gap():
+    stream = SnapshotBroadcaster()
+    stream.publish(1, snapshot(1))
+    client = stream.stream()
+    assert next(client) == b"retry: 3000\n\n"
+    token, event, data = parse(next(client))
+    assert event == "snapshot" and data == snapshot(1) and stream.subscriber_count == 1
+    state = flatten(data)
+
+    stream.publish(2, snapshot(2))
+    token, event, data = parse(next(client))
+    assert event == "delta" and token.endswith("-2")
+    state = apply(state, data)
+    assert state == flatten(snapshot(2))
+
+    # A slow client skips straight to the newest full snapshot
+    stream.publish(3, snapshot(3))
+    stream.publish(4, snapshot(4))
+    _, event, data = parse(next(client))
+    assert event == "snapshot" and data == snapshot(4)
+
+    client.close()
+    assert stream.subscriber_count == 0
+    assert stream.next_frame(4, timeout=0.01) is None
+
+
+def test_resume_tokens_only_count_within_one_stream():
+    stream = SnapshotBroadcaster()
+    stream.publish(1, snapshot(1))
+    stream.publish(2, snapshot(2))
+
+    resumed = stream.stream(f"{stream.stream_id}-1")
+    next(resumed)
+    assert parse(next(resumed))[1] == "delta"
+
+    # A token from another process (or garbage) starts from a full snapshot
+    for token in ("deadbeef-1", f"{stream.stream_id}-x", ""):
+        fresh = stream.stream(token)
+        next(fresh)
+        assert parse(next(fresh))[1] == "snapshot"
+        fresh.close()
+    resumed.close()
+
+
+def test_stream_route_turns_clients_away_over_the_cap(monkeypatch):
+    monkeypatch.setattr(eden, "_started_pid", os.getpid())
+    monkeypatch.setattr(eden, "stream_clients", ClientLimit(1))
+    client = eden.app.test_client()
+
+    first = client.get("/api/system/stream", buffered=False)
+    assert first.status_code == 200 and first.mimetype == "text/event-stream"
+    refused = client.get("/api/system/stream")
+    assert refused.status_code == 503 and refused.headers["Retry-After"] == "5"
+    assert eden.stream_clients.active == 1 and eden.stream_clients.rejected == 1
+
+    # Disconnecting frees the slot
+    first.close()
+    assert eden.stream_clients.active == 0
+    second = client.get("/api/system/stream", buffered=False)
+    assert second.status_code == 200
+    second.close()
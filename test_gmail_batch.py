@@ -0,0 +1,785 @@
+#!/usr/bin/env python3
+"""
+Gmail Batch Test
+Runs GmailService against a local fake of the Gmail REST and batch endpoints
+and checks chunking, ordering, per-item errors, selective retries, the
+concurrent fetch executor, the message cache, the mailbox mirror, the
+local search index, exports, bulk label changes/deletes and the outbound
+mail queue
+"""
+import base64
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from collections import Counter
+from email.parser import BytesParser
+from email.utils import formatdate
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import googleapiclient
+import httplib2
+import pytest
+from flask import Flask
+from googleapiclient.discovery import build_from_document
+
+import gmail_batch
+import gmail_bulk
+import gmail_outbox
+import gmail_service
+from gmail_cache import MessageCache
+from gmail_executor import FetchExecutor, QuotaBucket
+from gmail_mirror import MailboxMirror
+from gmail_outbox import Outbox
+from gmail_search import SearchIndex
+from gmail_service import GmailService
+
+
+DISCOVERY = os.path.join(os.path.dirname(googleapiclient.__file__),
+                         "discovery_cache", "documents", "gmail.v1.json")
+PREFIX = "/gmail/v1/users/me/"
+
+
+def fake_message(message_id, labels=("INBOX", "UNREAD"), internal_date=0, subject=None,
+                 sender="sender@example.com", attachment=False):
+    body = base64.urlsafe_b64encode(f"Body of {message_id}".encode()).decode()
+    message = {
+        "id": message_id, "threadId": f"t-{message_id}", "snippet": message_id,
+        "labelIds": list(labels), "internalDate": str(internal_date),
+        "payload": {
+            "headers": [{"name": "Subject", "value": subject or f"Subject {message_id}"},
+                        {"name": "From", "value": sender},
+                        {"name": "Date", "value": formatdate(internal_date / 1000)}],
+            "body": {"data": body}
+        }
+    }
+    if attachment:
+        message["payload"] = {
+            "headers": message["payload"]["headers"], "mimeType": "multipart/mixed",
+            "parts": [{"mimeType": "text/plain", "body": {"data": body}},
+                      {"mimeType": "application/pdf", "filename": "invoice.pdf", "body": {}}]
+        }
+    return message
+
+
+class FakeGmail:
+    """In-memory mailbox plus scripted failures"""
+
+    def __init__(self, message_ids):
+        self.message_ids = list(message_ids)
+        self.fail_once = {}        # message id -> status returned on its first get
+        self.fail_always = {}      # message id -> status returned on every get
+        self.batch_failures = []   # statuses returned for whole batches, in order
+        self.gets = Counter()
+        self.batch_sizes = []
+        self.queries = []
+        self.lock = threading.Lock()
+        self.labels = {message_id: ["INBOX", "UNREAD"] for message_id in self.message_ids}
+        # One message a day, m000 the newest (internalDate is in milliseconds)
+        self.dates = {message_id: (1_700_000_000 - i * 86400) * 1000
+                      for i, message_id in enumerate(self.message_ids)}
+        self.subjects = {}
+        self.label_gets = 0
+        self.pages = []
+        self.bulk_calls = []
+        self.bulk_failures = []
+        self.sent = []
+        self.send_failures = []
+        self.senders = {}
+        self.attachments = set()
+        self.history = []          # (history id, history record)
+        self.history_id = 100
+        self.history_floor = 0     # older startHistoryIds get a 404
+
+    def add_message(self, message_id, labels):
+        """Deliver a new (newest) message and record it in history"""
+        self.message_ids.insert(0, message_id)
+        self.labels[message_id] = list(labels)
+        self.dates[message_id] = max(self.dates.values()) + 1000
+        self.record({"messagesAdded": [{"message": {"id": message_id, "threadId": f"t-{message_id}",
+                                                    "labelIds": list(labels)}}]})
+
+    def relabel(self, message_id, add=(), remove=()):
+        self.labels[message_id] = [l for l in self.labels[message_id] if l not in remove] + list(add)
+        change = {}
+        if add:
+            change["labelsAdded"] = [{"message": {"id": message_id}, "labelIds": list(add)}]
+        if remove:
+            change["labelsRemoved"] = [{"message": {"id": message_id}, "labelIds": list(remove)}]
+        self.record(change)
+
+    def delete(self, message_id):
+        self.message_ids.remove(message_id)
+        del self.labels[message_id]
+        self.record({"messagesDeleted": [{"message": {"id": message_id}}]})
+
+    def record(self, change):
+        self.history_id += 1
+        self.history.append((self.history_id, dict(change, id=str(self.history_id))))
+
+    def answer(self, method, target, body=None):
+        """(status, payload) for one REST call"""
+        url = urlparse(target)
+        path = url.path[len(PREFIX):]
+        query = parse_qs(url.query)
+        if method == "GET" and path == "profile":
+            return 200, {"emailAddress": "me@example.com", "messagesTotal": len(self.message_ids),
+                         "threadsTotal": len(self.message_ids), "historyId": str(self.history_id)}
+        if method == "GET" and path == "messages":
+            limit = int(query.get("maxResults", ["100"])[0])
+            offset = int(query.get("pageToken", ["0"])[0])
+            self.pages.append((offset, limit))
+            ids = self.message_ids[offset:offset + limit]
+            page = {"messages": [{"id": i, "threadId": f"t-{i}"} for i in ids],
+                    "resultSizeEstimate": len(self.message_ids)}
+            if offset + limit < len(self.message_ids):
+                page["nextPageToken"] = str(offset + limit)
+            return 200, page
+        if method == "GET" and path == "labels":
+            return 200, {"labels": [{"id": "INBOX", "name": "INBOX"}, {"id": "UNREAD", "name": "UNREAD"},
+                                    {"id": "Label_7", "name": "Work Stuff"}]}
+        if method == "GET" and path.startswith("labels/"):
+            label = path.split("/", 1)[1]
+            with self.lock:
+                self.label_gets += 1
+            tagged = [labels for labels in self.labels.values() if label in labels]
+            return 200, {"id": label, "name": label, "type": "system",
+                         "messagesTotal": len(tagged), "threadsTotal": len(tagged),
+                         "messagesUnread": sum("UNREAD" in labels for labels in tagged)}
+        if method == "GET" and path == "history":
+            start = int(query["startHistoryId"][0])
+            if start < self.history_floor:
+                return 404, {"error": {"code": 404}}
+            return 200, {"history": [record for hid, record in self.history if hid > start],
+                         "historyId": str(self.history_id)}
+        if method == "POST" and path == "messages/send":
+            with self.lock:
+                failure = self.send_failures.pop(0) if self.send_failures else None
+                if failure:
+                    return failure, {"error": {"code": failure}}
+                self.sent.append(base64.urlsafe_b64decode(body["raw"]))
+                sent_id = f"s{len(self.sent):03d}"
+            return 200, {"id": sent_id, "threadId": f"t-{sent_id}", "labelIds": ["SENT"]}
+        if method == "POST" and path == "messages/batchModify":
+            with self.lock:
+                failure = self.bulk_failures.pop(0) if self.bulk_failures else None
+            self.bulk_calls.append((path, len(body["ids"])))
+            if failure:
+                return failure, {"error": {"code": failure}}
+            for message_id in body["ids"]:
+                if message_id in self.message_ids:
+                    self.relabel(message_id, body.get("addLabelIds", []),
+                                 body.get("removeLabelIds", []))
+            return 204, None
+        if method == "POST" and path.startswith("messages/") and path.endswith("/modify"):
+            message_id = path.split("/")[1]
+            if message_id not in self.message_ids:
+                return 404, {"error": {"code": 404}}
+            self.relabel(message_id, body.get("addLabelIds", []), body.get("removeLabelIds", []))
+            return 200, {"id": message_id, "labelIds": self.labels[message_id]}
+        if method == "GET" and path.startswith("messages/"):
+            message_id = path.split("/", 1)[1]
+            with self.lock:
+                self.gets[message_id] += 1
+                first = self.gets[message_id] == 1
+            if message_id in self.fail_always:
+                return self.fail_always[message_id], {"error": {"code": self.fail_always[message_id]}}
+            if first and message_id in self.fail_once:
+                return self.fail_once[message_id], {"error": {"code": self.fail_once[message_id]}}
+            if message_id not in self.message_ids:
+                return 404, {"error": {"code": 404}}
+            self.queries.append(query)
+            message = fake_message(message_id, self.labels[message_id], self.dates[message_id],
+                                   self.subjects.get(message_id),
+                                   self.senders.get(message_id, "sender@example.com"),
+                                   message_id in self.attachments)
+            message_format = query.get("format", ["full"])[0]
+            if message_format == "minimal":
+                del message["payload"]
+            elif message_format == "metadata":
+                message["payload"] = {"headers": message["payload"]["headers"]}
+            return 200, message
+        return 404, {"error": {"code": 404}}
+
+
+REASONS = {200: "OK", 404: "Not Found", 429: "Too Many Requests", 503: "Service Unavailable"}
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body, content_type):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            status, payload = fake.answer("GET", self.path)
+            self._send(status, json.dumps(payload).encode(), "application/json")
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers["Content-Length"]))
+            if urlparse(self.path).path != "/batch":
+                status, payload = fake.answer("POST", self.path, json.loads(raw or b"{}"))
+                body = json.dumps(payload).encode() if payload is not None else b""
+                return self._send(status, body, "application/json")
+            with fake.lock:
+                failure = fake.batch_failures.pop(0) if fake.batch_failures else None
+            if failure:
+                return self._send(failure, b'{"error": {}}', "application/json")
+
+            envelope = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + raw
+            parts = BytesParser(policy=HTTP).parsebytes(envelope).get_payload()
+            fake.batch_sizes.append(len(parts))
+            boundary = "batch_response_boundary"
+            chunks = []
+            for part in parts:
+                request_line = part.get_payload().strip().splitlines()[0]
+                method, target, _ = request_line.split(" ")
+                status, payload = fake.answer(method, target)
+                content_id = part["Content-ID"].replace("<", "<response-", 1)
+                chunks.append(
+                    f"--{boundary}\r\nContent-Type: application/http\r\n"
+                    f"Content-ID: {content_id}\r\n\r\n"
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: application/json; charset=UTF-8\r\n\r\n"
+                    f"{json.dumps(payload)}\r\n"
+                )
+            body = ("".join(chunks) + f"--{boundary}--\r\n").encode()
+            self._send(200, body, f"multipart/mixed; boundary={boundary}")
+
+    return Handler
+
+
+@pytest.fixture
+def gmail():
+    """GmailService wired to a fake Gmail server; yields (service, fake)"""
+    fake = FakeGmail([f"m{i:03d}" for i in range(120)])
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(fake))
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    with open(DISCOVERY) as f:
+        document = json.load(f)
+    document["rootUrl"] = f"http://127.0.0.1:{server.server_address[1]}/"
+    service = GmailService(cache_file=None, outbox_file=None)
+    service.service = build_from_document(document, http=httplib2.Http())
+    service.document = document
+    try:
+        yield service, fake
+    finally:
+        if service.executor is not None:
+            service.executor.shutdown()
+        server.shutdown()
+        server.server_close()
+
+
+def attach_executor(service, max_workers=4):
+    """Give the service a FetchExecutor whose threads each build their own client"""
+    clients = []
+
+    def factory():
+        client = build_from_document(service.document, http=httplib2.Http())
+        clients.append((threading.get_ident(), client))
+        return client
+
+    service.executor = FetchExecutor(factory, max_workers=max_workers,
+                                     quota=QuotaBucket(rate=1e6))
+    return clients
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(gmail_batch, "RETRY_BACKOFF", 0.0)
+
+
+def test_get_messages_chunks_and_keeps_order(gmail):
+    service, fake = gmail
+    messages = service.get_messages(max_results=120)
+
+    assert [m["id"] for m in messages] == fake.message_ids
+    assert messages[0]["subject"] == "Subject m000"
+    assert messages[0]["body"] == "Body of m000"
+    assert fake.batch_sizes == [50, 50, 20]
+    assert set(fake.gets.values()) == {1}
+
+
+def test_only_failed_items_are_retried(gmail):
+    service, fake = gmail
+    fake.fail_once = {"m001": 429, "m004": 503}
+    fake.fail_always = {"m002": 404}
+
+    messages = service.search_messages("is:unread", max_results=6)
+
+    assert [m["id"] for m in messages] == ["m000", "m001", "m003", "m004", "m005"]
+    assert fake.batch_sizes == [6, 2]
+    assert fake.gets["m001"] == fake.gets["m004"] == 2
+    assert fake.gets["m002"] == 1
+    assert fake.gets["m000"] == 1
+
+
+def test_retries_stop_after_max_attempts(gmail):
+    service, fake = gmail
+    fake.fail_always = {"m000": 503}
+    users = service.service.users().messages()
+
+    result = gmail_batch.execute_batch(
+        service.service, ["m000", "m001"],
+        lambda i: users.get(userId="me", id=i), method="messages.get", max_attempts=3
+    )
+
+    assert list(result.results) == ["m001"]
+    assert gmail_batch.error_status(result.errors["m000"]) == 503
+    assert fake.gets["m000"] == 3 and fake.gets["m001"] == 1
+
+
+def test_failed_batch_is_resent(gmail):
+    service, fake = gmail
+    fake.batch_failures = [503]
+
+    messages = service.get_messages(max_results=3)
+
+    assert [m["id"] for m in messages] == ["m000", "m001", "m002"]
+    assert fake.batch_sizes == [3]
+
+
+def test_stats_read_label_counters_in_one_batch_and_are_cached(gmail):
+    service, fake = gmail
+    fake.labels["m001"] = ["INBOX", "STARRED"]
+    fake.labels["m002"] = ["STARRED", "UNREAD"]
+    stats = service.get_stats()
+
+    assert stats == {"email": "me@example.com", "total_messages": 120, "total_threads": 120,
+                     "unread_count": 119, "starred_count": 2, "inbox_count": 119,
+                     "inbox_unread": 118}
+    assert fake.batch_sizes == [4] and fake.label_gets == 3
+    assert not fake.queries
+
+    # Served from the snapshot until it expires or a modify drops it
+    assert service.get_stats() == stats
+    assert fake.batch_sizes == [4]
+    assert service.mark_as_read("m003")
+    assert service.get_stats()["unread_count"] == 118
+    assert service.get_stats(max_age=0)["inbox_unread"] == 117
+    assert fake.batch_sizes == [4, 4, 4]
+
+
+def test_executor_sends_batches_in_parallel_and_keeps_order(gmail):
+    service, fake = gmail
+    clients = attach_executor(service)
+
+    messages = service.get_messages(max_results=120)
+
+    assert [m["id"] for m in messages] == fake.message_ids
+    assert sorted(fake.batch_sizes) == [20, 50, 50]
+    threads = [ident for ident, _ in clients]
+    assert len(threads) == len(set(threads))
+    assert service.executor.stats()["methods"]["batch:messages.get"]["calls"] == 3
+
+
+class SharedClient:
+    """Stands in for the shared service; request paths must not touch it"""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"shared Gmail client used for {name}")
+
+
+def test_request_paths_use_per_thread_clients(gmail):
+    service, fake = gmail
+    clients = attach_executor(service, max_workers=2)
+    service.service = SharedClient()
+    errors = []
+
+    def request_thread():
+        try:
+            assert len(service.get_messages(max_results=5, format="minimal")) == 5
+            assert service.get_message("m001", format="minimal")["id"] == "m001"
+            assert service.get_stats(max_age=0)["total_messages"] == 120
+            assert service.get_user_profile()["email"] == "me@example.com"
+            assert service.get_labels()
+            assert service.mark_as_read("m002") and service.archive_message("m003")
+            assert service.bulk_modify(message_ids=["m004"], add_labels=["STARRED"])["succeeded"] == 1
+            assert service.send_email("a@example.com", "Hi", "Hello")["success"]
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=request_thread) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    request_threads = {thread.ident for thread in threads}
+    assert request_threads <= {ident for ident, _ in clients}
+
+
+def test_quota_bucket_paces_calls():
+    bucket = QuotaBucket(rate=100, burst=10)
+    started = time.monotonic()
+    for _ in range(4):
+        bucket.acquire(5)
+    # 20 units from a burst of 10 needs ~0.1s of refill
+    assert time.monotonic() - started >= 0.08
+
+
+def test_metadata_listing_skips_bodies(gmail):
+    service, fake = gmail
+    messages = service.get_messages(max_results=2, format="metadata")
+
+    assert messages[0]["subject"] == "Subject m000"
+    assert "body" not in messages[0]
+    assert fake.queries[0]["format"] == ["metadata"]
+    assert fake.queries[0]["metadataHeaders"] == gmail_service.METADATA_HEADERS
+    assert fake.queries[0]["fields"] == ["id,threadId,labelIds,snippet,payload/headers"]
+
+    minimal = service.get_messages(max_results=1, format="minimal", fields="labelIds")
+    assert minimal == [{"id": "m000", "threadId": "t-m000", "snippet": "m000",
+                        "labels": ["INBOX", "UNREAD"]}]
+    assert fake.queries[-1]["fields"] == ["id,labelIds"]
+
+    with pytest.raises(ValueError):
+        service.get_messages(format="raw")
+
+
+def test_message_route_loads_one_body(gmail, monkeypatch):
+    service, fake = gmail
+    monkeypatch.setattr(gmail_service, "_gmail_service_instance", service)
+    from gmail_routes import gmail_bp
+    app = Flask(__name__)
+    app.register_blueprint(gmail_bp)
+    client = app.test_client()
+
+    response = client.get("/api/gmail/messages/m007")
+    assert response.json["message"]["body"] == "Body of m007"
+    assert client.get("/api/gmail/messages/nope").status_code == 404
+    assert client.get("/api/gmail/messages?format=raw").status_code == 400
+    listing = client.get("/api/gmail/messages?max_results=3&format=metadata").json
+    assert [m["id"] for m in listing["messages"]] == ["m000", "m001", "m002"]
+
+
+def test_cache_serves_repeat_views_and_refreshes_stale_labels(gmail, tmp_path):
+    service, fake = gmail
+    service.cache = MessageCache(str(tmp_path / "cache.db"), label_ttl=60)
+
+    first = service.get_messages(max_results=5)
+    assert fake.gets["m000"] == 1
+    again = service.get_messages(max_results=5)
+    assert again == first
+    assert fake.gets["m000"] == 1
+    # A lesser format is answered from richer cached content
+    assert service.get_messages(max_results=5, format="metadata")[0]["subject"] == "Subject m000"
+    assert service.get_message("m003")["body"] == "Body of m003"
+    assert fake.gets["m003"] == 1
+
+    service.cache.label_ttl = 0
+    time.sleep(0.01)
+    assert service.get_messages(max_results=5) == first
+    assert fake.queries[-1]["format"] == ["minimal"]
+    assert fake.queries[-1]["fields"] == ["id,labelIds"]
+
+    stats = service.cache.stats()
+    assert stats["entries"] == 5
+    assert stats["misses"] == 5 and stats["hits"] == 11 and stats["stale_labels"] == 5
+    assert stats["bytes_saved"] > 0
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = MessageCache(str(tmp_path / "cache.db"), max_bytes=1000)
+    for i in range(10):
+        cache.store([{"id": f"m{i}", "threadId": "t", "body": "x" * 200, "labels": []}])
+        time.sleep(0.001)
+    stats = cache.stats()
+    assert stats["bytes"] <= 1000 and stats["evicted"] > 0
+    found, _, missing = cache.lookup(["m0", "m9"])
+    assert list(found) == ["m9"] and missing == ["m0"]
+
+
+def test_cache_keeps_running_totals_and_chunks_large_lookups(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = MessageCache(path)
+    cache.store([{"id": f"m{i}", "threadId": "t", "labels": []} for i in range(1200)], "minimal")
+    cache.store([{"id": "m0", "threadId": "t", "body": "x" * 100, "labels": []}])
+    cache.discard(["m1", "m2"])
+
+    def scanned():
+        return cache._connection().execute(
+            "SELECT COUNT(*), SUM(size) FROM messages").fetchone()
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"]) == scanned() and stats["entries"] == 1198
+
+    # Far more ids than one query may bind
+    ids = [f"m{i}" for i in range(1200)] + [f"x{i}" for i in range(1000)]
+    found, _, missing = cache.lookup(ids, "minimal")
+    assert len(found) == 1198 and missing == ["m1", "m2"] + ids[1200:]
+
+    # A cache file from before the totals table is seeded on first open
+    cache._connection().executescript("DROP TABLE messages_total")
+    reopened = MessageCache(path)
+    assert (reopened.stats()["entries"], reopened.stats()["bytes"]) == scanned()
+
+
+def test_mirror_syncs_history_and_serves_label_queries(gmail, tmp_path, monkeypatch):
+    service, fake = gmail
+    attach_executor(service)
+    path = str(tmp_path / "gmail.db")
+    service.cache = MessageCache(path)
+    service.mirror = MailboxMirror(service, path, interval=3600)
+    fake.labels["m001"] = ["INBOX"]
+    fake.labels["m002"] = ["INBOX", "STARRED"]
+
+    # Not synced yet: the caller falls back to the API while the loop syncs
+    assert service.get_messages_from_mirror("is:unread", 3, max_age=60) is None
+    deadline = time.monotonic() + 10
+    while service.mirror.age() is None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert service.mirror.syncs == {"full": 1, "incremental": 0}
+
+    listed = service.get_messages_from_mirror("is:unread", 3, format="metadata", max_age=60)
+    assert [m["id"] for m in listed] == ["m000", "m003", "m004"]
+    assert service.get_messages_from_mirror("from:bob", 3, max_age=60) is None
+    assert service.get_messages_from_mirror("label:work-stuff", 3, max_age=60) == []
+
+    fake.add_message("new1", ["INBOX", "UNREAD"])
+    fake.relabel("m000", remove=["UNREAD"])
+    fake.relabel("m005", add=["STARRED"])
+    fake.delete("m003")
+    listed = service.get_messages_from_mirror("is:unread", 3, format="minimal", max_age=0)
+    assert [m["id"] for m in listed] == ["new1", "m004", "m005"]
+    assert listed[0]["labels"] == ["INBOX", "UNREAD"]
+    assert service.mirror.syncs["incremental"] == 1
+
+    stats = service.get_stats_from_mirror(max_age=60)
+    assert stats["unread_count"] == 117 and stats["starred_count"] == 2
+    assert stats["total_messages"] == 120
+
+    monkeypatch.setattr(gmail_service, "_gmail_service_instance", service)
+    from gmail_routes import gmail_bp
+    app = Flask(__name__)
+    app.register_blueprint(gmail_bp)
+    response = app.test_client().get("/api/gmail/stats?max_age=60").json
+    assert response["source"] == "mirror" and response["stats"] == stats
+
+    # History older than Gmail keeps forces a fresh full sync
+    fake.history_floor = 10 ** 9
+    assert service.mirror.sync()["mode"] == "full"
+    service.mirror.stop()
+
+
+def test_local_search_translates_operators_and_pages(gmail, tmp_path, monkeypatch):
+    service, fake = gmail
+    attach_executor(service)
+    path = str(tmp_path / "gmail.db")
+    service.cache = MessageCache(path)
+    service.mirror = MailboxMirror(service, path, interval=3600)
+    service.search_index = SearchIndex(path)
+    monkeypatch.setattr(service.mirror, "start", lambda: None)
+    fake.subjects.update({"m010": "Quarterly invoice", "m020": "Invoice reminder"})
+    fake.senders.update({"m010": "Billing <billing@shop.example>",
+                         "m020": "Billing <billing@shop.example>"})
+    fake.attachments.add("m020")
+    fake.labels["m020"] = ["INBOX"]
+
+    service.mirror.sync()
+    # The index does not cover the mirror yet, so Gmail answers
+    assert service.search_local("invoice", max_age=60) is None
+    assert service.backfill_search_index() == 120
+    assert service.search_index.unindexed() == []
+
+    def ids(query, **kwargs):
+        messages, _ = service.search_local(query, max_age=60, format="metadata", **kwargs)
+        return [m["id"] for m in messages]
+
+    assert ids("invoice") == ["m010", "m020"]
+    assert ids("from:billing@shop.example has:attachment") == ["m020"]
+    assert ids("invoice is:unread") == ["m010"]
+    assert ids("invoice -reminder") == ["m010"]
+    assert ids("subject:quarterly") == ["m010"]
+    day = datetime.fromtimestamp(fake.dates["m015"] / 1000).strftime("%Y/%m/%d")
+    assert ids(f"after:{day} from:billing") == ["m010"]
+    assert ids(f"before:{day} invoice") == ["m020"]
+    assert service.search_local("from:bob OR from:alice", max_age=60) is None
+    assert service.search_local("larger:5M", max_age=60) is None
+
+    # Indexed through an ordinary fetch but not mirrored: never a local hit,
+    # and its cached labels are left alone
+    service.remember([{"id": "x001", "threadId": "t-x001", "snippet": "", "subject": "Invoice copy",
+                       "from": "billing@shop.example", "to": "", "date": "",
+                       "labels": ["INBOX", "STARRED"]}], "metadata")
+    assert ids("invoice") == ["m010", "m020"]
+    assert service.cache.lookup(["x001"], "metadata")[0]["x001"]["labels"] == ["INBOX", "STARRED"]
+
+    seen, token, pages = [], None, 0
+    while True:
+        messages, token = service.search_local("body", max_results=50, page_token=token,
+                                               format="minimal", max_age=60, order="date")
+        seen += [m["id"] for m in messages]
+        pages += 1
+        if token is None:
+            break
+    assert pages == 3 and seen == fake.message_ids
+    assert service.search_index.stats()["avg_ms"] < 50
+
+    # A mirror capped below the mailbox size cannot answer for all of it
+    monkeypatch.setattr(service.mirror, "complete", lambda: False)
+    assert service.search_local("invoice", max_age=60) is None
+    monkeypatch.delattr(service.mirror, "complete")
+
+    monkeypatch.setattr(gmail_service, "_gmail_service_instance", service)
+    from gmail_routes import gmail_bp
+    app = Flask(__name__)
+    app.register_blueprint(gmail_bp)
+    response = app.test_client().post("/api/gmail/messages/search", json={
+        "query": "invoice", "max_results": 1, "max_age": 60, "format": "metadata"}).json
+    assert response["source"] == "index"
+    assert [m["id"] for m in response["messages"]] == ["m010"]
+    assert response["next_page_token"] == "1"
+
+
+def test_listing_follows_next_page_token(gmail, monkeypatch):
+    service, fake = gmail
+    monkeypatch.setattr(gmail_service, "GMAIL_PAGE_SIZE", 50)
+
+    messages = service.get_messages(max_results=110, format="minimal")
+
+    assert [m["id"] for m in messages] == fake.message_ids[:110]
+    assert fake.pages == [(0, 50), (50, 50), (100, 10)]
+
+
+def test_export_streams_ndjson_and_resumes_from_cursor(gmail, monkeypatch):
+    service, fake = gmail
+    monkeypatch.setattr(gmail_service, "GMAIL_PAGE_SIZE", 50)
+    monkeypatch.setattr(gmail_service, "_gmail_service_instance", service)
+    fake.fail_always = {"m010": 404}
+    from gmail_routes import gmail_bp
+    app = Flask(__name__)
+    app.register_blueprint(gmail_bp)
+    client = app.test_client()
+
+    response = client.get("/api/gmail/messages/export?format=minimal&limit=70")
+    assert response.mimetype == "application/x-ndjson"
+    first = [json.loads(line) for line in response.data.splitlines()]
+    assert len(first) == 70 and "m010" not in [m["id"] for m in first]
+    assert first[-1]["id"] == "m070" and first[-1]["cursor"] == "21:50"
+    assert first[48]["cursor"] == "0:50"
+
+    response = client.get(f"/api/gmail/messages/export?format=minimal&cursor={first[-1]['cursor']}")
+    rest = [json.loads(line) for line in response.data.splitlines()]
+    assert [m["id"] for m in first + rest] == [i for i in fake.message_ids if i != "m010"]
+    assert rest[-1]["cursor"] is None
+    assert fake.pages == [(0, 50), (50, 50), (50, 50), (100, 50)]
+
+    assert client.get("/api/gmail/messages/export?cursor=bogus").status_code == 400
+    # Fixed /messages/ routes answer a wrong method with 405, not a message lookup
+    assert client.get("/api/gmail/messages/search").status_code == 405
+    assert client.post("/api/gmail/messages/export").status_code == 405
+    assert client.delete("/api/gmail/messages/bulk/delete").status_code == 405
+
+
+def test_bulk_modify_and_trash_chunk_pace_and_retry(gmail, tmp_path, monkeypatch):
+    service, fake = gmail
+    monkeypatch.setattr(gmail_bulk, "GMAIL_BULK_CHUNK", 50)
+    monkeypatch.setattr(gmail_bulk, "RETRY_BACKOFF", 0)
+    service.cache = MessageCache(str(tmp_path / "gmail.db"))
+    service.get_messages_by_id(["m000", "m119"], format="metadata")
+    # 200 units of batchModify against a 100-unit burst refilled at 1000/s
+    service.quota = QuotaBucket(rate=1000, burst=100)
+    fake.bulk_failures = [429]
+
+    started = time.monotonic()
+    result = service.bulk_modify(query="is:unread", remove_labels=["UNREAD"])
+    assert time.monotonic() - started >= 0.09
+
+    assert result["matched"] == 120 and result["succeeded"] == 120 and result["failed"] == 0
+    assert [(c["size"], c["attempts"]) for c in result["chunks"]] == [(50, 2), (50, 1), (20, 1)]
+    assert fake.bulk_calls == [("messages/batchModify", 50)] * 3 + [("messages/batchModify", 20)]
+    assert all(labels == ["INBOX"] for labels in fake.labels.values())
+    # Label state the cache held for the changed messages is gone
+    _, stale, _ = service.cache.lookup(["m000", "m119"], "metadata")
+    assert stale == ["m000", "m119"]
+
+    monkeypatch.setattr(gmail_service, "_gmail_service_instance", service)
+    from gmail_routes import gmail_bp
+    app = Flask(__name__)
+    app.register_blueprint(gmail_bp)
+    client = app.test_client()
+
+    fake.bulk_failures = [503] * 4
+    response = client.post("/api/gmail/messages/bulk/delete",
+                           json={"ids": fake.message_ids[:60] + ["m000"]})
+    assert response.status_code == 207
+    body = response.json
+    assert body["matched"] == 60 and body["succeeded"] == 10 and body["failed"] == 50
+    assert [c["ok"] for c in body["chunks"]] == [False, True]
+    # Deleting only moves to Trash; nothing leaves the mailbox
+    assert fake.bulk_calls[-2:] == [("messages/batchModify", 50), ("messages/batchModify", 10)]
+    assert "m050" in fake.message_ids and fake.labels["m050"] == ["INBOX", "TRASH"]
+    assert fake.labels["m000"] == ["INBOX"]
+    assert service.cache.lookup(["m000"], "minimal")[0]
+
+    response = client.post("/api/gmail/messages/bulk/modify", json={"ids": ["m001"], "action": "star"})
+    assert response.status_code == 200 and fake.labels["m001"] == ["INBOX", "STARRED"]
+    assert client.post("/api/gmail/messages/bulk/delete",
+                       json={"ids": ["m001"], "query": "in:spam"}).status_code == 400
+    assert client.post("/api/gmail/messages/bulk/modify",
+                       json={"query": "in:inbox", "action": "explode"}).status_code == 400
+
+
+def test_outbox_queues_sends_retries_and_dedupes(gmail, tmp_path, monkeypatch):
+    service, fake = gmail
+    attach_executor(service)
+    monkeypatch.setattr(gmail_outbox, "OUTBOX_BACKOFF", 0.01)
+    monkeypatch.setattr(gmail_outbox, "OUTBOX_POLL", 0.02)
+    service.outbox = Outbox(service, str(tmp_path / "outbox.db"), workers=2)
+    monkeypatch.setattr(gmail_service, "_gmail_service_instance", service)
+    from gmail_routes import gmail_bp
+    app = Flask(__name__)
+    app.register_blueprint(gmail_bp)
+    client = app.test_client()
+
+    def wait_for(job_id, status):
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            job = client.get(f"/api/gmail/outbox/{job_id}").json["job"]
+            if job["status"] == status:
+                return job
+            time.sleep(0.02)
+        raise AssertionError(f"job {job_id} stuck in {job['status']}")
+
+    try:
+        fake.send_failures = [429, 503]
+        message = {"to": "a@example.com", "subject": "Hi", "body": "Hello there"}
+        response = client.post("/api/gmail/messages/send", json=message,
+                               headers={"Idempotency-Key": "order-42"})
+        assert response.status_code == 202
+        job_id = response.json["job"]["id"]
+        assert response.json["status_url"] == f"/api/gmail/outbox/{job_id}"
+
+        again = client.post("/api/gmail/messages/send", json=message,
+                            headers={"Idempotency-Key": "order-42"})
+        assert again.status_code == 200 and again.json["duplicate"]
+        assert again.json["job"]["id"] == job_id
+
+        job = wait_for(job_id, "sent")
+        assert job["attempts"] == 3 and job["message_id"] == "s001" and job["last_error"] is None
+        assert len(fake.sent) == 1 and b"Hello there" in fake.sent[0]
+
+        fake.send_failures = [400]
+        response = client.post("/api/gmail/messages/send", json=dict(message, subject="Bad"))
+        job = wait_for(response.json["job"]["id"], "failed")
+        assert job["attempts"] == 1 and "400" in job["last_error"]
+        assert len(fake.sent) == 1
+
+        stats = service.outbox.stats()
+        assert stats["sent"] == 1 and stats["failed"] == 1 and stats["queued"] == 0
+        assert client.get("/api/gmail/outbox/nope").status_code == 404
+    finally:
+        service.outbox.stop()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Journal Test
+Checks segment rotation and replay (including a torn final line), the
+single-owner lock, checkpoint compaction, an orchestrator warm restart
+from a checkpoint plus the journal tail, and that workers sharing one
+journal directory each keep their records
+"""
+import glob
+import os
+
+import pytest
+
+import EDEN_SCRIPT as eden
+from event_store import CHAT, STIMULATE
+from journal import Journal, JournalLockedError, claim_lane
+
+
+def lanes(directory):
+    """Lane directories under a journal root"""
+    return sorted(glob.glob(os.path.join(directory, "lane-*")))
+
+
+def test_replay_spans_segments_and_skips_a_torn_tail(tmp_path):
+    journal = Journal(str(tmp_path), segment_bytes=100, fsync_batch=1)
+    journal.open()
+    for i in range(20):
+        journal.append({"i": i, "pad": "x" * 20})
+    assert len(journal.segments()) > 3
+
+    with pytest.raises(JournalLockedError):
+        Journal(str(tmp_path))
+    journal.close()
+
+    # A crash mid-write leaves a partial last line
+    with open(journal._segment_path(journal.segments()[-1]), "ab") as f:
+        f.write(b'{"i": 20, "pa')
+    reopened = Journal(str(tmp_path))
+    assert [record["i"] for record in reopened.replay()] == list(range(20))
+    reopened.close()
+
+
+def test_checkpoint_compacts_covered_segments(tmp_path):
+    journal = Journal(str(tmp_path), segment_bytes=100, checkpoint_bytes=300)
+    journal.open()
+    for i in range(10):
+        journal.append({"i": i, "pad": "x" * 20})
+    assert journal.checkpoint_due
+
+    journal.checkpoint({"covered": 9})
+    assert not journal.checkpoint_due
+    assert journal.segments() == [journal.position()[0]]
+    journal.append({"i": 10})
+
+    checkpoint = journal.load_checkpoint()
+    assert checkpoint["snapshot"] == {"covered": 9}
+    tail = journal.replay((checkpoint["segment"], checkpoint["offset"]))
+    journal.close()
+    assert [record["i"] for record in tail] == [10]
+
+
+def test_orchestrator_warm_restarts_from_checkpoint_and_tail(tmp_path):
+    directory = str(tmp_path)
+    first = eden.CyberAwakeningOrchestrator("Journal_Test")
+    first._open_journal(directory)
+    first.record_memory(CHAT, "before checkpoint")
+    with first.lock:
+        first.dimensions["agency"] = 0.9
+    first.checkpoint()
+    first.record_memory(STIMULATE, "after checkpoint")
+    # Queued before the checkpoint but written after it: already covered
+    first.journal.append({"k": "m", "t": 0.0, "y": int(CHAT), "e": "late duplicate", "q": 1})
+    first.journal.close()
+    first.journal = None
+
+    second = eden.CyberAwakeningOrchestrator("Journal_Test")
+    second._open_journal(directory)
+    try:
+        assert [e.event for e in second.memory] == ["before checkpoint", "after checkpoint"]
+        assert second.memory.counts()["stimulate"] == 1
+        assert second.dimensions["agency"] == 0.9
+        assert second.memory_events == 2 and second.api_calls == 1
+        # The first lane was taken over and removed
+        assert lanes(directory) == [second.journal.directory]
+    finally:
+        second.close()
+    assert os.path.exists(os.path.join(lanes(directory)[0], "checkpoint.json"))
+
+
+def test_workers_sharing_a_directory_keep_their_records(tmp_path):
+    directory = str(tmp_path)
+    workers = [eden.CyberAwakeningOrchestrator(f"Worker_{i}") for i in range(2)]
+    for worker in workers:
+        worker._open_journal(directory)
+        assert worker.journal is not None
+    workers[0].record_memory(CHAT, "from worker 0")
+    workers[1].record_memory(CHAT, "from worker 1")
+    workers[0].checkpoint()
+    workers[0].record_memory(STIMULATE, "worker 0 after its checkpoint")
+    # Neither exits cleanly
+    for worker in workers:
+        worker.journal.close()
+
+    restarted = eden.CyberAwakeningOrchestrator("Worker_Restart")
+    restarted._open_journal(directory)
+    try:
+        assert sorted(e.event for e in restarted.memory) == [
+            "from worker 0", "from worker 1", "worker 0 after its checkpoint"]
+        assert restarted.memory.counts()["chat"] == 2 and restarted.memory.counts()["stimulate"] == 1
+        assert lanes(directory) == [restarted.journal.directory]
+    finally:
+        restarted.close()
+
+    # A takeover that crashed before dropping what it absorbed is not replayed twice
+    [absorbed] = lanes(directory)
+    own, orphans = claim_lane(directory)
+    assert [lane.directory for lane in orphans] == [absorbed]
+    own.checkpoint({}, absorbed=[os.path.basename(absorbed)])
+    own.close()
+    for lane in orphans:
+        lane.close()
+    again, orphans = claim_lane(directory)
+    assert [lane.directory for lane in orphans] == [own.directory]
+    assert not os.path.exists(absorbed)
+    for lane in orphans:
+        lane.close()
+    again.close()
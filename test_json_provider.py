@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+JSON Provider Test
+Runs the provider with orjson and with the standard library fallback and
+checks NumPy values, to_dict() records, key order, Flask's own types, and
+NDJSON chunking and negotiation
+"""
+import importlib.util
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pytest
+from flask import Flask, jsonify, request
+
+from event_store import CHAT, MemoryEvent
+
+
+PROVIDER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "json_provider.py")
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def provider(request, monkeypatch):
+    """A fresh copy of json_provider using the requested encoder"""
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setitem(sys.modules, "orjson", None)
+    spec = importlib.util.spec_from_file_location(f"json_provider_{request.param}", PROVIDER_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert (module.orjson is None) == (request.param == "stdlib")
+    return module
+
+
+def test_jsonify_handles_numpy_records_and_flask_types(provider):
+    app = Flask(__name__)
+    app.json = provider.EdenJSONProvider(app)
+    event = MemoryEvent(CHAT, "hello", ts=0.0)
+    payload = {
+        "z": np.float64(0.25), "a": np.int64(3), "flag": np.bool_(True),
+        "vector": np.array([0.5, 1.0]), "matrix": np.arange(4).reshape(2, 2),
+        "event": event, "tags": {"x"}, "pair": (1, 2),
+        "when": datetime(2025, 1, 2, 3, 4, 5), "text": "café"
+    }
+    with app.app_context():
+        body = jsonify(payload).get_data()
+        assert app.json.dumps({"b": 1, "a": 2}) == '{"a":2,"b":1}'
+        # Stdlib options still work through the provider
+        assert app.json.dumps({"v": np.int64(1)}, indent=2) == '{\n  "v": 1\n}'
+
+    assert list(json.loads(body)) == sorted(payload)
+    decoded = json.loads(body)
+    assert decoded["z"] == 0.25 and decoded["a"] == 3 and decoded["flag"] is True
+    assert decoded["vector"] == [0.5, 1.0] and decoded["matrix"] == [[0, 1], [2, 3]]
+    assert decoded["event"] == event.to_dict()
+    assert decoded["tags"] == ["x"] and decoded["pair"] == [1, 2]
+    assert decoded["when"] == "Thu, 02 Jan 2025 03:04:05 GMT" and decoded["text"] == "café"
+
+    with pytest.raises(TypeError):
+        provider.dumps(object())
+
+
+def test_ndjson_streams_in_chunks_and_is_negotiated(provider):
+    items = [{"i": i, "pad": "x" * 40} for i in range(100)]
+    chunks = list(provider.ndjson_lines(iter(items), chunk_bytes=1024))
+    assert len(chunks) > 1 and all(chunk.endswith(b"\n") for chunk in chunks)
+    lines = b"".join(chunks).decode().splitlines()
+    assert [json.loads(line) for line in lines] == items
+    assert list(provider.ndjson_lines([])) == []
+
+    records = [MemoryEvent(CHAT, f"e{i}", ts=float(i)) for i in range(3)]
+    response = provider.ndjson_response(records, transform=lambda r: r.event, headers={"X-Count": "3"})
+    assert response.mimetype == "application/x-ndjson" and response.headers["X-Count"] == "3"
+    assert response.get_data(as_text=True) == '"e0"\n"e1"\n"e2"\n'
+
+    app = Flask(__name__)
+    for query, accept, expected in [
+        ("format=ndjson", None, True),
+        ("", "application/x-ndjson", True),
+        ("", "application/json, application/x-ndjson;q=0.5", False),
+        ("", None, False),
+    ]:
+        headers = {"Accept": accept} if accept else {}
+        with app.test_request_context(f"/?{query}", headers=headers):
+            assert provider.wants_ndjson(request) is expected
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Metrics Test
+Checks the Prometheus text exposition (labels, escaping, cumulative histogram
+buckets, per-pid and shared gauges), thread-shard merging, aggregation of
+worker dump files, and the API key on /metrics
+"""
+import os
+import threading
+
+from flask import Flask
+
+from api_auth import DEFAULT_API_KEY
+from metrics import CONTENT_TYPE, Registry, registry as app_registry
+
+
+def samples(text):
+    """{series: value} for every sample line of an exposition"""
+    lines = [line for line in text.splitlines() if line and not line.startswith("#")]
+    return dict(line.rsplit(" ", 1) for line in lines)
+
+
+def test_exposition_format_and_thread_shards():
+    registry = Registry()
+    requests = registry.counter("app_requests_total", "Requests", ("route",))
+    latency = registry.histogram("app_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.gauge("app_queue", "Queue depth", ("queue",), lambda: {"mail": 3})
+    registry.gauge("app_version", "State version", collect=lambda: 7, shared=True)
+
+    requests.inc(route='/a"b\n')
+    worker = threading.Thread(target=lambda: requests.inc(2, route="/x"))
+    worker.start()
+    worker.join()
+    requests.inc(route="/x")
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value)
+
+    text = registry.exposition()
+    assert "# HELP app_requests_total Requests\n# TYPE app_requests_total counter" in text
+    assert "# TYPE app_latency_seconds histogram" in text
+    values = samples(text)
+    assert values['app_requests_total{route="/a\\"b\\n"}'] == "1"
+    # The finished thread's shard is folded in
+    assert values['app_requests_total{route="/x"}'] == "3"
+    assert values['app_latency_seconds_bucket{le="0.1"}'] == "1"
+    assert values['app_latency_seconds_bucket{le="1"}'] == "3"
+    assert values['app_latency_seconds_bucket{le="+Inf"}'] == "4"
+    assert values["app_latency_seconds_count"] == "4" and values["app_latency_seconds_sum"] == "6.05"
+    assert values[f'app_queue{{queue="mail",pid="{os.getpid()}"}}'] == "3"
+    assert values["app_version"] == "7"
+
+
+def test_scrape_sums_every_worker(tmp_path):
+    registry = Registry(str(tmp_path))
+    hits = registry.counter("app_hits_total", "Hits")
+    registry.gauge("app_workers", "Per-worker gauge", collect=lambda: 1)
+    hits.inc(5)
+
+    ready_r, ready_w = os.pipe()
+    done_r, done_w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # A forked worker starts from zero and publishes through its dump file
+        hits.inc(2)
+        registry.dump()
+        os.write(ready_w, b"x")
+        os.read(done_r, 1)
+        os._exit(0)
+
+    os.read(ready_r, 1)
+    values = samples(registry.exposition())
+    assert values["app_hits_total"] == "7"
+    assert {values[f'app_workers{{pid="{p}"}}'] for p in (os.getpid(), pid)} == {"1"}
+
+    os.write(done_w, b"x")
+    os.waitpid(pid, 0)
+    # Counters of an exited worker still count; its gauges are dropped
+    values = samples(registry.exposition())
+    assert values["app_hits_total"] == "7" and f'app_workers{{pid="{pid}"}}' not in values
+    assert os.path.exists(tmp_path / f"metrics-{os.getpid()}.json")
+
+
+def test_metrics_route_requires_the_api_key():
+    app = Flask(__name__)
+    app_registry.init_app(app)
+
+    @app.route("/ping")
+    def ping():
+        return "pong"
+
+    client = app.test_client()
+    client.get("/ping")
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": f"Bearer {DEFAULT_API_KEY}"})
+    assert response.status_code == 200 and response.content_type == CONTENT_TYPE
+    assert 'route="/ping",status="200"' in response.get_data(as_text=True)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Profiling Test
+Checks route timings and both capture modes, including overlapping requests
+during a cProfile capture (profiled one at a time, the rest skipped)
+"""
+import threading
+import time
+
+from flask import Flask
+
+from api_auth import DEFAULT_API_KEY
+from profiling import Profiler
+
+
+AUTH = {"X-API-Key": DEFAULT_API_KEY}
+
+
+def make_app(concurrent=1):
+    app = Flask(__name__)
+    profiler = Profiler()
+    profiler.init_app(app)
+    barrier = threading.Barrier(concurrent)
+
+    @app.route("/slow")
+    def slow_route():
+        barrier.wait(timeout=5)
+        time.sleep(0.05)
+        return "ok"
+
+    return app, profiler
+
+
+def hit(client, path, times):
+    threads = [threading.Thread(target=client.get, args=(path,)) for _ in range(times)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_route_timings_cover_every_request():
+    app, profiler = make_app()
+    client = app.test_client()
+    for _ in range(3):
+        client.get("/slow")
+
+    rows = client.get("/api/debug/timings", headers=AUTH).json["routes"]
+    slow = next(row for row in rows if row["route"] == "GET /slow")
+    assert slow["count"] == 3 and slow["wall_ms_mean"] >= 50
+    assert client.get("/api/debug/timings").status_code == 401
+
+
+def test_cprofile_capture_profiles_one_request_at_a_time():
+    app, profiler = make_app(concurrent=4)
+    client = app.test_client()
+    response = client.post("/api/debug/profile", headers=AUTH,
+                           json={"mode": "cprofile", "seconds": 30})
+    assert response.status_code == 202
+
+    hit(client, "/slow", 4)
+    status = profiler.capture.status()
+    assert status["requests"] == 1 and status["skipped"] == 3
+
+    client.delete("/api/debug/profile", headers=AUTH)
+    report = client.get("/api/debug/profile?sort=cumulative", headers=AUTH)
+    assert report.mimetype == "text/plain" and "slow_route" in report.get_data(as_text=True)
+    assert client.get("/api/debug/profile?format=collapsed", headers=AUTH).status_code == 400
+
+
+def test_sampling_capture_collapses_request_stacks():
+    app, profiler = make_app(concurrent=2)
+    client = app.test_client()
+    client.post("/api/debug/profile", headers=AUTH, json={"mode": "sampling", "seconds": 30})
+
+    hit(client, "/slow", 2)
+    assert profiler.capture.status()["requests"] == 2
+
+    client.delete("/api/debug/profile", headers=AUTH)
+    stacks = client.get("/api/debug/profile", headers=AUTH).get_data(as_text=True)
+    assert stacks.startswith("GET /slow;") and "slow_route" in stacks
+    assert client.post("/api/debug/profile", headers=AUTH, json={"mode": "bogus"}).status_code == 400
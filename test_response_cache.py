@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Response Cache Test
+Checks version-keyed reuse, ETag/If-None-Match 304s, sparse fieldsets and
+LRU bounds, and the cached GET / and GET /api/system/status routes
+"""
+import os
+
+import pytest
+from flask import Flask
+
+import EDEN_SCRIPT as eden
+from event_store import CHAT, EventStore
+from response_cache import ResponseCache, parse_fields, select_fields
+
+
+def test_fields_select_dotted_paths_and_ignore_unknown_ones():
+    payload = {"a": {"b": 1, "c": 2}, "d": 3}
+    assert parse_fields(" d,a.b,,d ") == ("a.b", "d") and parse_fields("") is None
+    assert select_fields(payload, ("a.b", "d", "a.zz", "e.f")) == {"a": {"b": 1}, "d": 3}
+
+
+def test_cache_reuses_bytes_until_the_version_changes():
+    app = Flask(__name__)
+    cache = ResponseCache(max_entries=2)
+    state = {"version": 1, "builds": 0}
+
+    def build():
+        state["builds"] += 1
+        return {"version": state["version"], "detail": {"x": 1, "y": 2}}
+
+    @app.route("/data")
+    def data():
+        return cache.respond("data", state["version"], build)
+
+    client = app.test_client()
+    first = client.get("/data")
+    etag = first.headers["ETag"]
+    assert first.json["version"] == 1 and first.headers["Cache-Control"] == "no-cache"
+
+    cached = client.get("/data", headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.data == b"" and cached.headers["ETag"] == etag
+    assert client.get("/data", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    assert state["builds"] == 1 and cache.hits == 2
+
+    state["version"] = 2
+    changed = client.get("/data", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag and state["builds"] == 2
+
+    sparse = client.get("/data?fields=detail.y")
+    assert sparse.json == {"detail": {"y": 2}}
+    # Three (endpoint, fields) keys against a two-entry cache: the oldest went
+    client.get("/data?fields=version")
+    assert len(cache._entries) == 2 and ("data", None) not in cache._entries
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client with a fixed cycle snapshot, without the background threads"""
+    monkeypatch.setattr(eden, "_started_pid", os.getpid())
+    monkeypatch.setattr(eden, "response_cache", ResponseCache())
+    monkeypatch.setattr(eden.orchestrator, "memory", EventStore())
+    snapshot = {"version": 7, "metrics": {"agency": 0.5}, "phase": 1}
+    monkeypatch.setattr(eden.orchestrator, "latest_snapshot",
+                        lambda: (snapshot["version"], 1_700_000_000.0, dict(snapshot)))
+    return eden.app.test_client(), snapshot
+
+
+def test_root_and_status_answer_conditional_requests(client):
+    client, snapshot = client
+    root = client.get("/")
+    assert root.json["ok"] and client.get("/", headers={"If-None-Match": root.headers["ETag"]}).status_code == 304
+
+    status = client.get("/api/system/status")
+    etag = status.headers["ETag"]
+    assert status.json["system_snapshot"]["version"] == 7
+    assert client.get("/api/system/status", headers={"If-None-Match": etag}).status_code == 304
+
+    # A new memory event or cycle version changes the body
+    eden.orchestrator.memory.record(CHAT, "hello")
+    changed = client.get("/api/system/status", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json["recent_events"][0]["event"] == "hello"
+    etag = changed.headers["ETag"]
+    snapshot["version"] = 8
+    assert client.get("/api/system/status", headers={"If-None-Match": etag}).status_code == 200
+
+    sparse = client.get("/api/system/status?fields=system_snapshot.metrics,timestamp")
+    assert set(sparse.json) == {"system_snapshot", "timestamp"}
+    assert sparse.json["system_snapshot"] == {"metrics": {"agency": 0.5}}
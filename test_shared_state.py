@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Shared State Test
+Checks that seqlock readers never see a torn snapshot, that a writer which
+died mid-update is recovered from, and that read-only transactions publish
+no version
+"""
+import os
+import time
+
+from shared_state import FLOAT_FIELDS, INT_FIELDS, MAGIC, SharedState, StateLock, _HEADER
+
+
+DIMS = ["a", "b", "c", "d"]
+
+
+def state_of(value):
+    """A state whose every field holds `value` (so a torn copy is visible)"""
+    state = {"dimensions": {name: float(value) for name in DIMS}}
+    state.update({name: float(value) for name in FLOAT_FIELDS})
+    state.update({name: int(value) for name in INT_FIELDS})
+    return state
+
+
+class Owner:
+    """Stand-in for the orchestrator's working copy"""
+
+    def __init__(self, shared):
+        self.current = state_of(0)
+        self.commits = []
+        self.lock = StateLock(shared, self.load, lambda: self.current,
+                              lambda values, version: self.commits.append(version))
+
+    def load(self, state):
+        self.current = {k: v for k, v in state.items() if k != "version"}
+
+
+def test_readers_never_see_a_torn_snapshot(tmp_path):
+    path = str(tmp_path / "state")
+    shared = SharedState(DIMS, path)
+    shared.acquire()
+    shared.write(state_of(0))
+    shared.release()
+
+    pid = os.fork()
+    if pid == 0:
+        writer = SharedState(DIMS, path)
+        for value in range(1, 20001):
+            writer.acquire()
+            writer.write(state_of(value))
+            writer.release()
+        os._exit(0)
+
+    reads = 0
+    versions = []
+    while True:
+        state = shared.read()
+        values = set(state["dimensions"].values())
+        values.update(state[name] for name in FLOAT_FIELDS + INT_FIELDS)
+        assert len(values) == 1, state
+        versions.append(state["version"])
+        reads += 1
+        if os.waitpid(pid, os.WNOHANG) != (0, 0):
+            break
+    assert versions == sorted(versions)
+    assert shared.read()["dimensions"]["a"] == 20000.0
+    assert reads > 1
+
+
+def test_dead_writer_does_not_wedge_the_lock_or_readers():
+    shared = SharedState(DIMS)
+    owner = Owner(shared)
+    with owner.lock:
+        owner.current = state_of(3)
+    # A writer that died between the two header stores leaves an odd sequence
+    _, ndims, seq, version = _HEADER.unpack_from(shared._buf, 0)
+    _HEADER.pack_into(shared._buf, 0, MAGIC, ndims, seq + 1, version)
+    assert shared.torn
+
+    started = time.monotonic()
+    assert shared.read()["dimensions"]["a"] == 3.0
+    with owner.lock:
+        pass
+    assert time.monotonic() - started < 1.0
+    # Even an unchanged transaction republishes over the torn sequence
+    assert not shared.torn and shared.version == version + 1
+
+
+def test_read_only_transactions_publish_nothing():
+    shared = SharedState(DIMS)
+    owner = Owner(shared)
+    with owner.lock:
+        owner.current = state_of(1)
+    version = shared.version
+    assert owner.commits == [version]
+
+    with owner.lock:
+        with owner.lock:
+            _ = owner.current["dimensions"]["a"]
+    assert shared.version == version and owner.commits == [version]
+
+    with owner.lock:
+        with owner.lock:
+            owner.current["dimensions"]["b"] = 0.5
+        owner.current["api_calls"] += 1
+    assert shared.version == version + 1 and owner.commits == [version, version + 1]
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Stimulate Batch Test
+Checks that apply_nudges lands on the same dimensions as stimulating one
+nudge at a time (in one version bump instead of one per nudge) and reports
+the version it published, and the validation and size cap of the stimulate
+routes
+"""
+import os
+import random
+
+import pytest
+
+import EDEN_SCRIPT as eden
+
+
+@pytest.fixture
+def fresh(monkeypatch):
+    """Routes and stimulate_dimension against a new orchestrator"""
+    monkeypatch.setattr(eden, "_started_pid", os.getpid())
+    orchestrator = eden.CyberAwakeningOrchestrator("Batch_Test")
+    monkeypatch.setattr(eden, "orchestrator", orchestrator)
+    return orchestrator
+
+
+def test_batch_matches_sequential_stimulate_in_one_version(fresh):
+    rng = random.Random(7)
+    names = list(eden.DIMENSION_ALIASES)
+    nudges = [(rng.choice(names), rng.random()) for _ in range(200)]
+
+    sequential = eden.CyberAwakeningOrchestrator("Batch_Test")
+    sequential.dimensions = dict(fresh.dimensions)
+    start = sequential.state.version
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(eden, "orchestrator", sequential)
+        for name, intensity in nudges:
+            assert eden.stimulate_dimension(name, intensity)["ok"]
+    assert sequential.state.version - start == len(nudges)
+
+    start = fresh.state.version
+    result = fresh.apply_nudges([eden.DIMENSION_ALIASES[name] for name, _ in nudges],
+                                [intensity for _, intensity in nudges])
+    assert fresh.state.version == start + 1 == result["version"]
+    for name, value in sequential.dimensions.items():
+        assert fresh.dimensions[name] == pytest.approx(value, abs=1e-12)
+    assert result["metrics"]["agency"] == round(fresh.dimensions["agency"], 4)
+    assert fresh.memory.count(eden.STIMULATE) == 1 and fresh.api_calls == 1
+    assert fresh.read_state()["version"] == result["version"]
+
+    # Inside a caller's transaction nothing is published until it ends
+    with fresh.lock:
+        nested = fresh.apply_nudges(["agency"], [0.5])
+        assert nested["version"] is None and fresh.state.version == result["version"]
+    assert fresh.state.version == result["version"] + 1
+
+
+def test_batch_route_validates_and_caps_nudges(fresh):
+    client = eden.app.test_client()
+
+    def post(body):
+        return client.post("/api/stimulate/batch", json=body)
+
+    response = post({"vector": {"agency": 1.0, "security_posture": 0.0}})
+    assert response.status_code == 200 and response.json["applied"] == 2
+    assert fresh.dimensions["agency"] == pytest.approx(0.6 * 0.7 + 0.3)
+    assert fresh.dimensions["defense"] == pytest.approx(0.3 * 0.7)
+
+    assert post({}).status_code == 400
+    assert post({"nudges": []}).status_code == 400
+    unknown = post({"nudges": [{"dimension": "agency"}, {"dimension": "warp"}]})
+    assert unknown.status_code == 400 and unknown.json["dimensions"] == ["warp"]
+    assert post({"nudges": [{"dimension": "agency", "intensity": "loud"}]}).status_code == 400
+
+    # Malformed shapes are 400s, not crashes
+    for body in ({"nudges": "ab"}, {"nudges": [1]}, {"nudges": [{"dimension": ["x"]}]},
+                 {"nudges": {"dimension": "agency"}}, ["agency"]):
+        response = post(body)
+        assert response.status_code == 400 and response.json["ok"] is False, body
+
+    # NaN and infinities never reach the state
+    before = dict(fresh.dimensions)
+    for intensity in ("nan", "inf", "-Infinity", 1e999):
+        assert post({"vector": {"agency": intensity}}).status_code == 400
+        assert post({"nudges": [{"dimension": "agency", "intensity": intensity}]}).status_code == 400
+        single = client.post("/api/stimulate", json={"dimension": "agency", "intensity": intensity})
+        assert single.status_code == 400 and "number" in single.json["error"]
+    assert fresh.dimensions == before
+    assert client.post("/api/stimulate", json={"dimension": ["agency"]}).status_code == 400
+
+    cap = eden.MAX_BATCH_NUDGES
+    assert post({"nudges": [{"dimension": "agency", "intensity": 0.5}] * cap}).status_code == 200
+    too_many = post({"nudges": [{"dimension": "agency", "intensity": 0.5}] * (cap + 1)})
+    assert too_many.status_code == 400 and str(cap) in too_many.json["error"]
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+WebSocket Channel Test
+Drives a Connection over an in-memory socket and checks id correlation,
+streamed answers that do not hold up other requests, validation and error
+replies, and snapshot/delta pushes while subscribed
+"""
+import json
+import queue
+import threading
+import time
+
+from simple_websocket import ConnectionClosed
+
+from flask import Flask
+
+from event_stream import ClientLimit, SnapshotBroadcaster
+from ws_channel import ChatChannel, Connection
+
+
+class FakeSocket:
+    """receive() pops client messages; send() collects server replies"""
+
+    def __init__(self):
+        self.inbox = queue.Queue()
+        self.sent = []
+        self.closed = None
+        self.cond = threading.Condition()
+
+    def receive(self):
+        message = self.inbox.get(timeout=5)
+        if message is ConnectionClosed:
+            raise ConnectionClosed()
+        return json.dumps(message) if isinstance(message, dict) else message
+
+    def send(self, text):
+        with self.cond:
+            self.sent.append(json.loads(text))
+            self.cond.notify_all()
+
+    def close(self, reason=None, message=None):
+        self.closed = (reason, message)
+
+    def wait_for(self, match, timeout=5.0):
+        """First sent message for which match(message) is true"""
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while True:
+                for message in self.sent:
+                    if match(message):
+                        return message
+                remaining = deadline - time.monotonic()
+                assert remaining > 0, f"no matching message in {self.sent}"
+                self.cond.wait(remaining)
+
+
+def open_channel(limit=None):
+    release = threading.Event()
+    nudges = []
+
+    def ask(persona, prompt, api):
+        yield f"{persona}:"
+        release.wait(5)
+        yield prompt
+
+    def nudge(dimension, intensity):
+        nudges.append((dimension, intensity))
+        return {"ok": True, "dimension": dimension, "value": intensity}
+
+    stream = SnapshotBroadcaster()
+    channel = ChatChannel(
+        ask=ask,
+        validate=lambda persona, api: None if persona == "morningstar" else "unknown persona",
+        nudge=nudge,
+        status=lambda: {"version": 1},
+        stream=stream,
+        limit=limit
+    )
+    ws = FakeSocket()
+    thread = threading.Thread(target=channel.handle, args=(ws,), daemon=True)
+    thread.start()
+    return ws, stream, release, nudges, thread, channel
+
+
+def test_requests_are_answered_by_id_while_an_answer_streams():
+    ws, _, release, nudges, thread, _ = open_channel()
+    ws.inbox.put({"id": "a", "type": "ask", "persona": "morningstar", "prompt": "hello"})
+    assert ws.wait_for(lambda m: m.get("id") == "a")["data"] == "morningstar:"
+
+    # The answer is still streaming; other requests are not queued behind it
+    ws.inbox.put({"id": "n", "type": "nudge", "dimension": "agency", "intensity": 0.75})
+    ws.inbox.put({"id": "s", "type": "status"})
+    ws.inbox.put({"id": "p", "type": "ping"})
+    assert ws.wait_for(lambda m: m.get("id") == "n") == {
+        "id": "n", "type": "nudge", "ok": True, "dimension": "agency", "value": 0.75}
+    assert ws.wait_for(lambda m: m.get("id") == "s")["data"] == {"version": 1}
+    assert ws.wait_for(lambda m: m.get("id") == "p")["type"] == "pong"
+    assert not any(m.get("type") == "done" for m in ws.sent)
+
+    release.set()
+    assert ws.wait_for(lambda m: m.get("type") == "done")["response"] == "morningstar:hello"
+    assert nudges == [("agency", 0.75)]
+
+    ws.inbox.put(ConnectionClosed)
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_bad_messages_get_error_replies():
+    ws, _, _, _, thread, _ = open_channel()
+    ws.inbox.put("not json")
+    ws.inbox.put({"id": "1", "type": "ask", "persona": "nobody"})
+    ws.inbox.put({"id": "2", "type": "nudge", "intensity": "loud"})
+    ws.inbox.put({"id": "3", "type": "explode"})
+    ws.inbox.put({"id": "4", "type": "nudge", "dimension": "agency", "intensity": "nan"})
+    for frame in ("[]", "1", '"hi"'):
+        ws.inbox.put(frame)
+    assert ws.wait_for(lambda m: m.get("id") is None)["error"] == "invalid JSON"
+    assert ws.wait_for(lambda m: m.get("id") == "1")["error"] == "unknown persona"
+    assert ws.wait_for(lambda m: m.get("id") == "2")["type"] == "error"
+    assert ws.wait_for(lambda m: m.get("id") == "3")["error"] == "unknown type: explode"
+    assert ws.wait_for(lambda m: m.get("id") == "4")["error"] == "intensity must be a finite number"
+    # Valid JSON that is not an object is answered, and the connection stays up
+    ws.wait_for(lambda m: len([x for x in ws.sent if x.get("error") == "expected a JSON object"]) == 3)
+    ws.inbox.put({"id": "5", "type": "ping"})
+    assert ws.wait_for(lambda m: m.get("id") == "5")["type"] == "pong"
+    assert thread.is_alive()
+    ws.inbox.put(ConnectionClosed)
+    thread.join(5)
+
+
+def test_subscribers_get_a_snapshot_then_deltas():
+    ws, stream, _, _, thread, _ = open_channel()
+    stream.publish(1, {"metrics": {"agency": 0.1, "defense": 0.3}})
+    ws.inbox.put({"id": "sub", "type": "subscribe"})
+    ws.wait_for(lambda m: m.get("type") == "subscribed")
+    first = ws.wait_for(lambda m: m.get("type") == "snapshot")
+    assert first == {"type": "snapshot", "version": 1, "data": {"metrics": {"agency": 0.1, "defense": 0.3}}}
+
+    stream.publish(2, {"metrics": {"agency": 0.2, "defense": 0.3}})
+    delta = ws.wait_for(lambda m: m.get("type") == "delta")
+    assert delta == {"type": "delta", "version": 2, "data": {"set": {"metrics.agency": 0.2}, "unset": []}}
+    assert stream.subscriber_count == 1
+
+    ws.inbox.put({"id": "unsub", "type": "unsubscribe"})
+    ws.wait_for(lambda m: m.get("type") == "unsubscribed")
+    deadline = time.monotonic() + 5
+    while stream.subscriber_count and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert stream.subscriber_count == 0
+    ws.inbox.put(ConnectionClosed)
+    thread.join(5)
+
+
+def test_connections_over_the_cap_are_refused():
+    limit = ClientLimit(1)
+    ws, _, _, _, thread, channel = open_channel(limit)
+    ws.inbox.put({"id": "p", "type": "ping"})
+    ws.wait_for(lambda m: m.get("id") == "p")
+    assert limit.active == 1
+
+    # Upgrades are refused with a 503 while the cap is reached...
+    app = Flask(__name__)
+    channel.register(app)
+    refused = app.test_client().get("/ws")
+    assert refused.status_code == 503 and refused.headers["Retry-After"] == "5"
+
+    # ...and a connection that got past the check is closed with Try Again Later
+    late = FakeSocket()
+    channel.handle(late)
+    assert late.closed == (1013, "Too many stream clients") and limit.rejected == 1
+
+    ws.inbox.put(ConnectionClosed)
+    thread.join(5)
+    assert limit.active == 0
@@ -0,0 +1,206 @@
+"""
+WebSocket Channel Module
+Persistent bidirectional channel for eden-client
+Multiplexes chat prompts, streamed answers, nudges and status updates over
+one connection, correlated by client-supplied message ids
+
+Client -> server messages:
+    {"id": "1", "type": "ask", "persona": "morningstar", "prompt": "...", "api": "openai"}
+    {"id": "2", "type": "nudge", "dimension": "agency", "intensity": 0.75}
+    {"id": "3", "type": "status"}
+    {"id": "4", "type": "subscribe"} / {"id": "5", "type": "unsubscribe"}
+    {"id": "6", "type": "ping"}
+
+Server -> client messages:
+    {"id": "1", "type": "chunk", "data": "..."} ... {"id": "1", "type": "done", "response": "..."}
+    {"id": "2", "type": "nudge", "ok": true, "dimension": "agency", "value": 0.7}
+    {"id": "3", "type": "status", "data": {...}}
+    {"type": "snapshot" | "delta", "version": 12, "data": {...}}   (while subscribed)
+    {"id": "6", "type": "pong"}
+    {"id": "...", "type": "error", "error": "..."}
+"""
+import json
+import math
+from threading import Thread, Lock, Event
+from typing import Dict, Any, Optional, Callable, Iterator
+
+from flask_sock import Sock
+from simple_websocket import ConnectionClosed
+
+from flask import jsonify, request
+
+from event_stream import ClientLimit, SnapshotBroadcaster
+
+
+class ChatChannel:
+    """
+    WebSocket endpoint wiring
+
+    The orchestrator-facing operations are injected so this module does not
+    import EDEN_SCRIPT:
+        ask(persona, prompt, api) -> Iterator[str]   answer chunks
+        validate(persona, api) -> Optional[str]      error message, if any
+        nudge(dimension, intensity) -> Dict          stimulate result
+        status() -> Dict                             current snapshot payload
+
+    Connections count against `limit` (shared with the SSE stream); upgrades
+    over it get a 503, and one that loses the race is closed with 1013.
+    """
+
+    def __init__(self, ask: Callable[[str, str, str], Iterator[str]],
+                 validate: Callable[[str, str], Optional[str]],
+                 nudge: Callable[[str, float], Dict[str, Any]],
+                 status: Callable[[], Dict[str, Any]],
+                 stream: SnapshotBroadcaster,
+                 limit: Optional[ClientLimit] = None):
+        self.ask = ask
+        self.validate = validate
+        self.nudge = nudge
+        self.status = status
+        self.stream = stream
+        self.limit = limit
+
+    def register(self, app, path: str = "/ws"):
+        """Attach the channel route to a Flask app"""
+        sock = Sock(app)
+        sock.route(path)(self.handle)
+
+        @app.before_request
+        def refuse_when_full():
+            if request.path == path and self.limit is not None and self.limit.full:
+                response = jsonify({"ok": False, "error": "Too many stream clients"})
+                response.headers["Retry-After"] = "5"
+                return response, 503
+
+    def handle(self, ws):
+        """Serve one connection until the client disconnects"""
+        if self.limit is not None and not self.limit.acquire():
+            ws.close(reason=1013, message="Too many stream clients")
+            return
+        try:
+            Connection(self, ws).run()
+        finally:
+            if self.limit is not None:
+                self.limit.release()
+
+
+class Connection:
+    """State of one WebSocket client"""
+
+    def __init__(self, channel: ChatChannel, ws):
+        self.channel = channel
+        self.ws = ws
+        self._send_lock = Lock()
+        self._closed = Event()
+        self._subscribed: Optional[Event] = None
+
+    def send(self, message: Dict[str, Any]):
+        self.send_raw(json.dumps(message, separators=(",", ":")))
+
+    def send_raw(self, text: str):
+        with self._send_lock:
+            if not self._closed.is_set():
+                self.ws.send(text)
+
+    def run(self):
+        try:
+            while True:
+                raw = self.ws.receive()
+                if raw is None:
+                    continue
+                self.dispatch(raw)
+        except ConnectionClosed:
+            pass
+        finally:
+            self._closed.set()
+            if self._subscribed is not None:
+                self._subscribed.set()
+
+    def dispatch(self, raw: str):
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            self.send({"type": "error", "error": "invalid JSON"})
+            return
+        if not isinstance(message, dict):
+            self.send({"type": "error", "error": "expected a JSON object"})
+            return
+
+        msg_id = message.get("id")
+        msg_type = message.get("type")
+        try:
+            if msg_type == "ask":
+                persona = message.get("persona", "")
+                api = message.get("api", "openai")
+                error = self.channel.validate(persona, api)
+                if error:
+                    self.send({"id": msg_id, "type": "error", "error": error})
+                    return
+                # Answers stream from a worker thread so nudges and status stay responsive
+                Thread(target=self._answer, args=(msg_id, persona, message.get("prompt", ""), api),
+                       daemon=True).start()
+            elif msg_type == "nudge":
+                intensity = float(message.get("intensity", 0.5))
+                if not math.isfinite(intensity):
+                    self.send({"id": msg_id, "type": "error", "error": "intensity must be a finite number"})
+                    return
+                result = self.channel.nudge(message.get("dimension", "stability"), intensity)
+                self.send({"id": msg_id, "type": "nudge", **result})
+            elif msg_type == "status":
+                self.send({"id": msg_id, "type": "status", "data": self.channel.status()})
+            elif msg_type == "subscribe":
+                self._subscribe()
+                self.send({"id": msg_id, "type": "subscribed"})
+            elif msg_type == "unsubscribe":
+                if self._subscribed is not None:
+                    self._subscribed.set()
+                    self._subscribed = None
+                self.send({"id": msg_id, "type": "unsubscribed"})
+            elif msg_type == "ping":
+                self.send({"id": msg_id, "type": "pong"})
+            else:
+                self.send({"id": msg_id, "type": "error", "error": f"unknown type: {msg_type}"})
+        except ConnectionClosed:
+            raise
+        except Exception as e:
+            self.send({"id": msg_id, "type": "error", "error": str(e)})
+
+    def _answer(self, msg_id, persona: str, prompt: str, api: str):
+        chunks = []
+        try:
+            for chunk in self.channel.ask(persona, prompt, api):
+                chunks.append(chunk)
+                self.send({"id": msg_id, "type": "chunk", "data": chunk})
+            self.send({"id": msg_id, "type": "done", "response": "".join(chunks)})
+        except ConnectionClosed:
+            pass
+        except Exception as e:
+            try:
+                self.send({"id": msg_id, "type": "error", "error": str(e)})
+            except ConnectionClosed:
+                pass
+
+    def _subscribe(self):
+        if self._subscribed is not None:
+            return
+        stop = Event()
+        self._subscribed = stop
+        Thread(target=self._push_snapshots, args=(stop,), daemon=True).start()
+
+    def _push_snapshots(self, stop: Event):
+        """Forward broadcaster frames (already serialized once per cycle)"""
+        last = None
+        with self.channel.stream.subscription():
+            while not stop.is_set() and not self._closed.is_set():
+                frame = self.channel.stream.next_frame(last, timeout=1.0)
+                if frame is None:
+                    continue
+                if last is not None and frame.version == last + 1 and frame.delta_json is not None:
+                    kind, data = "delta", frame.delta_json
+                else:
+                    kind, data = "snapshot", frame.full_json
+                try:
+                    self.send_raw(f'{{"type":"{kind}","version":{frame.version},"data":{data}}}')
+                except ConnectionClosed:
+                    return
+                last = frame.version